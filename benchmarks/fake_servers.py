@@ -0,0 +1,111 @@
+"""
+Local stand-ins for the external services the bot talks to:
+the job.ubtuit.uz vacancy API and the Telegram Bot API.
+"""
+import asyncio
+import itertools
+import json
+import random
+
+from aiohttp import web
+
+DEPARTMENTS = [
+    "Axborot texnologiyalari kafedrasi",
+    "Dasturiy injiniring kafedrasi",
+    "Telekommunikatsiya kafedrasi",
+    "Tillar kafedrasi",
+    "Buxgalteriya",
+    "Xo‘jalik bo‘limi",
+]
+POSITIONS = ["Katta o‘qituvchi", "Assistent", "Dotsent", "Dasturchi", "Laborant", "Hisobchi", "Muhandis"]
+SCHEDULES = ["To'liq stavka", "0.5 stavka", "Soatbay"]
+
+
+def make_vacancy(vacancy_id: int) -> dict:
+    rnd = random.Random(vacancy_id)
+    return {
+        "id": vacancy_id,
+        "position": f"{rnd.choice(POSITIONS)} #{vacancy_id}",
+        "department": rnd.choice(DEPARTMENTS),
+        "salary": f"{rnd.randint(3, 15)} 000 000 so'm",
+        "experience": f"{rnd.randint(0, 5)} yil",
+        "work_schedule": rnd.choice(SCHEDULES),
+        "requirement": "Oliy ma'lumot, " + ", ".join(rnd.sample(["Python", "SQL", "ingliz tili", "pedagogik tajriba", "1C", "Linux"], 3)),
+        "opening_time": "2025-05-01",
+        "end_time": "2025-06-01",
+    }
+
+
+class FakeVacancyApi:
+    """Paginated /api/v1/vacancies/ with configurable size, latency and error rate."""
+
+    def __init__(self, page_count: int = 10, page_size: int = 10, latency: float = 0.05, error_rate: float = 0.0):
+        self.page_size = page_size
+        self.latency = latency
+        self.error_rate = error_rate
+        self.vacancies = [make_vacancy(i) for i in range(1, page_count * page_size + 1)]
+        self.calls = 0
+        self.errors = 0
+
+    def create_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/api/v1/vacancies/", self.handle)
+        return app
+
+    async def handle(self, request: web.Request) -> web.Response:
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.error_rate and random.random() < self.error_rate:
+            self.errors += 1
+            return web.json_response({"detail": "Service unavailable"}, status=503)
+        page = int(request.query.get("page", "1"))
+        start = (page - 1) * self.page_size
+        if start >= len(self.vacancies) and page > 1:
+            return web.json_response({"detail": "Invalid page."}, status=404)
+        body = {"count": len(self.vacancies), "results": self.vacancies[start:start + self.page_size]}
+        return web.Response(text=json.dumps(body, ensure_ascii=False), content_type="application/json")
+
+
+class FakeTelegramApi:
+    """Accepts any Bot API method and returns a plausible result."""
+
+    TRUE_METHODS = {"answerCallbackQuery", "setMyCommands", "sendChatAction", "setWebhook", "deleteWebhook"}
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls: dict[str, int] = {}
+        self._message_ids = itertools.count(1000)
+
+    def create_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/bot{token}/{method}", self.handle)
+        return app
+
+    async def handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        self.calls[method] = self.calls.get(method, 0) + 1
+        data = {key: value for key, value in (await request.post()).items() if isinstance(value, str)}
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if method in self.TRUE_METHODS:
+            return web.json_response({"ok": True, "result": True})
+        result = {
+            "message_id": int(data.get("message_id") or next(self._message_ids)),
+            "date": 0,
+            "chat": {"id": int(data.get("chat_id", 1)), "type": "private"},
+            "text": data.get("text", ""),
+        }
+        if method == "sendDocument":
+            result["document"] = {"file_id": "BENCHMARK_FILE_ID", "file_unique_id": "benchmark"}
+        return web.json_response({"ok": True, "result": result})
+
+
+async def start_app(app: web.Application, host: str = "127.0.0.1", port: int = 0) -> tuple[web.AppRunner, str]:
+    """Starts the app on a free port and returns (runner, base_url)."""
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    bound_port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://{host}:{bound_port}"
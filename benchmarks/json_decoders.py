@@ -0,0 +1,150 @@
+"""
+Compares the vacancy page decoders on realistic payloads: every available backend (json, orjson,
+msgspec) and the streaming parser, each timed from response bytes to the parser's Vacancy records.
+The "decode ms" column is the backend's parse step alone (the streaming parser builds records while it
+parses, so it has none). Peak memory of one decode is measured separately with tracemalloc.
+
+    python benchmarks/json_decoders.py
+    python benchmarks/json_decoders.py --sizes 10,1000,20000 --chunk-size 16384 --json
+"""
+import argparse
+import asyncio
+import gc
+import json
+import logging
+import os
+import sys
+import time
+import tracemalloc
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from fake_servers import make_vacancy  # noqa: E402
+from vacancy_decoder import (  # noqa: E402
+    DECODER_JSON, DECODER_MSGSPEC, DECODER_ORJSON, STREAM_CHUNK_SIZE, StreamingPageDecoder, create_decoder, msgspec, orjson
+)
+from vacancy_parser import Vacancy, VacancyParser  # noqa: E402
+
+STREAMING = "streaming"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Vacancy page decoder benchmark")
+    parser.add_argument("--sizes", default="10,100,5000", help="comma separated vacancies per page")
+    parser.add_argument("--min-time", type=float, default=0.5, help="seconds spent timing each decoder per size")
+    parser.add_argument("--chunk-size", type=int, default=STREAM_CHUNK_SIZE, help="network chunk size for the streaming parser")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    return parser.parse_args()
+
+
+def make_page(size: int) -> bytes:
+    page = {"count": size * 10, "next": None, "previous": None, "results": [make_vacancy(i) for i in range(1, size + 1)]}
+    return json.dumps(page, ensure_ascii=False).encode("utf-8")
+
+
+async def body_chunks(body: bytes, chunk_size: int):
+    for start in range(0, len(body), chunk_size):
+        yield body[start:start + chunk_size]
+
+
+def make_runner(name: str, parser: VacancyParser, body: bytes, chunk_size: int):
+    """Returns an async callable doing one full decode into records, like VacancyParser._request_page."""
+    if name == STREAMING:
+        async def run():
+            decoder = StreamingPageDecoder(
+                body_chunks(body, chunk_size), lambda item: parser._share_vacancy(Vacancy.from_dict(item))
+            )
+            return parser._parse_payload(await decoder.decode(), 1)
+    else:
+        async def run():
+            return parser._parse_payload(parser.decoder.decode(body), 1)
+    return run
+
+
+async def measure(name: str, body: bytes, min_time: float, chunk_size: int) -> dict:
+    parser = VacancyParser("http://localhost/", json_decoder=DECODER_JSON if name == STREAMING else name)
+    run = make_runner(name, parser, body, chunk_size)
+    vacancies = (await run())[0]
+
+    rounds = 0
+    elapsed = 0.0
+    while elapsed < min_time:
+        parser._known_vacancies.clear()  # har safar barcha yozuvlar qaytadan yaratiladi
+        started = time.perf_counter()
+        await run()
+        elapsed += time.perf_counter() - started
+        rounds += 1
+
+    parser._known_vacancies.clear()
+    gc.collect()
+    tracemalloc.start()
+    await run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    await parser.close()
+
+    decode_ms = None
+    if name != STREAMING:
+        started = time.perf_counter()
+        for _ in range(rounds):
+            parser.decoder.decode(body)
+        decode_ms = round((time.perf_counter() - started) / rounds * 1000, 3)
+
+    per_page = elapsed / rounds
+    return {
+        "decoder": name,
+        "vacancies": len(vacancies),
+        "rounds": rounds,
+        "ms_per_page": round(per_page * 1000, 3),
+        "decode_ms": decode_ms,
+        "vacancies_per_s": round(len(vacancies) / per_page) if per_page else 0,
+        "mb_per_s": round(len(body) / per_page / 1e6, 1) if per_page else 0.0,
+        "peak_memory_kb": round(peak / 1024, 1),
+    }
+
+
+async def run_benchmark(args) -> dict:
+    decoders = [DECODER_JSON]
+    if orjson is not None:
+        decoders.append(DECODER_ORJSON)
+    if msgspec is not None:
+        decoders.append(DECODER_MSGSPEC)
+    decoders.append(STREAMING)
+
+    report = {"decoders": decoders, "auto": create_decoder().name, "chunk_size": args.chunk_size, "pages": []}
+    for size in (int(value) for value in args.sizes.split(",") if value.strip()):
+        body = make_page(size)
+        results = [await measure(name, body, args.min_time, args.chunk_size) for name in decoders]
+        baseline = results[0]["ms_per_page"]
+        for result in results:
+            result["speedup"] = round(baseline / result["ms_per_page"], 2) if result["ms_per_page"] else 0.0
+        report["pages"].append({"size": size, "body_kb": round(len(body) / 1024, 1), "results": results})
+    return report
+
+
+def print_report(report: dict):
+    print(f"Decoders: {', '.join(report['decoders'])} (auto picks {report['auto']}), streaming chunk: {report['chunk_size']} bytes")
+    for page in report["pages"]:
+        print(f"\nPage of {page['size']} vacancies ({page['body_kb']} KiB)")
+        print(f"{'decoder':<12}{'ms/page':>10}{'decode ms':>11}{'vac/s':>12}{'MB/s':>8}{'peak KiB':>11}{'speedup':>9}")
+        for result in page["results"]:
+            print(
+                f"{result['decoder']:<12}{result['ms_per_page']:>10}{result['decode_ms'] if result['decode_ms'] is not None else '-':>11}"
+                f"{result['vacancies_per_s']:>12}"
+                f"{result['mb_per_s']:>8}{result['peak_memory_kb']:>11}{result['speedup']:>8}x"
+            )
+
+
+def main():
+    args = parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    report = asyncio.run(run_benchmark(args))
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
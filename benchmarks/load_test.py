@@ -0,0 +1,249 @@
+"""
+Load test for the bot handlers against local fake vacancy and Telegram APIs.
+
+Simulated users go through /start, keyword search, "Vakansiyalarni qidirish", page:N and vacancy:i
+flows; updates are fed straight into the dispatcher, so the numbers cover handler, parser, FSM and
+Bot API client time without Telegram's network.
+
+    python benchmarks/load_test.py --users 2000 --concurrency 200 --pages 20 --latency-ms 80
+    python benchmarks/load_test.py --mode api --error-rate 0.05 --json
+    python benchmarks/load_test.py --snapshot-path /tmp/vacancies.bin  # ikkinchi ishga tushirish - "issiq" start
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from fake_servers import FakeTelegramApi, FakeVacancyApi, start_app  # noqa: E402
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Bot handler load test")
+    parser.add_argument("--users", type=int, default=1000, help="simulated users")
+    parser.add_argument("--concurrency", type=int, default=100, help="users active at the same time")
+    parser.add_argument("--pages", type=int, default=10, help="pages in the fake vacancy feed")
+    parser.add_argument("--page-size", type=int, default=10)
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="fake vacancy API latency")
+    parser.add_argument("--telegram-latency-ms", type=float, default=0.0, help="fake Bot API latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of vacancy API requests answered with 503")
+    parser.add_argument("--mode", choices=("snapshot", "api"), default="snapshot",
+                        help="snapshot: background sync serves pages; api: every page goes through VacancyParser")
+    parser.add_argument("--flood-limits", action="store_true",
+                        help="keep the real Telegram rate limits in the send scheduler (default: effectively unlimited)")
+    parser.add_argument("--snapshot-path", default="",
+                        help="vacancy snapshot file; run twice to measure a warm start (default: no snapshot, cold start)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    return parser.parse_args()
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(q * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def deep_sizeof(value, seen: set | None = None) -> int:
+    seen = seen if seen is not None else set()
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        size += sum(deep_sizeof(item, seen) for item in value)
+    return size
+
+
+class Simulator:
+    def __init__(self, bot_module, args):
+        from aiogram import types
+        self.types = types
+        self.main = bot_module
+        self.args = args
+        self.latencies: dict[str, list[float]] = {}
+        self.failures = 0
+        self._update_ids = itertools.count(1)
+
+    def _user(self, user_id: int) -> dict:
+        return {"id": user_id, "is_bot": False, "first_name": f"User{user_id}"}
+
+    def message(self, user_id: int, text: str):
+        update_id = next(self._update_ids)
+        return self.types.Update(update_id=update_id, message={
+            "message_id": update_id, "date": 0, "text": text,
+            "chat": {"id": user_id, "type": "private"}, "from": self._user(user_id),
+        })
+
+    def callback(self, user_id: int, data: str):
+        update_id = next(self._update_ids)
+        return self.types.Update(update_id=update_id, callback_query={
+            "id": str(update_id), "chat_instance": str(user_id), "data": data, "from": self._user(user_id),
+            "message": {"message_id": user_id, "date": 0, "text": "-", "chat": {"id": user_id, "type": "private"}},
+        })
+
+    async def feed(self, action: str, update):
+        started = time.perf_counter()
+        try:
+            await self.main.dp.feed_update(self.main.bot, update)
+        except Exception:
+            self.failures += 1
+            logging.exception("Handler failed for action %s", action)
+        self.latencies.setdefault(action, []).append(time.perf_counter() - started)
+
+    async def run_user(self, user_id: int, rnd: random.Random):
+        await self.feed("start", self.message(user_id, "/start"))
+        await self.feed("keyword_prompt", self.message(user_id, "Kalit so'z bo'yicha qidirish"))
+        await self.feed("keyword_search", self.message(user_id, rnd.choice(["o'qituvchi", "dasturchi", "kafedra", "python"])))
+        await self.feed("back", self.message(user_id, "Ortga"))
+        await self.feed("search", self.message(user_id, "Vakansiyalarni qidirish"))
+        page = 1
+        for _ in range(rnd.randint(1, 4)):
+            page = min(self.args.pages, page + 1)
+            await self.feed("page", self.callback(user_id, f"page:{page}"))
+        await self.feed("vacancy", self.callback(user_id, f"vacancy:{rnd.randrange(self.args.page_size)}"))
+        await self.feed("page", self.callback(user_id, f"page:{page}"))
+
+    async def run(self) -> float:
+        semaphore = asyncio.Semaphore(self.args.concurrency)
+        rnd = random.Random(self.args.seed)
+
+        async def limited(user_id: int, seed: int):
+            async with semaphore:
+                await self.run_user(user_id, random.Random(seed))
+
+        started = time.perf_counter()
+        await asyncio.gather(*(limited(user_id, rnd.random()) for user_id in range(1, self.args.users + 1)))
+        return time.perf_counter() - started
+
+
+def session_sizes(storage) -> tuple[int, float, float]:
+    records = getattr(storage, "storage", {})
+    sessions = [record for record in records.values() if record.state or record.data]
+    if not sessions:
+        return 0, 0.0, 0.0
+    serialized = sum(len(json.dumps(record.data)) + len(record.state or "") for record in sessions)
+    in_memory = sum(deep_sizeof(record.data) for record in sessions)
+    return len(sessions), serialized / len(sessions), in_memory / len(sessions)
+
+
+async def run_benchmark(args, runtime_dir: str) -> dict:
+    vacancy_api = FakeVacancyApi(
+        page_count=args.pages, page_size=args.page_size,
+        latency=args.latency_ms / 1000, error_rate=args.error_rate
+    )
+    telegram_api = FakeTelegramApi(latency=args.telegram_latency_ms / 1000)
+    vacancy_runner, vacancy_url = await start_app(vacancy_api.create_app())
+    telegram_runner, telegram_url = await start_app(telegram_api.create_app())
+
+    os.environ["BOT_TOKEN"] = "123456:BENCHMARK"
+    os.environ["FSM_STORAGE_URL"] = "memory"
+    # Bot yaratadigan fayllar joriy papkada emas, vaqtinchalik papkada (--snapshot-path berilsa, u saqlanadi)
+    os.environ["SUBSCRIPTIONS_PATH"] = os.path.join(runtime_dir, "subscriptions.sqlite3")
+    os.environ["DOCUMENT_CACHE_PATH"] = os.path.join(runtime_dir, "document_cache.json")
+    os.environ["VACANCY_SYNC_INTERVAL"] = "300" if args.mode == "snapshot" else "0"
+    os.environ["VACANCY_SNAPSHOT_PATH"] = args.snapshot_path
+    if not args.flood_limits:
+        # Barcha foydalanuvchilar bitta bot orqali yuboradi: haqiqiy cheklovlarda benchmark Telegram tezligini o'lchab qoladi
+        os.environ["TELEGRAM_GLOBAL_RATE"] = os.environ["TELEGRAM_CHAT_RATE"] = "1000000"
+    import main as bot_module
+    from aiogram.client.telegram import TelegramAPIServer
+    logging.getLogger().setLevel(logging.WARNING)
+
+    bot_module.API_URL = f"{vacancy_url}/api/v1/vacancies/"
+    bot_module.bot.session.api = TelegramAPIServer.from_base(telegram_url)
+    startup_started = time.perf_counter()
+    await bot_module.dp.emit_startup(bot=bot_module.bot)
+    if bot_module.vacancy_sync:
+        while bot_module.vacancy_sync.snapshot is None:
+            await asyncio.sleep(0.001)
+    ready_s = time.perf_counter() - startup_started
+
+    simulator = Simulator(bot_module, args)
+    upstream_before = vacancy_api.calls
+    elapsed = await simulator.run()
+    upstream_calls = vacancy_api.calls - upstream_before
+    sessions, serialized_bytes, memory_bytes = session_sizes(bot_module.dp.storage)
+    parser_stats = bot_module.vacancy_parser.cache_stats()
+
+    await bot_module.dp.emit_shutdown(bot=bot_module.bot)
+    await bot_module.bot.session.close()
+    await vacancy_runner.cleanup()
+    await telegram_runner.cleanup()
+
+    actions = sum(len(values) for values in simulator.latencies.values())
+    all_latencies = sorted(itertools.chain.from_iterable(simulator.latencies.values()))
+    per_action = {}
+    for action, values in sorted(simulator.latencies.items()):
+        values.sort()
+        per_action[action] = {
+            "count": len(values),
+            "p50_ms": round(percentile(values, 0.50) * 1000, 3),
+            "p95_ms": round(percentile(values, 0.95) * 1000, 3),
+            "p99_ms": round(percentile(values, 0.99) * 1000, 3),
+        }
+    return {
+        "mode": args.mode,
+        "users": args.users,
+        "actions": actions,
+        "failures": simulator.failures,
+        "elapsed_s": round(elapsed, 3),
+        "ready_ms": round(ready_s * 1000, 3),
+        "throughput_actions_per_s": round(actions / elapsed, 1) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(all_latencies, 0.50) * 1000, 3),
+            "p95": round(percentile(all_latencies, 0.95) * 1000, 3),
+            "p99": round(percentile(all_latencies, 0.99) * 1000, 3),
+        },
+        "per_action": per_action,
+        "upstream_calls": upstream_calls,
+        "upstream_calls_per_action": round(upstream_calls / actions, 4) if actions else 0.0,
+        "telegram_calls": telegram_api.calls,
+        "page_cache": parser_stats,
+        "sessions": sessions,
+        "session_bytes_serialized": round(serialized_bytes, 1),
+        "session_bytes_in_memory": round(memory_bytes, 1),
+    }
+
+
+def print_report(report: dict):
+    print(f"Mode: {report['mode']}, users: {report['users']}, actions: {report['actions']}, failures: {report['failures']}")
+    print(f"Ready after startup: {report['ready_ms']} ms")
+    print(f"Elapsed: {report['elapsed_s']}s, throughput: {report['throughput_actions_per_s']} actions/s")
+    latency = report["latency_ms"]
+    print(f"Handler latency (ms): p50={latency['p50']} p95={latency['p95']} p99={latency['p99']}")
+    print(f"{'action':<16}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for action, stats in report["per_action"].items():
+        print(f"{action:<16}{stats['count']:>8}{stats['p50_ms']:>10}{stats['p95_ms']:>10}{stats['p99_ms']:>10}")
+    print(f"Upstream calls: {report['upstream_calls']} ({report['upstream_calls_per_action']} per action)")
+    print(f"Page cache: {report['page_cache']}")
+    print(f"Telegram calls: {report['telegram_calls']}")
+    print(
+        f"Sessions: {report['sessions']}, per session: {report['session_bytes_serialized']} B serialized, "
+        f"{report['session_bytes_in_memory']} B in memory"
+    )
+
+
+def main():
+    args = parse_args()
+    with tempfile.TemporaryDirectory(prefix="jobbot-load-test-") as runtime_dir:
+        report = asyncio.run(run_benchmark(args, runtime_dir))
+    if args.json:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
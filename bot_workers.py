@@ -0,0 +1,356 @@
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import signal
+import tempfile
+import threading
+import time
+from typing import Any, Awaitable, Callable
+
+from aiogram import BaseMiddleware, Bot, Dispatcher
+from aiogram.types import TelegramObject, Update
+
+from metrics import MetricsRegistry
+from vacancy_search import VacancySearchIndex
+from vacancy_snapshot import encode_snapshot, read_snapshot, write_snapshot
+from vacancy_store import VacancySnapshot
+
+WORKER_CHECK_INTERVAL = 5.0  # sekund; to'xtab qolgan ishchi jarayonlar shu oraliqda qayta ishga tushiriladi
+WORKER_STOP_TIMEOUT = 10.0
+KEPT_SNAPSHOT_FILES = 2  # joriy va oldingi snapshot (ishchi hali o'qiyotgan bo'lishi mumkin)
+METRICS_REPORT_INTERVAL = 5.0  # sekund; ishchilar handler/Bot API metrikalarini supervisor'ga shu oraliqda yuboradi
+METRICS_COLLECT_INTERVAL = 1.0  # sekund; supervisor ishchilar hisobotlarini shu oraliqda o'qiydi
+
+# Navbatdagi xabarlar: ("update", shard kaliti, update JSON), ("snapshot", fayl, versiya, sinxronizatsiya vaqti), None - to'xtash
+MESSAGE_UPDATE = "update"
+MESSAGE_SNAPSHOT = "snapshot"
+# Ishchidan supervisor'ga: ("metrics", registry.snapshot())
+MESSAGE_METRICS = "metrics"
+
+
+def shared_memory_dir() -> str:
+    """tmpfs (/dev/shm) when available: snapshot files there live in RAM and are mmap'ed by the workers."""
+    return "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+
+
+def shard_for(key: int, workers: int) -> int:
+    return key % workers
+
+
+class ShardForwardMiddleware(BaseMiddleware):
+    """
+    Outer update middleware of the supervisor's dispatcher: instead of handling the update, hands it
+    to the worker that owns its chat (the user for chat-less updates), so a chat is always served by
+    the same process and its updates keep their order.
+    """
+
+    def __init__(self, pool: "WorkerPool"):
+        self.pool = pool
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: dict[str, Any]
+    ) -> Any:
+        chat = data.get("event_chat")
+        user = data.get("event_from_user")
+        key = chat.id if chat is not None else user.id if user is not None else event.update_id
+        self.pool.dispatch(key, event.model_dump_json(exclude_unset=True))
+
+
+class WorkerPool:
+    """
+    Supervisor side of the multi-process mode: N spawned worker processes, one inbox queue each.
+    Updates are routed by chat id. Every vacancy snapshot is encoded once, written to shared memory
+    (a tmpfs file) and announced to all workers, which mmap and decode it; dead workers are restarted.
+    Workers report their metrics back through an outbox queue; they are merged into `registry`.
+    """
+
+    def __init__(
+        self,
+        target: Callable[[int, Any, Any], None],
+        workers: int,
+        index: VacancySearchIndex | None = None,
+        snapshot_dir: str | None = None,
+        registry: MetricsRegistry | None = None
+    ):
+        self.target = target  # target(worker_id, inbox, outbox) - modul darajasidagi funksiya (spawn uchun)
+        self.workers = max(1, workers)
+        self.index = index
+        self.snapshot_dir = snapshot_dir or shared_memory_dir()
+        self.registry = registry
+        self._context = multiprocessing.get_context("spawn")
+        self._inboxes = [self._context.Queue() for _ in range(self.workers)]
+        self._outboxes = [self._context.Queue() for _ in range(self.workers)]
+        self._processes: list = [None] * self.workers
+        self._monitor: asyncio.Task | None = None
+        self._metrics_collector: asyncio.Task | None = None
+        self._publish_task: asyncio.Task | None = None
+        self._published: list[str] = []
+        self._current: tuple | None = None  # (fayl, versiya, sinxronizatsiya vaqti)
+        self._stopping = False
+        self.dispatched = [0] * self.workers
+        self.restarts = 0
+
+    def _spawn(self, worker_id: int):
+        if self._processes[worker_id] is not None:
+            # O'ldirilgan jarayon navbat qulfini ushlab qolgan bo'lishi mumkin - yangi jarayonga yangi navbat
+            # (eski navbatdagi qayta ishlanmagan update'lar yo'qoladi)
+            self._inboxes[worker_id].close()
+            self._inboxes[worker_id] = self._context.Queue()
+            self._collect_metrics(worker_id)  # o'lgan jarayonning oxirgi hisoboti
+            self._outboxes[worker_id].close()
+            self._outboxes[worker_id] = self._context.Queue()
+            if self.registry is not None:
+                self.registry.retire(worker_id)  # yangi jarayon hisoblagichlarni noldan boshlaydi
+        process = self._context.Process(
+            target=self.target, args=(worker_id, self._inboxes[worker_id], self._outboxes[worker_id]),
+            name=f"bot-worker-{worker_id}", daemon=True
+        )
+        process.start()
+        self._processes[worker_id] = process
+        if self._current is not None:
+            self._inboxes[worker_id].put((MESSAGE_SNAPSHOT, *self._current))
+        logging.info("Bot worker %s started (pid %s).", worker_id, process.pid)
+
+    def start(self):
+        for worker_id in range(self.workers):
+            self._spawn(worker_id)
+        self._monitor = asyncio.create_task(self._watch(), name="bot-worker-monitor")
+        if self.registry is not None:
+            self._metrics_collector = asyncio.create_task(self._collect_metrics_periodically(), name="bot-worker-metrics")
+
+    def _collect_metrics(self, worker_id: int):
+        outbox = self._outboxes[worker_id]
+        while True:
+            try:
+                # Bloklanmaydi: o'ldirilgan jarayon navbat qulfini ushlab qolgan bo'lsa ham Empty
+                message = outbox.get_nowait()
+            except (queue.Empty, OSError, EOFError):
+                return
+            if message[0] == MESSAGE_METRICS and self.registry is not None:
+                self.registry.merge(worker_id, message[1])
+
+    async def _collect_metrics_periodically(self):
+        while True:
+            await asyncio.sleep(METRICS_COLLECT_INTERVAL)
+            for worker_id in range(self.workers):
+                self._collect_metrics(worker_id)
+
+    async def _watch(self):
+        while True:
+            await asyncio.sleep(WORKER_CHECK_INTERVAL)
+            for worker_id, process in enumerate(self._processes):
+                if not self._stopping and process is not None and not process.is_alive():
+                    logging.error("Bot worker %s exited with code %s, restarting.", worker_id, process.exitcode)
+                    self.restarts += 1
+                    self._spawn(worker_id)
+
+    def dispatch(self, key: int, payload: str):
+        worker_id = shard_for(key, self.workers)
+        self._inboxes[worker_id].put((MESSAGE_UPDATE, key, payload))
+        self.dispatched[worker_id] += 1
+
+    async def _publish(self, previous: asyncio.Task | None, snapshot: VacancySnapshot, postings: dict | None, synced_at: float):
+        if previous is not None:
+            await asyncio.gather(previous, return_exceptions=True)
+        if self._current is not None and self._current[1] == snapshot.version:
+            path = self._current[0]
+        else:
+            path = os.path.join(self.snapshot_dir, f"jobbot-{os.getpid()}-v{snapshot.version}.bin")
+            try:
+                data = await asyncio.to_thread(encode_snapshot, snapshot, postings)
+                await asyncio.to_thread(write_snapshot, path, data)
+            except Exception:
+                logging.exception("Could not publish vacancy snapshot v%s to %s.", snapshot.version, path)
+                return
+            self._published.append(path)
+            while len(self._published) > KEPT_SNAPSHOT_FILES:
+                self._remove(self._published.pop(0))
+            logging.info("Vacancy snapshot v%s published to workers (%s bytes).", snapshot.version, len(data))
+        self._current = (path, snapshot.version, synced_at)
+        for inbox in self._inboxes:
+            inbox.put((MESSAGE_SNAPSHOT, *self._current))
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)  # mmap qilgan ishchilar o'qishni tugatadi - POSIX'da fayl ochiq turganda ham o'chirish xavfsiz
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logging.warning("Could not remove old snapshot %s: %s", path, e)
+
+    def on_synced(self, snapshot: VacancySnapshot, synced_at: float | None = None):
+        """VacancySynchronizer sync listener: sends new snapshot versions (or just the sync time) to every worker."""
+        postings = None
+        if self.index is not None and (self._current is None or self._current[1] != snapshot.version):
+            postings = self.index.export_postings()
+        synced_at = time.time() if synced_at is None else synced_at
+        self._publish_task = asyncio.create_task(self._publish(self._publish_task, snapshot, postings, synced_at))
+
+    async def stop(self):
+        self._stopping = True
+        for task in (self._monitor, self._metrics_collector):
+            if task is not None:
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+        if self._publish_task is not None:
+            await asyncio.gather(self._publish_task, return_exceptions=True)
+        for inbox in self._inboxes:
+            inbox.put(None)
+        for worker_id, process in enumerate(self._processes):
+            if process is None:
+                continue
+            await asyncio.to_thread(process.join, WORKER_STOP_TIMEOUT)
+            if process.is_alive():
+                logging.warning("Bot worker %s did not stop in %ss, terminating.", worker_id, WORKER_STOP_TIMEOUT)
+                process.terminate()
+                await asyncio.to_thread(process.join)
+            self._collect_metrics(worker_id)
+        for path in self._published:
+            self._remove(path)
+        self._published.clear()
+        logging.info("Bot workers stopped.")
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "alive": sum(1 for process in self._processes if process is not None and process.is_alive()),
+            "restarts": self.restarts,
+            "dispatched": sum(self.dispatched),
+            "snapshot_version": self._current[1] if self._current else 0,
+        }
+
+
+class WorkerLoop:
+    """
+    Worker side: reads its inbox in a thread and feeds updates into the dispatcher. Different chats are
+    handled concurrently (up to `concurrency`), updates of one chat strictly one after another.
+    """
+
+    def __init__(
+        self,
+        dispatcher: Dispatcher,
+        bot: Bot,
+        inbox,
+        install_snapshot: Callable[[VacancySnapshot | None, dict | None, float], None],
+        concurrency: int,
+        outbox=None,
+        registry: MetricsRegistry | None = None
+    ):
+        self.dispatcher = dispatcher
+        self.bot = bot
+        self.inbox = inbox
+        self.outbox = outbox
+        self.registry = registry
+        self.install_snapshot = install_snapshot
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._chat_locks: dict[int, list] = {}  # kalit -> [asyncio.Lock, kutayotgan update'lar soni]
+        self._tasks: set[asyncio.Task] = set()
+        self._snapshots: asyncio.Queue = asyncio.Queue()
+        self._snapshot_version: int | None = None
+
+    def _read_inbox(self, loop: asyncio.AbstractEventLoop, messages: asyncio.Queue):
+        while True:
+            message = self.inbox.get()
+            loop.call_soon_threadsafe(messages.put_nowait, message)
+            if message is None:
+                return
+
+    async def _handle(self, key: int, payload: str):
+        entry = self._chat_locks.get(key)
+        if entry is None:
+            entry = self._chat_locks[key] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            # Lock navbati FIFO: bitta chatning update'lari kelgan tartibda qayta ishlanadi
+            async with entry[0], self._semaphore:
+                await self.dispatcher.feed_raw_update(self.bot, json.loads(payload))
+        except Exception:
+            # feed_raw_update handler xatolarini log qilmaydi (faqat polling yo'li qiladi)
+            logging.exception("Update for chat %s failed in worker", key)
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._chat_locks[key]
+
+    async def _load_snapshots(self):
+        while True:
+            message = await self._snapshots.get()
+            while not self._snapshots.empty():
+                message = self._snapshots.get_nowait()  # faqat eng so'nggisi kerak
+            path, version, synced_at = message
+            if version == self._snapshot_version:
+                self.install_snapshot(None, None, synced_at)
+                continue
+            try:
+                snapshot, postings, _ = await asyncio.to_thread(read_snapshot, path)
+            except FileNotFoundError:
+                continue  # allaqachon yangisi e'lon qilingan
+            except (OSError, ValueError) as e:
+                logging.warning("Could not load published snapshot %s: %s", path, e)
+                continue
+            self._snapshot_version = version
+            self.install_snapshot(snapshot, postings, synced_at)
+            logging.info("Vacancy snapshot v%s installed (%s vacancies).", version, snapshot.total_items)
+
+    def _report_metrics(self):
+        if self.outbox is not None and self.registry is not None:
+            self.outbox.put((MESSAGE_METRICS, self.registry.snapshot()))
+
+    async def _report_metrics_periodically(self):
+        while True:
+            await asyncio.sleep(METRICS_REPORT_INTERVAL)
+            self._report_metrics()
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        messages: asyncio.Queue = asyncio.Queue()
+        threading.Thread(target=self._read_inbox, args=(loop, messages), name="bot-worker-inbox", daemon=True).start()
+        loader = asyncio.create_task(self._load_snapshots(), name="bot-worker-snapshots")
+        reporter = asyncio.create_task(self._report_metrics_periodically(), name="bot-worker-metrics")
+        try:
+            while True:
+                message = await messages.get()
+                if message is None:
+                    break
+                if message[0] == MESSAGE_UPDATE:
+                    task = asyncio.create_task(self._handle(message[1], message[2]))
+                    self._tasks.add(task)
+                    task.add_done_callback(self._tasks.discard)
+                elif message[0] == MESSAGE_SNAPSHOT:
+                    self._snapshots.put_nowait(message[1:])
+            await asyncio.gather(*self._tasks)
+        finally:
+            loader.cancel()
+            reporter.cancel()
+            await asyncio.gather(loader, reporter, return_exceptions=True)
+            self._report_metrics()
+
+
+async def serve_worker(
+    dispatcher: Dispatcher,
+    bot: Bot,
+    worker_id: int,
+    inbox,
+    install_snapshot: Callable[[VacancySnapshot | None, dict | None, float], None],
+    concurrency: int,
+    outbox=None,
+    registry: MetricsRegistry | None = None
+):
+    """Runs one worker process until the supervisor sends the stop message."""
+    # Ctrl+C butun jarayonlar guruhiga yuboriladi - ishchilarni supervisor navbat orqali to'xtatadi
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    await dispatcher.emit_startup(bot=bot)
+    logging.info("Bot worker %s ready (pid %s).", worker_id, os.getpid())
+    try:
+        await WorkerLoop(dispatcher, bot, inbox, install_snapshot, concurrency, outbox, registry).run()
+    finally:
+        await dispatcher.emit_shutdown(bot=bot)
+        await bot.session.close()
+        logging.info("Bot worker %s stopped.", worker_id)
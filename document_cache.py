@@ -0,0 +1,155 @@
+import asyncio
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+
+from aiogram import Bot
+from aiogram.enums import ChatAction
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import FSInputFile, Message
+
+DEFAULT_DOCUMENT_CACHE_PATH = "document_cache.json"
+STAT_CHECK_INTERVAL = 10.0  # sekund; fayl o'zgarganini tekshirish (os.stat) oralig'i
+
+
+class _Fingerprint:
+    __slots__ = ("mtime_ns", "size", "content_hash", "checked_at")
+
+    def __init__(self, mtime_ns: int, size: int, content_hash: str):
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.content_hash = content_hash
+        self.checked_at = time.monotonic()
+
+
+def _hash_file(path: str) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DocumentCache:
+    """
+    Sends static documents by Telegram file_id instead of re-uploading them.
+    The first send uploads the file and remembers the returned file_id under the file's content hash;
+    the mapping is kept in a small JSON file, so it survives restarts. A changed file gets a new hash
+    and is uploaded again automatically.
+    """
+
+    def __init__(self, path: str | None = DEFAULT_DOCUMENT_CACHE_PATH, stat_interval: float = STAT_CHECK_INTERVAL):
+        self.path = path
+        self.stat_interval = stat_interval
+        self._file_ids: dict[str, str] = self._load()
+        self._fingerprints: dict[str, _Fingerprint] = {}
+        self._upload_locks: dict[str, asyncio.Lock] = {}
+        self.uploads = 0
+        self.cached_sends = 0
+        self.stale_file_ids = 0
+
+    def _load(self) -> dict[str, str]:
+        if not self.path:
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as file:
+                data = json.load(file)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logging.warning("Document cache '%s' could not be read, starting empty: %s", self.path, e)
+            return {}
+        return {key: value for key, value in data.items() if isinstance(value, str)} if isinstance(data, dict) else {}
+
+    def _save(self, file_ids: dict[str, str]):
+        """Atomically rewrites the JSON file; failures are logged, the file_ids stay cached in memory."""
+        if not self.path:
+            return
+        # Avval noyob vaqtinchalik faylga yoziladi, keyin almashtiriladi - yarim yozilgan fayl qolmaydi,
+        # bir vaqtda saqlayotgan oqimlar yoki jarayonlar bir-birining faylini buzmaydi
+        directory, name = os.path.split(os.path.abspath(self.path))
+        temp_path = None
+        try:
+            fd, temp_path = tempfile.mkstemp(prefix=f"{name}.", suffix=".tmp", dir=directory)
+            with os.fdopen(fd, "w", encoding="utf-8") as file:
+                json.dump(file_ids, file, ensure_ascii=False, indent=2, sort_keys=True)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            logging.warning("Document cache '%s' could not be saved, file_ids are kept in memory only: %s", self.path, e)
+            if temp_path is not None:
+                with contextlib.suppress(OSError):
+                    os.unlink(temp_path)
+
+    async def fingerprint(self, file_path: str) -> str:
+        """Returns the content hash of the file; rehashes only when its size or mtime changed."""
+        cached = self._fingerprints.get(file_path)
+        if cached is not None and time.monotonic() - cached.checked_at < self.stat_interval:
+            return cached.content_hash
+        stat = os.stat(file_path)  # fayl bo'lmasa FileNotFoundError
+        if cached is not None and cached.mtime_ns == stat.st_mtime_ns and cached.size == stat.st_size:
+            cached.checked_at = time.monotonic()
+            return cached.content_hash
+        content_hash = await asyncio.to_thread(_hash_file, file_path)
+        self._fingerprints[file_path] = _Fingerprint(stat.st_mtime_ns, stat.st_size, content_hash)
+        return content_hash
+
+    async def send_document(
+        self,
+        bot: Bot,
+        chat_id: int,
+        file_path: str,
+        filename: str | None = None,
+        caption: str | None = None
+    ) -> Message:
+        """
+        Sends a document from disk, by file_id when this exact content was uploaded before.
+        Raises FileNotFoundError if the file does not exist.
+        """
+        content_hash = await self.fingerprint(file_path)
+        file_id = self._file_ids.get(content_hash)
+        if file_id is not None:
+            try:
+                message = await bot.send_document(chat_id, file_id, caption=caption)
+                self.cached_sends += 1
+                return message
+            except TelegramBadRequest as e:
+                # file_id boshqa bot tokeniga tegishli yoki Telegram uni endi tanimaydi - qayta yuklanadi
+                logging.warning("Cached file_id for '%s' was rejected, re-uploading: %s", file_path, e)
+                self.stale_file_ids += 1
+                if self._file_ids.get(content_hash) == file_id:
+                    del self._file_ids[content_hash]
+
+        lock = self._upload_locks.setdefault(content_hash, asyncio.Lock())
+        try:
+            async with lock:
+                # Bir vaqtda kelgan so'rovlar faylni faqat bir marta yuklaydi
+                file_id = self._file_ids.get(content_hash)
+                if file_id is not None:
+                    self.cached_sends += 1
+                    return await bot.send_document(chat_id, file_id, caption=caption)
+
+                await bot.send_chat_action(chat_id, ChatAction.UPLOAD_DOCUMENT)
+                document = FSInputFile(path=file_path, filename=filename or os.path.basename(file_path))
+                message = await bot.send_document(chat_id, document, caption=caption)
+                self.uploads += 1
+                if message.document is not None:
+                    self._file_ids[content_hash] = message.document.file_id
+                    await asyncio.to_thread(self._save, dict(self._file_ids))
+                    logging.info("Uploaded '%s' (%s), file_id cached.", file_path, content_hash)
+                return message
+        finally:
+            # Yuklash xato bilan tugasa ham qulf lug'atda qolib ketmaydi
+            if self._upload_locks.get(content_hash) is lock:
+                del self._upload_locks[content_hash]
+
+    def stats(self) -> dict:
+        return {
+            "uploads": self.uploads,
+            "cached_sends": self.cached_sends,
+            "stale_file_ids": self.stale_file_ids,
+            "file_ids": len(self._file_ids),
+        }
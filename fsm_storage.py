@@ -0,0 +1,243 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import time
+from collections import OrderedDict
+from typing import Any
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, DefaultKeyBuilder, KeyBuilder, StateType, StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+
+try:
+    from redis.asyncio import Redis
+except ImportError:  # redis ixtiyoriy: o'rnatilmagan bo'lsa SQLite ishlatiladi
+    Redis = None
+
+DEFAULT_SESSION_TTL = 7 * 24 * 3600  # sekund; shuncha vaqt faol bo'lmagan sessiyalar o'chadi
+DEFAULT_SQLITE_PATH = "fsm_state.sqlite3"
+SQLITE_PURGE_EVERY = 1000  # har N ta yozuvdan keyin eskirgan sessiyalar tozalanadi
+SQLITE_READ_CACHE_SIZE = 10000
+
+
+def _state_name(state: StateType) -> str | None:
+    return state.state if isinstance(state, State) else state
+
+
+def compact_state_data(data: dict[str, Any]) -> dict[str, Any]:
+    """
+    Drops empty values (None, "", [], {}) so only the minimal browsing state is persisted.
+    Handlers read every key with a default, so a missing key means the same as an empty one.
+    """
+    return {key: value for key, value in data.items() if value not in (None, "", [], {})}
+
+
+class RedisFSMStorage(BaseStorage):
+    """
+    Redis-protocol FSM storage. State is a string key, data is a hash with one JSON field per data key,
+    so update_data is a single pipelined round trip (HSET + HDEL + EXPIRE + HGETALL) instead of read-modify-write.
+    Every write refreshes the TTL of both keys; idle sessions expire on their own.
+    """
+
+    def __init__(self, redis, key_builder: KeyBuilder | None = None, session_ttl: int | None = DEFAULT_SESSION_TTL):
+        self.redis = redis
+        self.key_builder = key_builder or DefaultKeyBuilder(with_bot_id=True)
+        self.session_ttl = session_ttl
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs) -> "RedisFSMStorage":
+        if Redis is None:
+            raise RuntimeError("redis paketi o'rnatilmagan (pip install redis).")
+        return cls(Redis.from_url(url), **kwargs)
+
+    async def ping(self) -> bool:
+        try:
+            return bool(await self.redis.ping())
+        except Exception as e:
+            logging.warning("Redis FSM storage is not reachable: %s", e)
+            return False
+
+    def _keys(self, key: StorageKey) -> tuple[str, str]:
+        return self.key_builder.build(key, "state"), self.key_builder.build(key, "data")
+
+    def _touch(self, pipe, *redis_keys: str):
+        if self.session_ttl:
+            for redis_key in redis_keys:
+                pipe.expire(redis_key, self.session_ttl)
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        state_key, data_key = self._keys(key)
+        async with self.redis.pipeline(transaction=False) as pipe:
+            if state is None:
+                pipe.delete(state_key)
+            else:
+                pipe.set(state_key, _state_name(state), ex=self.session_ttl or None)  # 0 - muddatsiz, _touch kabi
+            self._touch(pipe, data_key)
+            await pipe.execute()
+
+    async def get_state(self, key: StorageKey) -> str | None:
+        state_key, _ = self._keys(key)
+        value = await self.redis.get(state_key)
+        return value.decode("utf-8") if isinstance(value, bytes) else value
+
+    async def set_data(self, key: StorageKey, data: dict[str, Any]) -> None:
+        state_key, data_key = self._keys(key)
+        data = compact_state_data(data)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.delete(data_key)
+            if data:
+                pipe.hset(data_key, mapping={field: json.dumps(value) for field, value in data.items()})
+            self._touch(pipe, state_key, data_key)
+            await pipe.execute()
+
+    async def get_data(self, key: StorageKey) -> dict[str, Any]:
+        _, data_key = self._keys(key)
+        return self._decode(await self.redis.hgetall(data_key))
+
+    async def update_data(self, key: StorageKey, data: dict[str, Any]) -> dict[str, Any]:
+        state_key, data_key = self._keys(key)
+        changed = compact_state_data(data)
+        removed = [field for field in data if field not in changed]
+        async with self.redis.pipeline(transaction=True) as pipe:
+            if changed:
+                pipe.hset(data_key, mapping={field: json.dumps(value) for field, value in changed.items()})
+            if removed:
+                pipe.hdel(data_key, *removed)
+            self._touch(pipe, state_key, data_key)
+            pipe.hgetall(data_key)
+            results = await pipe.execute()
+        return self._decode(results[-1])
+
+    @staticmethod
+    def _decode(raw: dict) -> dict[str, Any]:
+        return {
+            (field.decode("utf-8") if isinstance(field, bytes) else field): json.loads(value)
+            for field, value in raw.items()
+        }
+
+    async def close(self) -> None:
+        await self.redis.aclose(close_connection_pool=True)
+
+
+class SQLiteFSMStorage(BaseStorage):
+    """
+    Local FSM storage in a single SQLite file; needs no external service.
+    Reads are served from a write-through in-memory cache, writes go to SQLite in a worker thread.
+    """
+
+    def __init__(self, path: str = DEFAULT_SQLITE_PATH, key_builder: KeyBuilder | None = None, session_ttl: int | None = DEFAULT_SESSION_TTL):
+        self.path = path
+        self.key_builder = key_builder or DefaultKeyBuilder(with_bot_id=True)
+        self.session_ttl = session_ttl
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS fsm_sessions ("
+            "key TEXT PRIMARY KEY, state TEXT, data TEXT NOT NULL DEFAULT '{}', updated_at REAL NOT NULL)"
+        )
+        self._lock = asyncio.Lock()
+        self._cache: OrderedDict[str, tuple[str | None, dict, float]] = OrderedDict()
+        self._writes = 0
+        logging.info("SQLite FSM storage opened at %s", os.path.abspath(path))
+
+    def _expired(self, updated_at: float) -> bool:
+        return bool(self.session_ttl) and updated_at < time.time() - self.session_ttl
+
+    async def _load(self, key: StorageKey) -> tuple[str, str | None, dict]:
+        db_key = self.key_builder.build(key)
+        entry = self._cache.get(db_key)
+        if entry is None:
+            row = await asyncio.to_thread(self._select, db_key)
+            entry = (row[0], json.loads(row[1]), row[2]) if row else (None, {}, time.time())
+            self._remember(db_key, entry)
+        state, data, updated_at = entry
+        if self._expired(updated_at):
+            return db_key, None, {}
+        self._cache.move_to_end(db_key)
+        return db_key, state, data
+
+    def _select(self, db_key: str):
+        return self._connection.execute(
+            "SELECT state, data, updated_at FROM fsm_sessions WHERE key = ?", (db_key,)
+        ).fetchone()
+
+    def _remember(self, db_key: str, entry: tuple):
+        self._cache[db_key] = entry
+        self._cache.move_to_end(db_key)
+        while len(self._cache) > SQLITE_READ_CACHE_SIZE:
+            self._cache.popitem(last=False)
+
+    async def _save(self, db_key: str, state: str | None, data: dict):
+        data = compact_state_data(data)
+        now = time.time()
+        self._remember(db_key, (state, data, now))
+        async with self._lock:
+            await asyncio.to_thread(self._write, db_key, state, data, now)
+
+    def _write(self, db_key: str, state: str | None, data: dict, now: float):
+        if state is None and not data:
+            self._connection.execute("DELETE FROM fsm_sessions WHERE key = ?", (db_key,))
+        else:
+            self._connection.execute(
+                "INSERT INTO fsm_sessions (key, state, data, updated_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET state = excluded.state, data = excluded.data, updated_at = excluded.updated_at",
+                (db_key, state, json.dumps(data, separators=(",", ":")), now)
+            )
+        self._writes += 1
+        if self.session_ttl and self._writes % SQLITE_PURGE_EVERY == 0:
+            self._connection.execute("DELETE FROM fsm_sessions WHERE updated_at < ?", (now - self.session_ttl,))
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        db_key, _, data = await self._load(key)
+        await self._save(db_key, _state_name(state), data)
+
+    async def get_state(self, key: StorageKey) -> str | None:
+        _, state, _ = await self._load(key)
+        return state
+
+    async def set_data(self, key: StorageKey, data: dict[str, Any]) -> None:
+        db_key, state, _ = await self._load(key)
+        await self._save(db_key, state, dict(data))
+
+    async def get_data(self, key: StorageKey) -> dict[str, Any]:
+        _, _, data = await self._load(key)
+        return data.copy()
+
+    async def update_data(self, key: StorageKey, data: dict[str, Any]) -> dict[str, Any]:
+        db_key, state, current = await self._load(key)
+        merged = compact_state_data({**current, **data})
+        await self._save(db_key, state, merged)
+        return merged.copy()
+
+    async def close(self) -> None:
+        async with self._lock:
+            self._connection.close()
+
+
+def create_fsm_storage(url: str, session_ttl: int | None = DEFAULT_SESSION_TTL) -> BaseStorage:
+    """
+    Builds FSM storage from a URL: "redis://..." / "rediss://...", "sqlite:///path/to/file" or "memory".
+    A redis URL falls back to SQLite when the redis package is not installed.
+    """
+    if url == "memory":
+        return MemoryStorage()
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        if Redis is not None:
+            return RedisFSMStorage.from_url(url, session_ttl=session_ttl)
+        logging.warning("redis package is not installed, falling back to SQLite FSM storage.")
+        return SQLiteFSMStorage(DEFAULT_SQLITE_PATH, session_ttl=session_ttl)
+    if url.startswith("sqlite:///"):
+        return SQLiteFSMStorage(url[len("sqlite:///"):], session_ttl=session_ttl)
+    raise ValueError(f"Unknown FSM storage URL: {url}")
+
+
+async def ensure_storage_available(storage: BaseStorage, session_ttl: int | None = DEFAULT_SESSION_TTL) -> BaseStorage:
+    """Returns the given storage, or a local SQLite storage if the Redis server cannot be reached."""
+    if isinstance(storage, RedisFSMStorage) and not await storage.ping():
+        logging.warning("Falling back to local SQLite FSM storage.")
+        await storage.close()
+        return SQLiteFSMStorage(DEFAULT_SQLITE_PATH, session_ttl=session_ttl)
+    return storage
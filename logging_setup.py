@@ -0,0 +1,188 @@
+import atexit
+import copy
+import functools
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+from datetime import datetime, timezone
+
+TEXT_FORMAT = '%(asctime)s - %(levelname)s - [%(filename)s:%(lineno)d] - %(message)s'
+DEFAULT_QUEUE_SIZE = 10000  # navbat to'lsa yangi yozuvlar tashlab yuboriladi, event loop kutmaydi
+SAMPLING_RULE_CACHE_SIZE = 1024  # shablon -> qoida keshi; tayyor matnli xabarlar (aiohttp.access) uni cheksiz o'stirmasin
+
+# Har bir so'rov/update uchun yoziladigan INFO xabarlar: shablon prefiksi -> har N tadan bittasi yoziladi.
+# WARNING va undan yuqori darajalar hech qachon tashlab yuborilmaydi.
+DEFAULT_SAMPLING_RATES = {
+    "Update id=": 20,  # aiogram.event: har bir update uchun
+    "Requesting vacancies from ": 10,
+    "API response status: ": 10,
+    "Parsed ": 10,
+    "Pagination: ": 10,
+    "Displaying details for vacancy ": 10,
+}
+
+# LogRecord'ning standart atributlari; qolganlari `extra=` orqali berilgan maydonlar hisoblanadi
+_RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; `extra=` fields are emitted as top-level keys."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            "file": f"{record.filename}:{record.lineno}",
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        if record.stack_info:
+            entry["stack"] = self.formatStack(record.stack_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps every Nth record per sampling rule (a prefix of record.msg before formatting), so a hot-path
+    message type is thinned out without affecting the others. WARNING and above always pass.
+    State is bounded: one counter per rule and a small LRU cache from template to rule.
+    """
+
+    def __init__(self, rates: dict[str, int] | None = None, cache_size: int = SAMPLING_RULE_CACHE_SIZE):
+        super().__init__()
+        self.rates = {prefix: max(rate, 1) for prefix, rate in (rates or {}).items()}
+        self._counters: dict[str, int] = {}
+        self._rule_for = functools.lru_cache(maxsize=cache_size)(self._match_rule)
+        self.dropped = 0
+
+    def _match_rule(self, template: str) -> str | None:
+        # Bir nechta prefiks mos kelsa, eng aniq (eng uzun) qoida ishlatiladi
+        matches = [prefix for prefix in self.rates if template.startswith(prefix)]
+        return max(matches, key=len) if matches else None
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not self.rates:
+            return True
+        template = record.msg if isinstance(record.msg, str) else str(record.msg)
+        rule = self._rule_for(template)
+        rate = self.rates[rule] if rule is not None else 1
+        if rate == 1:
+            return True
+        count = self._counters.get(rule, 0)
+        self._counters[rule] = count + 1
+        if count % rate == 0:
+            return True
+        self.dropped += 1
+        return False
+
+
+class LazyQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that keeps the expensive work off the calling thread: only `msg % args` is done
+    here (args may be mutated right after the call), while traceback and output formatting happen
+    in the listener thread. Never blocks - when the queue is full the record is dropped and counted.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Boshqa handler'lar ham shu yozuvdan foydalanishi mumkin - nusxasi o'zgartiriladi
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class LoggingPipeline:
+    """Handles of the installed pipeline: the listener thread and the drop counters."""
+
+    __slots__ = ("handler", "listener", "sampler")
+
+    def __init__(self, handler: LazyQueueHandler, listener: logging.handlers.QueueListener, sampler: SamplingFilter):
+        self.handler = handler
+        self.listener = listener
+        self.sampler = sampler
+
+    def stop(self):
+        """Flushes the queue and stops the listener thread; safe to call more than once."""
+        if self.listener._thread is not None:
+            self.listener.stop()
+
+    def stats(self) -> dict:
+        return {
+            "queued": self.handler.queue.qsize(),
+            "dropped_queue_full": self.handler.dropped,
+            "dropped_sampled": self.sampler.dropped,
+        }
+
+
+def parse_sampling_rates(spec: str) -> dict[str, int]:
+    """Parses LOG_SAMPLING, e.g. "Pagination: =50,API response status: =1" (rate 1 disables sampling)."""
+    rates = {}
+    for item in spec.split(","):
+        prefix, separator, rate = item.rpartition("=")
+        if not separator or not prefix.strip():
+            continue
+        try:
+            rates[prefix.lstrip()] = int(rate)
+        except ValueError:
+            continue
+    return rates
+
+
+def setup_logging(
+    level: int | str = logging.INFO,
+    json_output: bool = False,
+    sampling_rates: dict[str, int] | None = None,
+    queue_size: int = DEFAULT_QUEUE_SIZE,
+    stream=None
+) -> LoggingPipeline:
+    """
+    Replaces the root handlers with a QueueHandler; a background QueueListener thread formats
+    records (plain text or JSON lines) and writes them to the stream, so logging calls on the
+    event loop never wait for I/O.
+    """
+    stream_handler = logging.StreamHandler(stream or sys.stderr)
+    stream_handler.setFormatter(JsonFormatter() if json_output else logging.Formatter(TEXT_FORMAT))
+
+    # Foydalanuvchi qoidasi o'zi qamrab oladigan standart qoidalarni almashtiradi
+    overrides = sampling_rates or {}
+    rates = {
+        prefix: rate for prefix, rate in DEFAULT_SAMPLING_RATES.items()
+        if not any(prefix.startswith(override) for override in overrides)
+    }
+    rates.update(overrides)
+    sampler = SamplingFilter(rates)
+
+    handler = LazyQueueHandler(queue.Queue(maxsize=queue_size))
+    handler.addFilter(sampler)
+    listener = logging.handlers.QueueListener(handler.queue, stream_handler, respect_handler_level=True)
+
+    root = logging.getLogger()
+    for old_handler in root.handlers[:]:
+        root.removeHandler(old_handler)
+        old_handler.close()
+    root.addHandler(handler)
+    root.setLevel(level.upper() if isinstance(level, str) else level)
+
+    listener.start()
+    pipeline = LoggingPipeline(handler, listener, sampler)
+    atexit.register(pipeline.stop)
+    return pipeline
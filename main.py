@@ -3,8 +3,8 @@ import html
 import logging
 import os # Fayl yo'lini tekshirish uchun
 from aiogram import Bot, Dispatcher, types, F
-from aiogram.filters import Command, StateFilter
-from aiogram.types import ReplyKeyboardMarkup, KeyboardButton, InlineKeyboardMarkup, InlineKeyboardButton, FSInputFile, ReplyKeyboardRemove
+from aiogram.filters import Command, CommandObject, StateFilter
+from aiogram.types import ReplyKeyboardMarkup, KeyboardButton, InlineKeyboardMarkup, InlineKeyboardButton, ReplyKeyboardRemove
 from aiogram.fsm.state import State, StatesGroup
 from aiogram.fsm.context import FSMContext
 from aiogram.utils.keyboard import InlineKeyboardBuilder
@@ -15,38 +15,128 @@ load_dotenv()
 
 
 try:
-    from vacancy_parser import VacancyParser, DEFAULT_ITEMS_PER_PAGE
-except ImportError:
-    logging.error("vacancy_parser modulini topib bo'lmadi. Fayl shu papkadami yoki DEFAULT_ITEMS_PER_PAGE eksport qilinganmi?")
+    from vacancy_parser import (
+        VacancyParser, Vacancy, ConnectionSettings, PagePrefetcher, CircuitBreaker, DEFAULT_ITEMS_PER_PAGE,
+        DEFAULT_CACHE_TTL, DEFAULT_CACHE_MAX_SIZE, DEFAULT_FETCH_CONCURRENCY, DEFAULT_PREFETCH_BUDGET, DEFAULT_STALE_TTL,
+        DEFAULT_BREAKER_FAILURE_THRESHOLD, DEFAULT_BREAKER_RECOVERY_TIMEOUT
+    )
+    from vacancy_store import VacancySynchronizer, VacancySnapshot, DEFAULT_SYNC_INTERVAL
+    from vacancy_search import VacancySearchIndex
+    from vacancy_decoder import DECODER_AUTO
+    from vacancy_snapshot import SnapshotFile, DEFAULT_SNAPSHOT_PATH
+    from bot_workers import WorkerPool, ShardForwardMiddleware, serve_worker
+    from vacancy_render import RenderCache
+    from middlewares import ConcurrencyLimitMiddleware, HandlerMetricsMiddleware, TelegramRequestMetricsMiddleware
+    from metrics import registry as metrics_registry, prefixed, start_metrics_server
+    from webhook_server import run_webhook
+    from fsm_storage import create_fsm_storage, ensure_storage_available, RedisFSMStorage, DEFAULT_SESSION_TTL
+    from logging_setup import setup_logging, parse_sampling_rates
+    from document_cache import DocumentCache, DEFAULT_DOCUMENT_CACHE_PATH
+    from send_scheduler import SendScheduler, DEFAULT_GLOBAL_RATE, DEFAULT_CHAT_RATE
+    from subscriptions import (
+        SubscriptionStore, SubscriptionNotifier, SubscriptionOwnerLease, is_valid_term, KIND_KEYWORD, KIND_DEPARTMENT,
+        MAX_SUBSCRIPTIONS_PER_CHAT, DEFAULT_SUBSCRIPTIONS_PATH
+    )
+except ImportError as e:
+    # Blokdagi istalgan modul yoki uning bog'liqligi yetishmasligi mumkin (ixtiyoriy paketlar modullarning o'zida tekshiriladi)
+    logging.error(
+        "'%s' modulini import qilib bo'lmadi: %s. Bot fayllari shu papkadami va requirements.txt o'rnatilganmi?",
+        e.name or "?", e
+    )
     exit(1)
 
 BOT_TOKEN = os.getenv("BOT_TOKEN")
 API_URL = "https://job.ubtuit.uz/api/v1/vacancies/"
 TATU_UF_WEBSITE_URL = "https://ubtuit.uz/" # TATU UF sayti manzili
 OBYEKTIVKA_FILE_PATH = "Obyektivka_namuna.docx" # Obyektivka faylining nomi (bot papkasida)
+VACANCY_CACHE_TTL = float(os.getenv("VACANCY_CACHE_TTL", DEFAULT_CACHE_TTL)) # Sahifa keshining amal qilish muddati (sekund)
+VACANCY_CACHE_SIZE = int(os.getenv("VACANCY_CACHE_SIZE", DEFAULT_CACHE_MAX_SIZE)) # Keshdagi sahifalar soni
+VACANCY_SYNC_INTERVAL = float(os.getenv("VACANCY_SYNC_INTERVAL", DEFAULT_SYNC_INTERVAL)) # To'liq lentani yangilash oralig'i (sekund), 0 - o'chirilgan
+VACANCY_SNAPSHOT_PATH = os.getenv("VACANCY_SNAPSHOT_PATH", DEFAULT_SNAPSHOT_PATH) # Snapshot va qidiruv indeksi saqlanadigan fayl (tez qayta ishga tushish uchun), bo'sh - o'chirilgan
+VACANCY_SYNC_CONCURRENCY = int(os.getenv("VACANCY_SYNC_CONCURRENCY", DEFAULT_FETCH_CONCURRENCY)) # Sinxronizatsiyada parallel so'rovlar soni
+VACANCY_STALE_TTL = float(os.getenv("VACANCY_STALE_TTL", DEFAULT_STALE_TTL)) # API ishlamasa muddati o'tgan sahifalar shuncha vaqt ko'rsatiladi (sekund)
+API_BREAKER_FAILURES = int(os.getenv("API_BREAKER_FAILURES", DEFAULT_BREAKER_FAILURE_THRESHOLD)) # Ketma-ket xatolar soni - shundan keyin API'ga so'rovlar to'xtatiladi
+API_BREAKER_RECOVERY = float(os.getenv("API_BREAKER_RECOVERY", DEFAULT_BREAKER_RECOVERY_TIMEOUT)) # To'xtatilgandan keyin sinov so'rovigacha vaqt (sekund)
+VACANCY_JSON_DECODER = os.getenv("VACANCY_JSON_DECODER", DECODER_AUTO) # API javobini o'qish: "auto", "msgspec", "orjson" yoki "json"
+VACANCY_STREAM_THRESHOLD = int(os.getenv("VACANCY_STREAM_THRESHOLD", 0)) # Bundan katta (bayt) javoblar bo'laklab o'qiladi, 0 - o'chirilgan
+VACANCY_PREFETCH_BUDGET = int(os.getenv("VACANCY_PREFETCH_BUDGET", DEFAULT_PREFETCH_BUDGET)) # Qo'shni sahifalarni oldindan yuklash (bir vaqtda), 0 - o'chirilgan
+# API ulanishlari: pool hajmi, keep-alive, DNS kesh va timeoutlar (sekund)
+API_CONNECTION_SETTINGS = ConnectionSettings(
+    pool_size=int(os.getenv("API_POOL_SIZE", 100)),
+    pool_size_per_host=int(os.getenv("API_POOL_SIZE_PER_HOST", 20)),
+    keepalive_timeout=float(os.getenv("API_KEEPALIVE_TIMEOUT", 60)),
+    dns_cache_ttl=int(os.getenv("API_DNS_CACHE_TTL", 300)),
+    connect_timeout=float(os.getenv("API_CONNECT_TIMEOUT", 5)),
+    read_timeout=float(os.getenv("API_READ_TIMEOUT", 10)),
+    total_timeout=float(os.getenv("API_TOTAL_TIMEOUT", 20))
+)
+BOT_MODE = os.getenv("BOT_MODE", "polling").lower() # "polling" yoki "webhook"
+BOT_MAX_CONCURRENCY = int(os.getenv("BOT_MAX_CONCURRENCY", 100)) # Bir vaqtda qayta ishlanadigan update'lar soni (har bir ishchi jarayonda)
+BOT_WORKERS = int(os.getenv("BOT_WORKERS", 1)) # Update'larni qayta ishlovchi jarayonlar soni; 1 dan ko'p bo'lsa - supervisor + ishchilar
+WEBHOOK_URL = os.getenv("WEBHOOK_URL", "") # Tashqi manzil, masalan https://bot.example.uz
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/webhook")
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "") # Telegram X-Telegram-Bot-Api-Secret-Token sarlavhasida yuboradi
+WEBAPP_HOST = os.getenv("WEBAPP_HOST", "0.0.0.0")
+WEBAPP_PORT = int(os.getenv("WEBAPP_PORT", 8080))
+METRICS_PORT = int(os.getenv("METRICS_PORT", 0)) # Polling rejimida /metrics porti (masalan 9100), 0 - o'chirilgan (webhook rejimida WEBAPP_PORT ishlatiladi)
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1") # Polling rejimidagi /metrics manzili; tashqaridan yig'ish uchun 0.0.0.0
+# FSM holatlari: "redis://host:port/db" (standart), "sqlite:///fayl.sqlite3" yoki "memory".
+# Redis mavjud bo'lmasa avtomatik ravishda lokal SQLite faylga o'tiladi.
+FSM_STORAGE_URL = os.getenv("FSM_STORAGE_URL", "redis://localhost:6379/0")
+FSM_SESSION_TTL = int(os.getenv("FSM_SESSION_TTL", DEFAULT_SESSION_TTL)) # Faol bo'lmagan sessiyalar shuncha sekunddan keyin o'chadi
+DOCUMENT_CACHE_PATH = os.getenv("DOCUMENT_CACHE_PATH", DEFAULT_DOCUMENT_CACHE_PATH) # Yuklangan hujjatlarning Telegram file_id'lari saqlanadigan fayl
+# Yangi vakansiyalarga obunalar saqlanadigan lokal SQLite fayl. Bot faqat bitta nusxada ishlashi kerak
+# (bir xost ichidagi BOT_WORKERS mumkin); FSM Redis'da bo'lsa, ikkinchi nusxa ishga tushmaydi
+SUBSCRIPTIONS_PATH = os.getenv("SUBSCRIPTIONS_PATH", DEFAULT_SUBSCRIPTIONS_PATH)
+TELEGRAM_GLOBAL_RATE = float(os.getenv("TELEGRAM_GLOBAL_RATE", DEFAULT_GLOBAL_RATE)) # Bot API'ga yuboriladigan xabarlar soni (sekundiga, barcha chatlar)
+TELEGRAM_CHAT_RATE = float(os.getenv("TELEGRAM_CHAT_RATE", DEFAULT_CHAT_RATE)) # Bitta chatga yuboriladigan xabarlar soni (sekundiga)
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower() # "text" yoki "json" (har qatorda bitta JSON obyekt)
+# Ko'p takrorlanadigan xabarlarni siyraklashtirish: "shablon prefiksi=N,..." (har N tadan bittasi yoziladi)
+LOG_SAMPLING = parse_sampling_rates(os.getenv("LOG_SAMPLING", ""))
 
 buttons_search_active = [
         [KeyboardButton(text="Ortga")],
     ]
 skeyboard_active_search = ReplyKeyboardMarkup(keyboard=buttons_search_active, resize_keyboard=True)
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - [%(filename)s:%(lineno)d] - %(message)s'
-)
+# Loglar navbat orqali alohida oqimda yoziladi - event loop stderr'ga yozishni kutmaydi
+logging_pipeline = setup_logging(LOG_LEVEL, json_output=LOG_FORMAT == "json", sampling_rates=LOG_SAMPLING)
 
 # Bot obyekti yaratilganda default parse_mode o'rnatilmagan,
 # shuning uchun har bir .answer() chaqiruvida kerak bo'lsa ko'rsatish kerak.
 bot = Bot(token=BOT_TOKEN)
-dp = Dispatcher()
+dp = Dispatcher(storage=create_fsm_storage(FSM_STORAGE_URL, session_ttl=FSM_SESSION_TTL))
+dp.message.middleware(HandlerMetricsMiddleware())
+dp.callback_query.middleware(HandlerMetricsMiddleware())
+# Navbat birinchi (tashqi) middleware: metrikalar navbatda kutishni emas, haqiqiy API vaqtini o'lchaydi
+# Ko'p jarayonli rejimda umumiy Telegram limiti supervisor va ishchilar o'rtasida teng bo'linadi
+# (chat limitlari bo'linmaydi: har bir chat faqat bitta ishchida)
+PROCESS_COUNT = BOT_WORKERS + 1 if BOT_WORKERS > 1 else 1
+send_scheduler = SendScheduler(global_rate=TELEGRAM_GLOBAL_RATE / PROCESS_COUNT, chat_rate=TELEGRAM_CHAT_RATE)
+bot.session.middleware(send_scheduler)
+bot.session.middleware(TelegramRequestMetricsMiddleware())
+PROCESS_ROLE = "single" # "single", "supervisor" (update'larni ishchilarga taqsimlaydi, sinxronizatsiya) yoki "worker"
+worker_pool: WorkerPool | None = None
 vacancy_parser: VacancyParser | None = None
+vacancy_sync: VacancySynchronizer | None = None
+snapshot_file: SnapshotFile | None = None
+page_prefetcher: PagePrefetcher | None = None
+subscription_store: SubscriptionStore | None = None
+subscription_notifier: SubscriptionNotifier | None = None
+subscription_lease: SubscriptionOwnerLease | None = None
+search_index = VacancySearchIndex()
+render_cache = RenderCache() # Tayyor HTML matnlar va klaviaturalar barcha foydalanuvchilar uchun umumiy
+document_cache = DocumentCache(DOCUMENT_CACHE_PATH) # Statik hujjatlar bir marta yuklanadi, keyin file_id bilan yuboriladi
 
 class SearchState(StatesGroup):
     browsing = State()
+    searching = State() # Kalit so'z kiritilishini kutish
 
 def create_start_keyboard():
     buttons = [
         [KeyboardButton(text="Vakansiyalarni qidirish")],
+        [KeyboardButton(text="Kalit so'z bo'yicha qidirish")],
         [
             KeyboardButton(text="TATU UF Asosiy sayti"),
             KeyboardButton(text="Obyektivka namunasini yuklab olish")
@@ -56,63 +146,159 @@ def create_start_keyboard():
     keyboard = ReplyKeyboardMarkup(keyboard=buttons, resize_keyboard=True, input_field_placeholder="Menyudan tanlang:")
     return keyboard
 
-def create_vacancy_navigation_keyboard(
-    vacancies_on_page: list,
-    current_page: int,
-    total_pages: int
-    ) -> InlineKeyboardMarkup | None:
-
-    if not vacancies_on_page:
-        return None
-
-    builder = InlineKeyboardBuilder()
-
-    for i, vacancy in enumerate(vacancies_on_page):
-        position = vacancy.get('position', f'Noma’lum lavozim #{i+1}')
-        callback_data = f"vacancy:{i}"
-
-        if len(callback_data.encode('utf-8')) > 64:
-            logging.warning(f"Callback data for vacancy exceeds 64 bytes, skipping button: {callback_data}")
-            continue
-
-        builder.row(InlineKeyboardButton(text=position, callback_data=callback_data))
-
-    pagination_row = []
-    if current_page > 1:
-        pagination_row.append(
-            InlineKeyboardButton(text="⬅️ Orqaga", callback_data=f"page:{current_page - 1}")
-        )
-    if current_page < total_pages:
-        pagination_row.append(
-            InlineKeyboardButton(text="➡️ Keyingi", callback_data=f"page:{current_page + 1}")
-        )
+async def load_vacancy_page(page: int, search_query: str = "") -> tuple[list[Vacancy] | None, int, int, bool]:
+    """
+    Sahifani lokal snapshotdan (kalit so'z bo'lsa - lokal qidiruv indeksidan) oladi,
+    snapshot hali tayyor bo'lmasa API'ga murojaat qiladi.
+    Oxirgi qiymat - ma'lumot eskirgan bo'lishi mumkinligi (API ishlamayapti, oxirgi saqlangan nusxa berildi).
+    """
+    snapshot = vacancy_sync.snapshot if vacancy_sync else None
+    if snapshot is not None:
+        if search_query:
+            return (*search_index.search_page(snapshot, search_query, page), vacancy_sync.is_stale())
+        return (*snapshot.page(page), vacancy_sync.is_stale())
+    return await vacancy_parser.get_vacancies_with_fallback(query=search_query, page=page)
+
+def prefetch_adjacent_pages(user_id: int, page: int, total_pages: int, search_query: str = ""):
+    """
+    Joriy sahifa ko'rsatilgach, qo'shni sahifalarni API keshiga oldindan yuklaydi.
+    Snapshot mavjud bo'lsa sahifalar baribir xotiradan olinadi, shuning uchun hech narsa qilinmaydi.
+    """
+    if page_prefetcher is None or (vacancy_sync is not None and vacancy_sync.snapshot is not None):
+        return
+    page_prefetcher.schedule(user_id, search_query, page, total_pages)
 
-    if pagination_row:
-        builder.row(*pagination_row)
+def cancel_prefetch(user_id: int):
+    if page_prefetcher is not None:
+        page_prefetcher.cancel(user_id)
 
-    return builder.as_markup()
+async def leave_browsing(user_id: int, state: FSMContext):
+    """Ro'yxatdan chiqish (har qanday yo'l bilan): oldindan yuklash to'xtatiladi va FSM holati tozalanadi."""
+    cancel_prefetch(user_id)
+    await state.clear()
 
+def install_snapshot(snapshot: VacancySnapshot | None, postings: dict | None, synced_at: float):
+    """
+    Ishchi jarayon: supervisor yuborgan snapshot va qidiruv indeksini o'rnatadi.
+    snapshot None bo'lsa - lenta o'zgarmagan, faqat oxirgi sinxronizatsiya vaqti yangilanadi.
+    """
+    if vacancy_sync is None:
+        return
+    if snapshot is not None:
+        search_index.restore(snapshot, postings)
+        render_cache.invalidate()
+    elif vacancy_sync.snapshot is None:
+        return
+    vacancy_sync.restore(snapshot or vacancy_sync.snapshot, synced_at)
+
+def resolve_vacancy(vacancy_id) -> Vacancy | None:
+    """Vakansiyani umumiy ombordan (snapshot, so'ng parser) id bo'yicha topadi."""
+    snapshot = vacancy_sync.snapshot if vacancy_sync else None
+    vacancy = snapshot.get(vacancy_id) if snapshot is not None else None
+    if vacancy is None and vacancy_parser:
+        vacancy = vacancy_parser.get_vacancy(vacancy_id)
+    return vacancy
+
+def format_vacancy_list_title(total_items: int, current_page: int, total_pages: int, search_query: str = "", stale: bool = False) -> str:
+    if search_query:
+        title = f"«{search_query}» bo'yicha topilgan vakansiyalar ({total_items} ta): Sahifa {current_page} / {total_pages}"
+    else:
+        title = f"Topilgan vakansiyalar ({total_items} ta): Sahifa {current_page} / {total_pages}"
+    if stale:
+        title += "\n\n⚠️ Sayt bilan aloqa yo'q, ma'lumot eskirgan bo'lishi mumkin."
+    return title
 
 @dp.message(F.text == "Ortga", StateFilter('*'))
 async def handle_back_button(message: types.Message, state: FSMContext):
     current_state_str = await state.get_state()
-    logging.info(f"User {message.from_user.id} pressed 'Ortga'. Current state: {current_state_str}")
-    await state.clear()
-    logging.info(f"State cleared for user {message.from_user.id}. Returning to start menu.")
+    logging.info("User %s pressed 'Ortga'. Current state: %s", message.from_user.id, current_state_str)
+    await leave_browsing(message.from_user.id, state)
+    logging.info("State cleared for user %s. Returning to start menu.", message.from_user.id)
     keyboard = create_start_keyboard()
     user_name = html.escape(message.from_user.first_name)
     await message.answer(f"Salom {user_name}, TATU UF vakansiyalar Telegram Botiga xush kelibsiz!", reply_markup=keyboard)
 
 @dp.message(Command("start"))
 async def start_command(message: types.Message, state: FSMContext):
-    await state.clear()
+    await leave_browsing(message.from_user.id, state)
     keyboard = create_start_keyboard()
     user_name = html.escape(message.from_user.first_name)
     await message.answer(f"Salom {user_name}, TATU UF vakansiyalar Telegram Botiga xush kelibsiz!", reply_markup=keyboard)
 
+SUBSCRIBE_USAGE_TEXT = (
+    "🔔 Yangi vakansiyalarga obuna bo'lish:\n"
+    "/subscribe <kalit so'z> - masalan: /subscribe dasturchi\n"
+    "/subscribe_department <bo'lim nomi> - masalan: /subscribe_department IT bo'limi\n"
+    "/subscriptions - obunalaringiz ro'yxati\n"
+    "/unsubscribe - barcha obunalarni bekor qilish"
+)
+
+async def create_subscriptions_keyboard(chat_id: int) -> InlineKeyboardMarkup | None:
+    builder = InlineKeyboardBuilder()
+    for subscription in await subscription_store.for_chat(chat_id):
+        prefix = "🏢" if subscription.kind == KIND_DEPARTMENT else "🔑"
+        builder.row(InlineKeyboardButton(text=f"❌ {prefix} {subscription.term}", callback_data=f"unsub:{subscription.id}"))
+    return builder.as_markup() if builder.buttons else None
+
+async def add_subscription(message: types.Message, kind: str, term: str):
+    if subscription_store is None:
+        await message.answer("Xatolik: Bot hali tayyor emas, birozdan so'ng urinib ko'ring.")
+        return
+    if not term or not is_valid_term(term):
+        await message.answer(SUBSCRIBE_USAGE_TEXT)
+        return
+    if len(await subscription_store.for_chat(message.chat.id)) >= MAX_SUBSCRIPTIONS_PER_CHAT:
+        await message.answer(f"Obunalar soni {MAX_SUBSCRIPTIONS_PER_CHAT} tadan oshmasligi kerak. Keraksizlarini /subscriptions orqali o'chiring.")
+        return
+    subscription = await subscription_store.add(message.chat.id, kind, term)
+    if subscription is None:
+        await message.answer("Siz bu obunaga allaqachon a'zosiz.")
+        return
+    logging.info("User %s subscribed to %s %r.", message.from_user.id, kind, subscription.term)
+    await message.answer(f"✅ Obuna qo'shildi: «{subscription.term}». Mos yangi vakansiya chiqishi bilan xabar beraman.")
+
+@dp.message(Command("subscribe"))
+async def subscribe_command(message: types.Message, command: CommandObject):
+    await add_subscription(message, KIND_KEYWORD, (command.args or "").strip())
+
+@dp.message(Command("subscribe_department"))
+async def subscribe_department_command(message: types.Message, command: CommandObject):
+    await add_subscription(message, KIND_DEPARTMENT, (command.args or "").strip())
+
+@dp.message(Command("subscriptions"))
+async def subscriptions_command(message: types.Message):
+    keyboard = await create_subscriptions_keyboard(message.chat.id) if subscription_store else None
+    if keyboard is None:
+        await message.answer(f"Sizda hozircha obunalar yo'q.\n\n{SUBSCRIBE_USAGE_TEXT}")
+        return
+    await message.answer("Sizning obunalaringiz (bekor qilish uchun bosing):", reply_markup=keyboard)
+
+@dp.message(Command("unsubscribe"))
+async def unsubscribe_command(message: types.Message):
+    removed = await subscription_store.remove_chat(message.chat.id) if subscription_store else 0
+    await message.answer(f"Barcha obunalar bekor qilindi ({removed} ta)." if removed else "Sizda obunalar yo'q.")
+
+@dp.callback_query(F.data.startswith("unsub:"))
+async def unsubscribe_callback(query: types.CallbackQuery):
+    try:
+        subscription_id = int(query.data.split(":")[1])
+    except (IndexError, ValueError):
+        await query.answer("Xatolik: noto'g'ri ma'lumot.", show_alert=True)
+        return
+    removed = await subscription_store.remove(query.message.chat.id, subscription_id) if subscription_store else None
+    await query.answer("Obuna bekor qilindi." if removed else "Obuna topilmadi.")
+    keyboard = await create_subscriptions_keyboard(query.message.chat.id) if subscription_store else None
+    try:
+        if keyboard is None:
+            await query.message.edit_text("Sizda boshqa obunalar qolmadi.", reply_markup=None)
+        else:
+            await query.message.edit_reply_markup(reply_markup=keyboard)
+    except TelegramBadRequest as e:
+        logging.warning("Could not update subscriptions message: %s", e)
+
 @dp.message(F.text == "TATU UF Asosiy sayti", StateFilter(None))
 async def handle_website_button(message: types.Message):
-    logging.info(f"User {message.from_user.id} requested TATU UF website link.")
+    logging.info("User %s requested TATU UF website link.", message.from_user.id)
     keyboard = InlineKeyboardMarkup(
         inline_keyboard=[
             [InlineKeyboardButton(text="💻 Saytga o'tish", url=TATU_UF_WEBSITE_URL)]
@@ -122,32 +308,30 @@ async def handle_website_button(message: types.Message):
 
 @dp.message(F.text == "Obyektivka namunasini yuklab olish", StateFilter(None))
 async def handle_obyektivka_button(message: types.Message):
-    logging.info(f"User {message.from_user.id} requested obyektivka sample.")
-    if os.path.exists(OBYEKTIVKA_FILE_PATH):
-        try:
-            # Fayl yuklanayotganini bildirish
-            await message.answer_chat_action(action=types.ChatAction.UPLOAD_DOCUMENT)
-            # FSInputFile ob'ektini to'g'ri yo'l bilan yaratish
-            document_to_send = FSInputFile(path=OBYEKTIVKA_FILE_PATH, filename="Obyektivka_namuna.docx")
-            # FSInputFile ob'ektini yuborish
-            await message.answer_document(document_to_send, caption="Obyektivka (Ma'lumotnoma) namunasi.")
-            logging.info(f"Obyektivka sample sent to user {message.from_user.id}")
-        except FileNotFoundError: # Agar fayl os.path.exists va FSInputFile orasida o'chib ketsa
-             logging.error(f"Obyektivka file '{OBYEKTIVKA_FILE_PATH}' not found during send operation for user {message.from_user.id}.")
-             await message.answer("📄 Kechirasiz, obyektivka fayli topilmadi (qayta urinish vaqtida). Iltimos, keyinroq qayta urinib ko'ring.")
-        except TelegramBadRequest as e:
-            logging.error(f"Telegram API error sending obyektivka to {message.from_user.id}: {e}", exc_info=True)
-            await message.answer("📄 Faylni yuborishda Telegram bilan bog'liq xatolik yuz berdi. Iltimos, keyinroq urinib ko'ring.")
-        except Exception as e:
-            logging.error(f"Error sending obyektivka to {message.from_user.id}: {e}", exc_info=True)
-            await message.answer("📄 Faylni yuborishda kutilmagan xatolik yuz berdi. Iltimos, keyinroq urinib ko'ring.")
-    else:
-        logging.warning(f"Obyektivka file not found at {OBYEKTIVKA_FILE_PATH} for user {message.from_user.id}")
+    logging.info("User %s requested obyektivka sample.", message.from_user.id)
+    try:
+        # Fayl faqat birinchi marta (yoki o'zgarganda) yuklanadi, qolgan hollarda file_id bilan yuboriladi
+        await document_cache.send_document(
+            message.bot,
+            message.chat.id,
+            OBYEKTIVKA_FILE_PATH,
+            filename="Obyektivka_namuna.docx",
+            caption="Obyektivka (Ma'lumotnoma) namunasi."
+        )
+        logging.info("Obyektivka sample sent to user %s", message.from_user.id)
+    except FileNotFoundError:
+        logging.warning("Obyektivka file not found at %s for user %s", OBYEKTIVKA_FILE_PATH, message.from_user.id)
         await message.answer("📄 Kechirasiz, hozirda obyektivka namunasi mavjud emas. Iltimos, keyinroq qayta urinib ko'ring.")
+    except TelegramBadRequest as e:
+        logging.error("Telegram API error sending obyektivka to %s: %s", message.from_user.id, e, exc_info=True)
+        await message.answer("📄 Faylni yuborishda Telegram bilan bog'liq xatolik yuz berdi. Iltimos, keyinroq urinib ko'ring.")
+    except Exception as e:
+        logging.error("Error sending obyektivka to %s: %s", message.from_user.id, e, exc_info=True)
+        await message.answer("📄 Faylni yuborishda kutilmagan xatolik yuz berdi. Iltimos, keyinroq urinib ko'ring.")
 
 @dp.message(F.text == "Bot haqida malumot", StateFilter(None))
 async def handle_about_bot_button(message: types.Message):
-    logging.info(f"User {message.from_user.id} requested bot info.")
+    logging.info("User %s requested bot info.", message.from_user.id)
 
     admin_username = "usman_niyazbekov"  # Haqiqiy username (@ belgisisiz)
 
@@ -185,16 +369,16 @@ async def handle_about_bot_button(message: types.Message):
 
     try:
         await message.answer(bot_info_text, parse_mode="HTML")
-        logging.info(f"Bot info sent to user {message.from_user.id}")
+        logging.info("Bot info sent to user %s", message.from_user.id)
     except TelegramBadRequest as e:
         # Telegram API xatolarini (masalan, HTML parse xatosi) batafsilroq loglash
-        logging.error(f"Telegram API error sending bot info to {message.from_user.id} (HTML parse error possible): {e}", exc_info=True)
+        logging.error("Telegram API error sending bot info to %s (HTML parse error possible): %s", message.from_user.id, e, exc_info=True)
         await message.answer(
             "Bot haqida ma'lumotni ko'rsatishda texnik xatolik yuz berdi (API). "
             "Iltimos, keyinroq qayta urinib ko'ring."
         )
     except Exception as e:
-        logging.error(f"Unexpected error sending bot info to {message.from_user.id}: {e}", exc_info=True)
+        logging.error("Unexpected error sending bot info to %s: %s", message.from_user.id, e, exc_info=True)
         # Umumiy xatolik yuz berganda foydalanuvchiga oddiy xabar yuborish
         await message.answer(
             "Bot haqida ma'lumotni ko'rsatishda kutilmagan texnik xatolik yuz berdi. "
@@ -210,50 +394,85 @@ async def search_vacancies_handler(message: types.Message, state: FSMContext):
          return
 
     await message.answer("⏳ Vakansiyalar qidirilmoqda...", reply_markup=skeyboard_active_search)
+    await send_first_vacancy_page(message, state)
+
+
+@dp.message(F.text == "Kalit so'z bo'yicha qidirish", StateFilter(None))
+async def keyword_search_prompt_handler(message: types.Message, state: FSMContext):
+    logging.info("User %s started keyword search.", message.from_user.id)
+    await state.set_state(SearchState.searching)
+    await message.answer(
+        "🔎 Qidirilayotgan lavozim, bo'lim yoki talab bo'yicha kalit so'z kiriting (masalan: o'qituvchi, dasturchi):",
+        reply_markup=skeyboard_active_search
+    )
+
+
+@dp.message(SearchState.searching, F.text)
+async def keyword_search_handler(message: types.Message, state: FSMContext):
+    global vacancy_parser
+    if not vacancy_parser:
+         logging.error("VacancyParser not initialized when trying to search by keyword.")
+         await message.answer("Xatolik: Bot hali tayyor emas, birozdan so'ng urinib ko'ring.")
+         return
+
+    search_query = message.text.strip()[:100]
+    if not search_query:
+        await message.answer("Kalit so'z bo'sh bo'lmasligi kerak. Qaytadan kiriting:")
+        return
+    logging.info("User %s searched for: %r", message.from_user.id, search_query)
+    await send_first_vacancy_page(message, state, search_query=search_query)
+
+
+async def send_first_vacancy_page(message: types.Message, state: FSMContext, search_query: str = ""):
     current_page = 1
 
     try:
-        vacancies_page_1, total_pages, total_items = await vacancy_parser.get_vacancies(
-            query="",
-            page=current_page
-        )
+        vacancies_page_1, total_pages, total_items, stale = await load_vacancy_page(current_page, search_query)
 
         if vacancies_page_1 is None:
             await message.answer("❌ Vakansiyalarni olishda xatolik yuz berdi. API bilan muammo bo'lishi mumkin.", reply_markup=create_start_keyboard())
-            await state.clear()
+            await leave_browsing(message.from_user.id, state)
             return
 
         if not vacancies_page_1:
+            if search_query:
+                # Qidiruv rejimida qolamiz, foydalanuvchi boshqa so'z kiritishi mumkin
+                cancel_prefetch(message.from_user.id)
+                await message.answer(f"«{search_query}» bo'yicha vakansiya topilmadi. Boshqa kalit so'z kiriting yoki \"Ortga\" tugmasini bosing.")
+                return
             await message.answer("Hozircha aktiv vakansiyalar mavjud emas.", reply_markup=create_start_keyboard())
-            await state.clear()
+            await leave_browsing(message.from_user.id, state)
             return
 
         await state.set_state(SearchState.browsing)
+        # Holatda faqat sahifa raqami va id'lar saqlanadi, vakansiyalar umumiy ombordan olinadi
         await state.update_data(
-            current_vacancies=vacancies_page_1,
             current_page=current_page,
-            total_pages=total_pages,
-            total_items=total_items
+            vacancy_ids=[vacancy.id for vacancy in vacancies_page_1],
+            search_query=search_query
         )
-        logging.info(f"Initial search: Found {total_items} items across {total_pages} pages. Displaying page 1.")
+        logging.info("Initial search (query=%r): Found %s items across %s pages. Displaying page 1.", search_query, total_items, total_pages)
 
-        keyboard = create_vacancy_navigation_keyboard(
+        keyboard = render_cache.navigation_keyboard(
             vacancies_on_page=vacancies_page_1,
             current_page=current_page,
-            total_pages=total_pages
+            total_pages=total_pages,
+            search_query=search_query
         )
 
         if keyboard:
-            message_text = f"Topilgan vakansiyalar ({total_items} ta): Sahifa {current_page} / {total_pages}"
+            message_text = format_vacancy_list_title(total_items, current_page, total_pages, search_query, stale)
+            # Oldindan yuklash xabar yuborilishi bilan parallel boshlanadi
+            prefetch_adjacent_pages(message.from_user.id, current_page, total_pages, search_query)
             await message.answer(message_text, reply_markup=keyboard)
         else:
              await message.answer("Vakansiyalarni ko'rsatishda kutilmagan muammo yuz berdi.", reply_markup=create_start_keyboard())
-             await state.clear()
+             await leave_browsing(message.from_user.id, state)
 
     except Exception as e:
         logging.exception("Vakansiyalarni qidirish handlerida kutilmagan xatolik!")
         await message.answer("Texnik xatolik yuz berdi. Iltimos, keyinroq qayta urinib ko'ring.", reply_markup=create_start_keyboard())
-        await state.clear()
+        await leave_browsing(message.from_user.id, state)
 
 
 @dp.callback_query(SearchState.browsing, F.data.startswith("page:"))
@@ -267,40 +486,40 @@ async def pagination_handler(query: types.CallbackQuery, state: FSMContext):
     try:
         target_page = int(query.data.split(":")[1])
     except (IndexError, ValueError):
-        logging.warning(f"Could not parse page number from callback data: {query.data}")
+        logging.warning("Could not parse page number from callback data: %s", query.data)
         await query.answer("Xatolik: Sahifa raqami noto'g'ri.", show_alert=True)
         return
 
     await query.answer(f"⏳ {target_page}-sahifa yuklanmoqda...")
 
     try:
-        new_vacancies, total_pages, total_items = await vacancy_parser.get_vacancies(
-            query="",
-            page=target_page
-        )
+        data = await state.get_data()
+        search_query = data.get('search_query', "")
+        new_vacancies, total_pages, total_items, stale = await load_vacancy_page(target_page, search_query)
 
         if new_vacancies is None:
+            cancel_prefetch(query.from_user.id) # Ro'yxat tugmalari olib tashlanadi - qo'shni sahifalar endi kerak emas
             await query.message.edit_text("❌ Sahifani yuklashda xatolik yuz berdi.")
             return
 
 
         await state.update_data(
-            current_vacancies=new_vacancies,
             current_page=target_page,
-            total_pages=total_pages,
-            total_items=total_items
+            vacancy_ids=[vacancy.id for vacancy in new_vacancies]
         )
-        logging.info(f"Pagination: User switched to page {target_page}. Total items: {total_items}, Total pages: {total_pages}.")
+        logging.info("Pagination: User switched to page %s. Total items: %s, Total pages: %s.", target_page, total_items, total_pages)
 
-        new_keyboard = create_vacancy_navigation_keyboard(
+        new_keyboard = render_cache.navigation_keyboard(
             vacancies_on_page=new_vacancies,
             current_page=target_page,
-            total_pages=total_pages
+            total_pages=total_pages,
+            search_query=search_query
         )
 
-        message_text = f"Topilgan vakansiyalar ({total_items} ta): Sahifa {target_page} / {total_pages}"
+        message_text = format_vacancy_list_title(total_items, target_page, total_pages, search_query, stale)
 
         if new_keyboard:
+             prefetch_adjacent_pages(query.from_user.id, target_page, total_pages, search_query)
              await query.message.edit_text(message_text, reply_markup=new_keyboard)
         else:
              # Bu holatda ham sahifa ma'lumotini ko'rsatish muhim
@@ -316,14 +535,15 @@ async def pagination_handler(query: types.CallbackQuery, state: FSMContext):
     except TelegramBadRequest as e:
         if "message to edit not found" in str(e).lower() or \
            "message is not modified" in str(e).lower():
-            logging.warning(f"Could not edit message for pagination (likely already deleted or same content): {e}")
+            logging.warning("Could not edit message for pagination (likely already deleted or same content): %s", e)
             # Foydalanuvchiga javob bermaslik yaxshiroq, chunki xabar o'chirilgan yoki o'zgartirilmagan
             await query.answer(show_alert=False) # Alertsiz javob, shunchaki so'rovni yopish
         else:
-            logging.warning(f"Could not edit message for pagination (TelegramBadRequest): {e}")
+            logging.warning("Could not edit message for pagination (TelegramBadRequest): %s", e)
             await query.answer("Xabar yangilanmadi (eskirgan bo'lishi mumkin).", show_alert=True)
     except Exception as e:
         logging.exception("Pagination handlerida kutilmagan xatolik!")
+        cancel_prefetch(query.from_user.id)
         try:
             # Xabarni o'zgartirishga urinib ko'ramiz, agar iloji bo'lmasa, alert bilan javob beramiz
             if query.message:
@@ -341,105 +561,226 @@ async def vacancy_callback(query: types.CallbackQuery, state: FSMContext):
     try:
         relative_index = int(query.data.split(":")[1])
     except (IndexError, ValueError):
-        logging.warning(f"Could not parse relative index from callback data: {query.data}")
+        logging.warning("Could not parse relative index from callback data: %s", query.data)
         if query.message: # Xabar mavjud bo'lsa o'zgartiramiz
             await query.message.edit_text("Noto'g'ri ma'lumot. Qaytadan urinib ko'ring.", reply_markup=None)
         return
 
     data = await state.get_data()
-    current_vacancies = data.get('current_vacancies')
+    vacancy_ids = data.get('vacancy_ids')
     current_page = data.get('current_page', 1)
-    total_pages = data.get('total_pages', 1) # Ro'yxatga qaytish tugmasi uchun kerak
 
-    if not current_vacancies or not isinstance(current_vacancies, list):
-        logging.warning("Vacancies list not found or invalid in state for detail view.")
+    if not vacancy_ids or not isinstance(vacancy_ids, list):
+        logging.warning("Vacancy ids not found or invalid in state for detail view.")
+        cancel_prefetch(query.from_user.id)
         if query.message:
             await query.message.edit_text("Vakansiyalar ro'yxati topilmadi (ma'lumot eskirgan bo'lishi mumkin). Qidiruvni qaytadan boshlang.", reply_markup=None)
         return
 
-    if 0 <= relative_index < len(current_vacancies):
-        vacancy = current_vacancies[relative_index]
-        logging.info(f"Displaying details for vacancy index {relative_index} from page {current_page}")
-
-        details = [
-            f"<b>Lavozim:</b> {html.escape(vacancy.get('position', '<i>Noma’lum</i>'))}",
-            f"<b>Bo'lim:</b> {html.escape(vacancy.get('department', '<i>Noma’lum</i>'))}",
-            f"<b>Maosh:</b> {html.escape(vacancy.get('salary', '<i>Ko’rsatilmagan</i>'))}",
-            f"<b>Talab qilinadigan tajriba:</b> {html.escape(vacancy.get('experience', '<i>Noma’lum</i>'))}",
-            f"<b>Ish jadvali:</b> {html.escape(vacancy.get('work_schedule', '<i>Noma’lum</i>'))}",
-            f"<b>Talablar:</b> {html.escape(str(vacancy.get('requirement', '<i>Noma’lum</i>')))}", # str() qo'shildi, agar None bo'lsa
-            f"<b>Ochilish vaqti:</b> {html.escape(vacancy.get('opening_time', '<i>Noma’lum</i>'))}",
-            f"<b>Yopilish vaqti:</b> {html.escape(vacancy.get('end_time', '<i>Noma’lum</i>'))}",
-        ]
-        vacancy_id = vacancy.get('id')
-        if vacancy_id:
-            details.append(f"<b>Ushbu vakansiyaga</b> <a href='https://job.ubtuit.uz/job/{vacancy_id}'>ARIZA BERISH</a>")
-        else:
-            details.append("<i>Ariza berish uchun havola topilmadi.</i>")
-
-        message_text = "\n".join(filter(None, details))
+    vacancy = resolve_vacancy(vacancy_ids[relative_index]) if 0 <= relative_index < len(vacancy_ids) else None
+    if vacancy is not None:
+        logging.info("Displaying details for vacancy index %s from page %s", relative_index, current_page)
 
-        back_button_builder = InlineKeyboardBuilder()
-        # "Ro'yxatga qaytish" tugmasi joriy sahifaga qaytaradi
-        back_button_builder.row(
-            InlineKeyboardButton(text="⬅️ Ro'yxatga qaytish", callback_data=f"page:{current_page}")
-        )
+        message_text = render_cache.vacancy_details(vacancy)
 
         try:
             if query.message:
                 await query.message.edit_text(
                     message_text,
                     parse_mode="HTML",
-                    reply_markup=back_button_builder.as_markup(),
+                    reply_markup=render_cache.back_to_list_keyboard(current_page),
                     disable_web_page_preview=True
                 )
         except TelegramBadRequest as e:
              if "message to edit not found" in str(e).lower() or \
                 "message is not modified" in str(e).lower():
-                 logging.warning(f"Could not edit message for vacancy detail (likely already deleted or same content): {e}")
+                 logging.warning("Could not edit message for vacancy detail (likely already deleted or same content): %s", e)
                  # Bu holda alert ko'rsatmaslik ma'qul
              else:
-                 logging.warning(f"Could not edit message for vacancy detail (TelegramBadRequest): {e}")
+                 logging.warning("Could not edit message for vacancy detail (TelegramBadRequest): %s", e)
                  await query.answer("Xabarni yangilab bo'lmadi.", show_alert=True) # Foydalanuvchiga xabar berish
         except Exception as edit_err:
-             logging.error(f"Could not edit message for vacancy detail: {edit_err}")
+             logging.error("Could not edit message for vacancy detail: %s", edit_err)
              await query.answer("Xabarni ko'rsatishda xatolik.", show_alert=True)
 
     else:
-        logging.warning(f"Invalid relative index requested: {relative_index}. List size: {len(current_vacancies)} on page {current_page}")
+        logging.warning("Invalid relative index or unknown vacancy requested: %s. List size: %s on page %s", relative_index, len(vacancy_ids), current_page)
+        cancel_prefetch(query.from_user.id) # Foydalanuvchi qidiruvni qaytadan boshlashi kerak
         if query.message:
             await query.message.edit_text("Tanlangan vakansiya joriy sahifada topilmadi (ro'yxat yangilangan bo'lishi mumkin). Qidiruvni qaytadan boshlang.", reply_markup=None)
 
 
-async def main():
-    global vacancy_parser
-    vacancy_parser = VacancyParser(API_URL) # DEFAULT_ITEMS_PER_PAGE vacancy_parser ichida ishlatiladi
-
-    logging.info("Bot ishga tushmoqda...")
-    print("Bot is starting...")
+@dp.startup()
+async def on_startup():
+    global vacancy_parser, vacancy_sync, snapshot_file, page_prefetcher, subscription_store, subscription_notifier, subscription_lease
+    dp.fsm.storage = await ensure_storage_available(dp.fsm.storage, session_ttl=FSM_SESSION_TTL)
+    logging.info("FSM storage: %s", type(dp.fsm.storage).__name__)
+    vacancy_parser = VacancyParser(
+        API_URL,
+        cache_ttl=VACANCY_CACHE_TTL,
+        cache_max_size=VACANCY_CACHE_SIZE,
+        connection_settings=API_CONNECTION_SETTINGS,
+        stale_ttl=VACANCY_STALE_TTL,
+        breaker=CircuitBreaker(failure_threshold=API_BREAKER_FAILURES, recovery_timeout=API_BREAKER_RECOVERY),
+        json_decoder=VACANCY_JSON_DECODER,
+        stream_threshold=VACANCY_STREAM_THRESHOLD
+    ) # DEFAULT_ITEMS_PER_PAGE vacancy_parser ichida ishlatiladi
+    page_prefetcher = PagePrefetcher(vacancy_parser, budget=VACANCY_PREFETCH_BUDGET)
+    is_worker = PROCESS_ROLE == "worker"
+    if VACANCY_SYNC_INTERVAL > 0:
+        vacancy_sync = VacancySynchronizer(
+            vacancy_parser,
+            interval=VACANCY_SYNC_INTERVAL,
+            concurrency=VACANCY_SYNC_CONCURRENCY
+        ) # Ishchi jarayonda ishga tushirilmaydi - snapshotni supervisor yuboradi (install_snapshot)
+        if not is_worker:
+            vacancy_sync.add_listener(search_index.apply_delta) # Qidiruv indeksi faqat o'zgarishlar bilan yangilanadi
+            vacancy_sync.add_listener(render_cache.invalidate) # Yangi snapshot - eski tayyor matnlar yaroqsiz
+    if not is_worker and isinstance(dp.fsm.storage, RedisFSMStorage):
+        # Obunalar lokal faylda - shu Redis'ga ulangan ikkinchi nusxa ishga tushmaydi
+        subscription_lease = SubscriptionOwnerLease(dp.fsm.storage.redis)
+        await subscription_lease.acquire()
+    # Ishchilarda bloklangan chatlarning obunalarini supervisor o'chiradi - chat obunalari bazadan qayta o'qiladi
+    subscription_store = SubscriptionStore(SUBSCRIPTIONS_PATH, shared=is_worker)
+    if vacancy_sync and not is_worker:
+        # Supervisor rejimida obunalarni ishchilar qo'shadi - har moslashtirishdan oldin bazadan qayta o'qiladi
+        subscription_notifier = SubscriptionNotifier(bot, subscription_store, reload_store=PROCESS_ROLE == "supervisor")
+        vacancy_sync.add_listener(subscription_notifier.on_sync) # Yangi vakansiyalar obunachilarga yuboriladi
+        metrics_registry.add_collector(prefixed("subscriptions", subscription_notifier.stats))
+    elif not is_worker:
+        logging.warning("VACANCY_SYNC_INTERVAL=0: subscription notifications are disabled.")
+    if vacancy_sync and VACANCY_SNAPSHOT_PATH and not is_worker:
+        snapshot_file = SnapshotFile(VACANCY_SNAPSHOT_PATH, search_index)
+        restored = snapshot_file.load()
+        if restored is not None:
+            # Oldingi ishga tushirishdagi snapshot darhol ishlatiladi, API bilan moslashtirish fonda
+            snapshot, postings, synced_at = restored
+            search_index.restore(snapshot, postings)
+            vacancy_sync.restore(snapshot, synced_at)
+            if subscription_notifier:
+                subscription_notifier.prime()
+            if worker_pool:
+                worker_pool.on_synced(snapshot, synced_at)
+        vacancy_sync.add_sync_listener(snapshot_file.on_synced) # Har sinxronizatsiyadan keyin faylga yoziladi
+        metrics_registry.add_collector(prefixed("vacancy_snapshot_file", snapshot_file.stats))
+    if vacancy_sync and worker_pool:
+        vacancy_sync.add_sync_listener(worker_pool.on_synced) # Har sinxronizatsiyadan keyin ishchilarga yuboriladi
+        metrics_registry.add_collector(prefixed("bot_workers", worker_pool.stats))
+    metrics_registry.add_collector(prefixed("vacancy_page_cache", vacancy_parser.cache_stats))
+    metrics_registry.add_collector(prefixed("vacancy_api_connections", vacancy_parser.connection_stats))
+    metrics_registry.add_collector(prefixed("vacancy_prefetch", page_prefetcher.stats))
+    metrics_registry.add_collector(prefixed("vacancy_api_circuit", vacancy_parser.breaker.stats))
+    metrics_registry.add_collector(prefixed("render_cache", render_cache.stats))
+    metrics_registry.add_collector(prefixed("logging", logging_pipeline.stats))
+    metrics_registry.add_collector(prefixed("document_cache", document_cache.stats))
+    metrics_registry.add_collector(prefixed("telegram_send_scheduler", send_scheduler.stats))
 
     commands = [
-        types.BotCommand(command="/start", description="Botni ishga tushirish / Bosh menyu")
+        types.BotCommand(command="/start", description="Botni ishga tushirish / Bosh menyu"),
+        types.BotCommand(command="/subscribe", description="Kalit so'z bo'yicha yangi vakansiyalarga obuna"),
+        types.BotCommand(command="/subscribe_department", description="Bo'lim bo'yicha yangi vakansiyalarga obuna"),
+        types.BotCommand(command="/subscriptions", description="Obunalarim")
     ]
-    try:
-        await bot.set_my_commands(commands)
-        logging.info("Bot komandalari o'rnatildi.")
-    except Exception as e:
-        logging.error(f"Bot komandalarini o'rnatishda xatolik: {e}")
+    if not is_worker:
+        try:
+            await bot.set_my_commands(commands)
+            logging.info("Bot komandalari o'rnatildi.")
+        except Exception as e:
+            logging.error("Bot komandalarini o'rnatishda xatolik: %s", e)
 
     # Obyektivka fayli mavjudligini ishga tushirishdan oldin tekshirish
     if not os.path.exists(OBYEKTIVKA_FILE_PATH):
-        logging.warning(f"DIQQAT: Obyektivka fayli '{OBYEKTIVKA_FILE_PATH}' topilmadi. Fayl yuklash funksiyasi ishlamasligi mumkin.")
+        logging.warning("DIQQAT: Obyektivka fayli '%s' topilmadi. Fayl yuklash funksiyasi ishlamasligi mumkin.", OBYEKTIVKA_FILE_PATH)
         print(f"WARNING: Obyektivka file '{OBYEKTIVKA_FILE_PATH}' not found. File upload feature might not work.")
 
+    if subscription_notifier:
+        subscription_notifier.start()
+    if vacancy_sync and not is_worker:
+        vacancy_sync.start() # Vakansiyalar snapshotini fonda yangilab turish
+
+@dp.shutdown()
+async def on_shutdown():
+    if vacancy_sync:
+        await vacancy_sync.stop()
+    if snapshot_file:
+        await snapshot_file.flush()
+    if subscription_notifier:
+        await subscription_notifier.stop()
+    if subscription_store:
+        await subscription_store.close()
+    if subscription_lease:
+        await subscription_lease.release()
+    if vacancy_parser:
+        logging.info("Vacancy page cache stats: %s", vacancy_parser.cache_stats())
+        logging.info("Vacancy API connection stats: %s", vacancy_parser.connection_stats())
+        await vacancy_parser.close() # Parser sessiyasini ham yopish
+
+def run_worker(worker_id: int, inbox, outbox):
+    """Ishchi jarayonning kirish nuqtasi (multiprocessing spawn orqali, BOT_WORKERS > 1)."""
+    global PROCESS_ROLE
+    PROCESS_ROLE = "worker"
+    asyncio.run(serve_worker(dp, bot, worker_id, inbox, install_snapshot, BOT_MAX_CONCURRENCY, outbox, metrics_registry))
+
+def create_supervisor_dispatcher() -> Dispatcher:
+    """
+    BOT_WORKERS > 1: update'larni qabul qilib, chat bo'yicha ishchi jarayonlarga taqsimlaydigan dispatcher.
+    Sinxronizatsiya, obuna xabarnomalari va snapshot fayli supervisor'da qoladi.
+    """
+    global PROCESS_ROLE, worker_pool
+    PROCESS_ROLE = "supervisor"
+    # Handler va Bot API metrikalari ishchilarda yig'iladi va supervisor'ning /metrics'iga qo'shiladi
+    worker_pool = WorkerPool(run_worker, BOT_WORKERS, index=search_index, registry=metrics_registry)
+    supervisor_dp = Dispatcher(disable_fsm=True)
+    supervisor_dp.update.outer_middleware(ShardForwardMiddleware(worker_pool))
+
+    @supervisor_dp.startup()
+    async def start_workers():
+        await dp.emit_startup(bot=bot)
+        worker_pool.start()
+
+    @supervisor_dp.shutdown()
+    async def stop_workers():
+        await worker_pool.stop()
+        await dp.emit_shutdown(bot=bot)
+
+    return supervisor_dp
+
+async def main():
+    logging.info("Bot ishga tushmoqda (%s rejimida, %s ta jarayon)...", BOT_MODE, BOT_WORKERS)
+    print("Bot is starting...")
+
+    # Supervisor'ning o'z handler'lari yo'q - qaysi update turlari kerakligi asosiy dispatcherdan olinadi
+    allowed_updates = dp.resolve_used_update_types()
+    dispatcher = create_supervisor_dispatcher() if BOT_WORKERS > 1 else dp
+    metrics_runner = None
     try:
-        await dp.start_polling(bot)
+        if BOT_MODE == "webhook":
+            dp.update.outer_middleware(ConcurrencyLimitMiddleware(BOT_MAX_CONCURRENCY))
+            await run_webhook(
+                dispatcher,
+                bot,
+                webhook_url=WEBHOOK_URL,
+                path=WEBHOOK_PATH,
+                secret_token=WEBHOOK_SECRET,
+                host=WEBAPP_HOST,
+                port=WEBAPP_PORT,
+                allowed_updates=allowed_updates
+            )
+        else:
+            if METRICS_PORT:
+                metrics_runner = await start_metrics_server(METRICS_HOST, METRICS_PORT)
+            try:
+                await bot.delete_webhook() # Avval webhook rejimida ishlagan bo'lsa, getUpdates ishlashi uchun
+            except Exception as e:
+                # Vaqtinchalik Telegram/tarmoq xatosi botni to'xtatmasin - polling o'zi qayta urinadi
+                logging.warning("Could not delete webhook before polling, continuing: %s", e)
+            await dispatcher.start_polling(bot, tasks_concurrency_limit=BOT_MAX_CONCURRENCY, allowed_updates=allowed_updates)
     finally:
         logging.info("Bot to'xtatilmoqda...")
         print("Bot is stopping...")
+        if metrics_runner:
+            await metrics_runner.cleanup()
         await bot.session.close()
-        if vacancy_parser:
-            await vacancy_parser.close() # Parser sessiyasini ham yopish
         logging.info("Bot to'xtatildi.")
         print("Bot stopped.")
 
@@ -449,5 +790,5 @@ if __name__ == "__main__":
     except (KeyboardInterrupt, SystemExit):
         logging.info("Dastur foydalanuvchi tomonidan to'xtatildi.")
     except Exception as e:
-        logging.critical(f"Kritik xatolik main execution loopdan tashqarida: {e}", exc_info=True)
+        logging.critical("Kritik xatolik main execution loopdan tashqarida: %s", e, exc_info=True)
         print(f"CRITICAL ERROR outside main loop: {e}")
\ No newline at end of file
@@ -0,0 +1,216 @@
+import bisect
+import logging
+import math
+
+from aiohttp import web
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: dict[tuple, float] = {}
+        self._remote: dict = {}  # manba (masalan, ishchi jarayon) -> uning oxirgi snapshot'i
+
+    def inc(self, *labels, amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def snapshot(self) -> dict[tuple, float]:
+        return dict(self._values)
+
+    @staticmethod
+    def _add(total: dict, values: dict):
+        for labels, value in values.items():
+            total[labels] = total.get(labels, 0) + value
+
+    def _combined(self) -> dict[tuple, float]:
+        if not self._remote:
+            return self._values
+        total = dict(self._values)
+        for values in self._remote.values():
+            self._add(total, values)
+        return total
+
+    def expose(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self._combined().items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = (), buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets))
+        self._series: dict[tuple, list] = {}  # labels -> [bucket counts..., sum, count]
+        self._remote: dict = {}
+
+    def observe(self, value: float, *labels):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [0] * len(self.buckets) + [0.0, 0]
+        # Bucketlar kumulyativ emas holda saqlanadi, eksportda yig'iladi - observe() arzon bo'lishi uchun
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            series[index] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def snapshot(self) -> dict[tuple, list]:
+        return {labels: list(series) for labels, series in self._series.items()}
+
+    @staticmethod
+    def _add(total: dict, values: dict):
+        for labels, series in values.items():
+            current = total.get(labels)
+            total[labels] = list(series) if current is None else [a + b for a, b in zip(current, series)]
+
+    def _combined(self) -> dict[tuple, list]:
+        if not self._remote:
+            return self._series
+        total = self.snapshot()
+        for values in self._remote.values():
+            self._add(total, values)
+        return total
+
+    def expose(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for labels, series in sorted(self._combined().items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                bucket_labels = _format_labels(self.labelnames, labels, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            bucket_labels = _format_labels(self.labelnames, labels, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{bucket_labels} {series[-1]}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(series[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {series[-1]}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Minimal Prometheus text-format registry (no external dependency).
+    Collectors are callables returning {metric_name: value} and are evaluated on every scrape,
+    which is how cache and connection statistics are exported as gauges.
+    Counters and histograms of other processes (bot workers) are merged in from their snapshot() via
+    merge() and exported summed with the local values.
+    """
+
+    def __init__(self):
+        self._metrics: list = []
+        self._collectors: list = []
+
+    def counter(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Counter:
+        metric = Counter(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, documentation: str, labelnames: tuple[str, ...] = (), buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector):
+        self._collectors.append(collector)
+
+    def snapshot(self) -> dict[str, dict]:
+        """Current counter and histogram values, picklable (sent from worker processes)."""
+        return {metric.name: metric.snapshot() for metric in self._metrics}
+
+    def merge(self, source, snapshot: dict[str, dict]):
+        """Replaces the values last reported by `source` (snapshots are cumulative, so repeats are harmless)."""
+        for metric in self._metrics:
+            values = snapshot.get(metric.name)
+            if values is not None:
+                metric._remote[source] = values
+
+    def retire(self, source):
+        """
+        The source is gone (a worker restarted from zero): its last values are kept in a shared bucket,
+        so exported counters never go backwards.
+        """
+        for metric in self._metrics:
+            values = metric._remote.pop(source, None)
+            if values:
+                metric._add(metric._remote.setdefault("retired", {}), values)
+
+    def expose(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.expose())
+        for collector in self._collectors:
+            try:
+                samples = collector()
+            except Exception:
+                logging.exception("Metrics collector %r failed.", collector)
+                continue
+            for name, value in samples.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    lines.append(f"# TYPE {name} gauge")
+                    lines.append(f"{name} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+HANDLER_DURATION = registry.histogram(
+    "bot_handler_duration_seconds", "Time spent in aiogram handlers.", ("handler",)
+)
+HANDLER_ERRORS = registry.counter(
+    "bot_handler_errors_total", "Exceptions raised out of aiogram handlers.", ("handler",)
+)
+UPSTREAM_DURATION = registry.histogram(
+    "vacancy_api_request_duration_seconds", "Vacancy API request latency by HTTP status (0 - network error/timeout).", ("status",)
+)
+TELEGRAM_REQUEST_DURATION = registry.histogram(
+    "telegram_api_request_duration_seconds", "Bot API request latency.", ("method",)
+)
+TELEGRAM_REQUEST_ERRORS = registry.counter(
+    "telegram_api_request_errors_total", "Failed Bot API requests by method and reason.", ("method", "reason")
+)
+
+
+def prefixed(prefix: str, stats_getter):
+    """Wraps a stats() callable so its numeric values are exported as `<prefix>_<key>` gauges."""
+    def collect() -> dict:
+        return {f"{prefix}_{key}": value for key, value in stats_getter().items()}
+    return collect
+
+
+async def metrics_handler(request: web.Request) -> web.Response:
+    return web.Response(body=registry.expose().encode("utf-8"), headers={"Content-Type": CONTENT_TYPE})
+
+
+async def start_metrics_server(host: str, port: int) -> web.AppRunner:
+    """Standalone /metrics endpoint for polling mode."""
+    app = web.Application()
+    app.router.add_get("/metrics", metrics_handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, host=host, port=port).start()
+    logging.info("Metrics endpoint listening on %s:%s/metrics", host, port)
+    return runner
@@ -0,0 +1,91 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable
+
+from aiogram import BaseMiddleware, Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.exceptions import TelegramAPIError, TelegramBadRequest, TelegramNetworkError, TelegramRetryAfter
+from aiogram.methods import Response, TelegramMethod
+from aiogram.types import TelegramObject
+
+from metrics import HANDLER_DURATION, HANDLER_ERRORS, TELEGRAM_REQUEST_DURATION, TELEGRAM_REQUEST_ERRORS
+
+
+class ConcurrencyLimitMiddleware(BaseMiddleware):
+    """
+    Limits how many updates are processed at the same time.
+    In webhook mode every update is handled in its own background task, so without a limit
+    a burst of requests would start an unbounded number of handlers.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._semaphore = asyncio.Semaphore(limit)
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any]
+    ) -> Any:
+        async with self._semaphore:
+            return await handler(event, data)
+
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+    """
+    Inner middleware: records how long each matched handler took, labelled by handler function name
+    (search_vacancies_handler, pagination_handler, vacancy_callback, ...).
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any]
+    ) -> Any:
+        handler_object = data.get("handler")
+        name = getattr(getattr(handler_object, "callback", None), "__name__", "unknown")
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception:
+            HANDLER_ERRORS.inc(name)
+            raise
+        finally:
+            HANDLER_DURATION.observe(time.perf_counter() - started, name)
+
+
+def telegram_error_reason(error: Exception) -> str:
+    if isinstance(error, TelegramRetryAfter):
+        return "retry_after"
+    if isinstance(error, TelegramBadRequest):
+        text = str(error).lower()
+        if "message is not modified" in text:
+            return "not_modified"
+        if "message to edit not found" in text:
+            return "not_found"
+        return "bad_request"
+    if isinstance(error, TelegramNetworkError):
+        return "network"
+    return type(error).__name__
+
+
+class TelegramRequestMetricsMiddleware(BaseRequestMiddleware):
+    """Session middleware: Bot API latency per method and failures (e.g. edit_text "message is not modified")."""
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType,
+        bot: Bot,
+        method: TelegramMethod
+    ) -> Response:
+        api_method = method.__api_method__
+        started = time.perf_counter()
+        try:
+            return await make_request(bot, method)
+        except TelegramAPIError as e:
+            TELEGRAM_REQUEST_ERRORS.inc(api_method, telegram_error_reason(e))
+            raise
+        finally:
+            TELEGRAM_REQUEST_DURATION.observe(time.perf_counter() - started, api_method)
@@ -0,0 +1,289 @@
+import asyncio
+import contextvars
+import heapq
+import itertools
+import logging
+import time
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import Response, TelegramMethod
+
+# Telegram cheklovlari: umumiy ~30 xabar/s, bitta chatga ~1 xabar/s (qisqa portlash mumkin), guruhga 20 xabar/daqiqa
+DEFAULT_GLOBAL_RATE = 30.0
+DEFAULT_GLOBAL_BURST = 30
+DEFAULT_CHAT_RATE = 1.0
+DEFAULT_CHAT_BURST = 3
+DEFAULT_GROUP_CHAT_RATE = 20 / 60
+MAX_RETRY_AFTER_ATTEMPTS = 3
+MAX_IDLE_CHAT_BUCKETS = 10000
+
+# Kichik raqam - yuqori ustuvorlik. Callback javoblari tugmadagi "soat" belgisini to'xtatadi, shuning uchun birinchi.
+PRIORITY_CALLBACK_ANSWER = 0
+PRIORITY_MESSAGE = 1
+PRIORITY_CHAT_ACTION = 2
+PRIORITY_BULK = 3  # obuna xabarlari kabi ommaviy yuborishlar - foydalanuvchi javoblaridan keyin
+
+# Joriy task uchun ustuvorlikni majburlash (masalan, fon xabarnomalari uchun PRIORITY_BULK)
+request_priority: contextvars.ContextVar[int | None] = contextvars.ContextVar("request_priority", default=None)
+
+COALESCED_EDIT_METHODS = frozenset({"editMessageText", "editMessageReplyMarkup", "editMessageCaption"})
+
+
+class TokenBucket:
+    __slots__ = ("rate", "capacity", "tokens", "updated", "paused_until")
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+
+    def _refill(self, now: float):
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def delay(self, now: float) -> float:
+        """Seconds until one token is available (0 - available now)."""
+        if now < self.paused_until:
+            return self.paused_until - now
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1
+
+    def pause(self, seconds: float):
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def idle(self, now: float) -> bool:
+        self._refill(now)
+        return self.tokens >= self.capacity and now >= self.paused_until
+
+
+class _Waiter:
+    __slots__ = ("priority", "sequence", "chat_id", "future")
+
+    def __init__(self, priority: int, sequence: int, chat_id, future: asyncio.Future):
+        self.priority = priority
+        self.sequence = sequence
+        self.chat_id = chat_id
+        self.future = future
+
+    def __lt__(self, other: "_Waiter") -> bool:
+        return (self.priority, self.sequence) < (other.priority, other.sequence)
+
+
+class _EditSlot:
+    """
+    Edits of one message: the queued (not yet sent) edit, the future all its callers wait for,
+    and a lock that keeps sends in order.
+    """
+
+    __slots__ = ("method", "future", "task", "waiters", "lock", "users")
+
+    def __init__(self):
+        self.method: TelegramMethod | None = None
+        self.future: asyncio.Future | None = None
+        self.task: asyncio.Task | None = None  # navbatdagi tahrirni yuboradigan task
+        self.waiters = 0  # navbatdagi tahrirni kutayotgan chaqiruvlar
+        self.lock = asyncio.Lock()
+        self.users = 0  # tugamagan yuborish tasklari
+
+
+class SendScheduler(BaseRequestMiddleware):
+    """
+    Session middleware that paces outgoing Bot API calls with a global and a per-chat token bucket.
+    Waiting calls are released in priority order (callback answers first); a call blocked by its own
+    chat's bucket does not hold back other chats. A queued edit of a message is replaced by a newer
+    edit of the same message, so only the latest content is sent and all callers get its result.
+    TelegramRetryAfter pauses the affected bucket and the call is retried.
+    """
+
+    def __init__(
+        self,
+        global_rate: float = DEFAULT_GLOBAL_RATE,
+        global_burst: int = DEFAULT_GLOBAL_BURST,
+        chat_rate: float = DEFAULT_CHAT_RATE,
+        chat_burst: int = DEFAULT_CHAT_BURST,
+        group_chat_rate: float = DEFAULT_GROUP_CHAT_RATE
+    ):
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.group_chat_rate = group_chat_rate
+        self._global = TokenBucket(global_rate, global_burst)
+        self._chats: dict = {}
+        self._waiters: list[_Waiter] = []
+        self._sequence = itertools.count()
+        self._wakeup: asyncio.TimerHandle | None = None
+        self._edits: dict[tuple, _EditSlot] = {}
+        self.sent = 0
+        self.coalesced = 0
+        self.retried = 0
+
+    def _chat_bucket(self, chat_id) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            if len(self._chats) >= MAX_IDLE_CHAT_BUCKETS:
+                now = time.monotonic()
+                self._chats = {key: value for key, value in self._chats.items() if not value.idle(now)}
+            # Manfiy chat_id - guruh yoki kanal, ular uchun cheklov qattiqroq
+            is_group = isinstance(chat_id, str) or chat_id < 0
+            rate = self.group_chat_rate if is_group else self.chat_rate
+            bucket = self._chats[chat_id] = TokenBucket(rate, 1 if is_group else self.chat_burst)
+        return bucket
+
+    async def _acquire(self, chat_id, priority: int):
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, _Waiter(priority, next(self._sequence), chat_id, future))
+        self._drain()
+        await future
+
+    def _drain(self):
+        """Releases every waiter whose buckets have a token, best priority first."""
+        if self._wakeup is not None:
+            self._wakeup.cancel()
+            self._wakeup = None
+        now = time.monotonic()
+        next_delay = None
+        remaining = []
+        while self._waiters:
+            waiter = heapq.heappop(self._waiters)
+            if waiter.future.done():  # bekor qilingan
+                continue
+            global_delay = self._global.delay(now)
+            if global_delay > 0:
+                remaining.append(waiter)
+                next_delay = global_delay
+                break
+            chat_bucket = self._chat_bucket(waiter.chat_id) if waiter.chat_id is not None else None
+            chat_delay = chat_bucket.delay(now) if chat_bucket is not None else 0.0
+            if chat_delay > 0:
+                remaining.append(waiter)
+                next_delay = chat_delay if next_delay is None else min(next_delay, chat_delay)
+                continue
+            self._global.take()
+            if chat_bucket is not None:
+                chat_bucket.take()
+            waiter.future.set_result(None)
+        for waiter in remaining:
+            heapq.heappush(self._waiters, waiter)
+        if self._waiters and next_delay is not None:
+            self._wakeup = asyncio.get_running_loop().call_later(next_delay, self._drain)
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType,
+        bot: Bot,
+        method: TelegramMethod
+    ) -> Response:
+        api_method = method.__api_method__
+        chat_id = getattr(method, "chat_id", None)
+        if api_method == "answerCallbackQuery":
+            priority = PRIORITY_CALLBACK_ANSWER
+        elif chat_id is None and getattr(method, "inline_message_id", None) is None:
+            # getUpdates, setWebhook, setMyCommands va h.k. chat cheklovlariga kirmaydi
+            return await make_request(bot, method)
+        elif api_method == "sendChatAction":
+            priority = PRIORITY_CHAT_ACTION
+        else:
+            priority = PRIORITY_MESSAGE
+        override = request_priority.get()
+        if override is not None:
+            priority = override
+
+        if api_method in COALESCED_EDIT_METHODS:
+            key = (api_method, chat_id, getattr(method, "message_id", None), getattr(method, "inline_message_id", None))
+            return await self._send_edit(make_request, bot, method, key, priority)
+        await self._acquire(chat_id, priority)
+        return await self._send(make_request, bot, method, chat_id, priority)
+
+    async def _send_edit(self, make_request, bot: Bot, method: TelegramMethod, key: tuple, priority: int) -> Response:
+        """
+        The edit is sent by a separate task that every coalesced caller waits for, so cancelling one
+        caller never drops an edit another handler is waiting on. Only when all callers of a queued
+        edit are cancelled before it is sent, the edit is dropped.
+        """
+        slot = self._edits.get(key)
+        if slot is None:
+            slot = self._edits[key] = _EditSlot()
+        if slot.method is not None:
+            # Hali yuborilmagan eski tahrir yangisi bilan almashtiriladi
+            slot.method = method
+            self.coalesced += 1
+        else:
+            slot.method = method
+            slot.future = asyncio.get_running_loop().create_future()
+            slot.waiters = 0
+            slot.users += 1
+            slot.task = asyncio.create_task(self._deliver_edit(make_request, bot, key, slot, slot.future, priority))
+        future = slot.future
+        slot.waiters += 1
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            if slot.future is future:
+                slot.waiters -= 1
+                if slot.waiters == 0:
+                    # Hali yuborilmagan tahrirni boshqa hech kim kutmayapti
+                    slot.method = slot.future = None
+                    future.cancel()
+                    slot.task.cancel()
+            raise
+
+    async def _deliver_edit(self, make_request, bot: Bot, key: tuple, slot: _EditSlot, future: asyncio.Future, priority: int):
+        try:
+            await self._acquire(key[1], priority)
+            async with slot.lock:
+                if slot.future is not future:
+                    return  # barcha chaqiruvlar bekor qilindi
+                latest = slot.method
+                slot.method = slot.future = None
+                try:
+                    result = await self._send(make_request, bot, latest, key[1], priority)
+                except asyncio.CancelledError:
+                    future.cancel()
+                    raise
+                except Exception as e:
+                    future.set_exception(e)
+                    future.exception()  # kutuvchilar bekor qilingan bo'lsa ham "never retrieved" ogohlantirishi chiqmasin
+                else:
+                    future.set_result(result)
+        finally:
+            if slot.future is future:
+                # Yuborishdan oldin to'xtatildi (masalan, dastur yopilmoqda) - kutuvchilar osilib qolmasin
+                slot.method = slot.future = None
+                future.cancel()
+            slot.users -= 1
+            if slot.users == 0 and slot.method is None:
+                self._edits.pop(key, None)
+
+    async def _send(self, make_request, bot: Bot, method: TelegramMethod, chat_id, priority: int) -> Response:
+        for attempt in range(MAX_RETRY_AFTER_ATTEMPTS + 1):
+            try:
+                response = await make_request(bot, method)
+                self.sent += 1
+                return response
+            except TelegramRetryAfter as e:
+                if attempt == MAX_RETRY_AFTER_ATTEMPTS:
+                    raise
+                self.retried += 1
+                bucket = self._chat_bucket(chat_id) if chat_id is not None else self._global
+                bucket.pause(e.retry_after)
+                logging.warning(
+                    "Flood control on %s (chat %s), retrying in %ss (attempt %s/%s).",
+                    method.__api_method__, chat_id, e.retry_after, attempt + 1, MAX_RETRY_AFTER_ATTEMPTS
+                )
+                await self._acquire(chat_id, priority)
+
+    def stats(self) -> dict:
+        return {
+            "sent": self.sent,
+            "coalesced_edits": self.coalesced,
+            "retry_after": self.retried,
+            "waiting": len(self._waiters),
+            "chat_buckets": len(self._chats),
+        }
@@ -0,0 +1,412 @@
+import asyncio
+import html
+import logging
+import os
+import socket
+import sqlite3
+import time
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramForbiddenError, TelegramBadRequest
+
+from send_scheduler import request_priority, PRIORITY_BULK
+from vacancy_parser import Vacancy
+from vacancy_render import VACANCY_APPLY_URL
+from vacancy_search import tokenize, FIELD_WEIGHTS, MIN_PREFIX_LENGTH
+from vacancy_store import VacancySnapshot, SyncDelta
+
+DEFAULT_SUBSCRIPTIONS_PATH = "subscriptions.sqlite3"
+MAX_SUBSCRIPTIONS_PER_CHAT = 10
+MAX_TERM_LENGTH = 100
+MAX_VACANCIES_PER_NOTIFICATION = 10
+DEFAULT_NOTIFY_WORKERS = 8  # bir vaqtda yuborilayotgan xabarnomalar (qolganlarini SendScheduler tartiblaydi)
+OWNER_LEASE_KEY = "jobbot:subscriptions:owner"
+OWNER_LEASE_TTL = 60  # sekund; ishlayotgan nusxa kalitni shu muddat ichida yangilab turadi
+
+KIND_KEYWORD = "keyword"
+KIND_DEPARTMENT = "department"
+
+
+class Subscription:
+    __slots__ = ("id", "chat_id", "kind", "term", "tokens")
+
+    def __init__(self, subscription_id: int, chat_id: int, kind: str, term: str):
+        self.id = subscription_id
+        self.chat_id = chat_id
+        self.kind = kind
+        self.term = term
+        self.tokens = tuple(dict.fromkeys(tokenize(term)))
+
+
+def is_valid_term(term: str) -> bool:
+    """A term needs at least one word token to be matchable."""
+    return bool(tokenize(term))
+
+
+class SubscriptionIndex:
+    """
+    Subscriptions indexed by their first token, so matching a vacancy costs one dict lookup per
+    prefix of its tokens rather than one check per subscriber. A subscription matches when every one
+    of its tokens is a prefix of some token of the vacancy ("dastur" matches "dasturchi"); keyword
+    subscriptions look at all searchable fields, department subscriptions only at the department.
+    """
+
+    def __init__(self):
+        self._by_id: dict[int, Subscription] = {}
+        self._by_chat: dict[int, dict[int, Subscription]] = {}
+        self._by_token: dict[tuple[str, str], dict[int, Subscription]] = {}  # (kind, birinchi token) -> obunalar
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def add(self, subscription: Subscription):
+        if not subscription.tokens:
+            return
+        self._by_id[subscription.id] = subscription
+        self._by_chat.setdefault(subscription.chat_id, {})[subscription.id] = subscription
+        self._by_token.setdefault((subscription.kind, subscription.tokens[0]), {})[subscription.id] = subscription
+
+    def remove(self, subscription_id: int) -> Subscription | None:
+        subscription = self._by_id.pop(subscription_id, None)
+        if subscription is None:
+            return None
+        chat_subscriptions = self._by_chat.get(subscription.chat_id)
+        if chat_subscriptions is not None:
+            chat_subscriptions.pop(subscription_id, None)
+            if not chat_subscriptions:
+                del self._by_chat[subscription.chat_id]
+        key = (subscription.kind, subscription.tokens[0])
+        bucket = self._by_token.get(key)
+        if bucket is not None:
+            bucket.pop(subscription_id, None)
+            if not bucket:
+                del self._by_token[key]
+        return subscription
+
+    def get(self, subscription_id: int) -> Subscription | None:
+        return self._by_id.get(subscription_id)
+
+    def for_chat(self, chat_id: int) -> list[Subscription]:
+        return list(self._by_chat.get(chat_id, {}).values())
+
+    def subscriber_count(self) -> int:
+        return len(self._by_chat)
+
+    @staticmethod
+    def _prefixes(tokens) -> set[str]:
+        prefixes = set()
+        for token in tokens:
+            prefixes.add(token)
+            for length in range(MIN_PREFIX_LENGTH, len(token)):
+                prefixes.add(token[:length])
+        return prefixes
+
+    def match(self, vacancy: Vacancy) -> dict[int, Subscription]:
+        """Returns {chat_id: first matching subscription} for one vacancy."""
+        matches: dict[int, Subscription] = {}
+        fields = {
+            KIND_KEYWORD: self._prefixes(token for field in FIELD_WEIGHTS for token in tokenize(getattr(vacancy, field))),
+            KIND_DEPARTMENT: self._prefixes(tokenize(vacancy.department)),
+        }
+        for kind, prefixes in fields.items():
+            for prefix in prefixes:
+                for subscription in self._by_token.get((kind, prefix), {}).values():
+                    if subscription.chat_id not in matches and all(token in prefixes for token in subscription.tokens):
+                        matches[subscription.chat_id] = subscription
+        return matches
+
+
+class SubscriptionStore:
+    """
+    Subscriptions persisted in SQLite and mirrored in a SubscriptionIndex; writes run in a worker thread.
+    The file is local to one host: bot workers share it with their supervisor, but a second replica of
+    the bot would keep its own copy (see SubscriptionOwnerLease). shared=True is for bot workers, whose
+    rows the supervisor also deletes (blocked chats): a chat's subscriptions are re-read before use.
+    """
+
+    def __init__(self, path: str = DEFAULT_SUBSCRIPTIONS_PATH, shared: bool = False):
+        self.path = path
+        self.shared = shared
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS subscriptions ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, chat_id INTEGER NOT NULL, kind TEXT NOT NULL, "
+            "term TEXT NOT NULL, created_at REAL NOT NULL, UNIQUE (chat_id, kind, term))"
+        )
+        self._lock = asyncio.Lock()
+        self.index = self._read_index()
+        logging.info("Subscriptions loaded from %s: %s subscriptions, %s chats.", os.path.abspath(path), len(self.index), self.index.subscriber_count())
+
+    def _read_index(self) -> SubscriptionIndex:
+        index = SubscriptionIndex()
+        for subscription_id, chat_id, kind, term in self._connection.execute(
+            "SELECT id, chat_id, kind, term FROM subscriptions"
+        ):
+            index.add(Subscription(subscription_id, chat_id, kind, term))
+        return index
+
+    async def reload(self):
+        """Re-reads the table; used when other processes (bot workers) add and remove subscriptions."""
+        async with self._lock:
+            self.index = await asyncio.to_thread(self._read_index)
+
+    async def for_chat(self, chat_id: int) -> list[Subscription]:
+        """Subscriptions of one chat; a shared store refreshes them from the table first."""
+        if self.shared:
+            await self._refresh_chat(chat_id)
+        return self.index.for_chat(chat_id)
+
+    async def _refresh_chat(self, chat_id: int):
+        async with self._lock:
+            rows = await asyncio.to_thread(self._select_chat, chat_id)
+        for subscription in self.index.for_chat(chat_id):
+            self.index.remove(subscription.id)
+        for subscription_id, kind, term in rows:
+            self.index.add(Subscription(subscription_id, chat_id, kind, term))
+
+    def _select_chat(self, chat_id: int) -> list[tuple]:
+        return self._connection.execute(
+            "SELECT id, kind, term FROM subscriptions WHERE chat_id = ? ORDER BY id", (chat_id,)
+        ).fetchall()
+
+    async def add(self, chat_id: int, kind: str, term: str) -> Subscription | None:
+        """Adds a subscription; returns None if the chat already has it."""
+        term = " ".join(term.split())[:MAX_TERM_LENGTH]
+        async with self._lock:
+            subscription_id = await asyncio.to_thread(self._insert, chat_id, kind, term)
+        if subscription_id is None:
+            return None
+        subscription = Subscription(subscription_id, chat_id, kind, term)
+        self.index.add(subscription)
+        return subscription
+
+    def _insert(self, chat_id: int, kind: str, term: str) -> int | None:
+        cursor = self._connection.execute(
+            "INSERT OR IGNORE INTO subscriptions (chat_id, kind, term, created_at) VALUES (?, ?, ?, ?)",
+            (chat_id, kind, term, time.time())
+        )
+        return cursor.lastrowid if cursor.rowcount else None
+
+    async def remove(self, chat_id: int, subscription_id: int) -> Subscription | None:
+        if self.shared:
+            await self._refresh_chat(chat_id)
+        subscription = self.index.get(subscription_id)
+        if subscription is None or subscription.chat_id != chat_id:
+            return None
+        self.index.remove(subscription_id)
+        async with self._lock:
+            await asyncio.to_thread(self._delete, "DELETE FROM subscriptions WHERE id = ?", (subscription_id,))
+        return subscription
+
+    async def remove_chat(self, chat_id: int) -> int:
+        subscriptions = await self.for_chat(chat_id)
+        for subscription in subscriptions:
+            self.index.remove(subscription.id)
+        async with self._lock:
+            await asyncio.to_thread(self._delete, "DELETE FROM subscriptions WHERE chat_id = ?", (chat_id,))
+        return len(subscriptions)
+
+    def _delete(self, sql: str, parameters: tuple):
+        self._connection.execute(sql, parameters)
+
+    async def close(self):
+        async with self._lock:
+            self._connection.close()
+
+
+class SubscriptionOwnerLease:
+    """
+    Subscriptions and their notifications belong to exactly one running bot instance, because the
+    SQLite file is local. When the FSM storage is shared (Redis), the instance holds this key there,
+    so a second replica started against the same Redis refuses to start instead of silently keeping
+    its own subscriptions and sending duplicate notifications. Without a shared backend, replicas
+    cannot see each other and single-instance use is up to the deployment.
+    """
+
+    def __init__(self, redis, key: str = OWNER_LEASE_KEY, ttl: int = OWNER_LEASE_TTL):
+        self.redis = redis
+        self.key = key
+        self.ttl = ttl
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self._task: asyncio.Task | None = None
+
+    async def _holder(self) -> str | None:
+        value = await self.redis.get(self.key)
+        return value.decode("utf-8") if isinstance(value, bytes) else value
+
+    async def acquire(self, wait: float | None = None):
+        """
+        Claims the key, waiting up to `wait` seconds (default: one TTL, enough for the lease of a
+        crashed previous run to expire). Raises RuntimeError while another instance holds it.
+        """
+        deadline = time.monotonic() + (self.ttl if wait is None else wait)
+        while not await self.redis.set(self.key, self.owner, nx=True, ex=self.ttl):
+            holder = await self._holder()
+            if time.monotonic() >= deadline:
+                raise RuntimeError(
+                    f"Obunalar boshqa bot nusxasiga ({holder}) tegishli: obunalar lokal SQLite faylda saqlanadi, "
+                    "shu Redis bilan bir vaqtda faqat bitta nusxa ishga tushirilishi mumkin."
+                )
+            logging.warning("Subscriptions are owned by bot instance %s, waiting for its lease to expire.", holder)
+            await asyncio.sleep(min(self.ttl / 6, max(0.0, deadline - time.monotonic())))
+        self._task = asyncio.create_task(self._renew(), name="subscription-owner-lease")
+        logging.info("Subscription owner lease acquired as %s.", self.owner)
+
+    async def _renew(self):
+        while True:
+            await asyncio.sleep(self.ttl / 3)
+            try:
+                holder = await self._holder()
+                if holder == self.owner:
+                    await self.redis.expire(self.key, self.ttl)
+                elif holder is None:
+                    await self.redis.set(self.key, self.owner, nx=True, ex=self.ttl)
+                else:
+                    logging.error("Subscription owner lease was taken over by %s; duplicate notifications are possible.", holder)
+            except Exception as e:
+                logging.warning("Could not renew the subscription owner lease: %s", e)
+
+    async def release(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        try:
+            if await self._holder() == self.owner:
+                await self.redis.delete(self.key)
+        except Exception as e:
+            logging.warning("Could not release the subscription owner lease: %s", e)
+
+
+def render_notification(subscription: Subscription, vacancies: list[Vacancy]) -> str:
+    label = "bo'lim" if subscription.kind == KIND_DEPARTMENT else "kalit so'z"
+    lines = [f"🔔 Yangi vakansiyalar («{html.escape(subscription.term)}» {label} bo'yicha obuna):", ""]
+    for vacancy in vacancies[:MAX_VACANCIES_PER_NOTIFICATION]:
+        line = f"• <b>{html.escape(vacancy.position or 'Noma’lum lavozim')}</b>"
+        if vacancy.department:
+            line += f" — {html.escape(vacancy.department)}"
+        if vacancy.id is not None:
+            line += f"\n  <a href='{VACANCY_APPLY_URL.format(vacancy_id=vacancy.id)}'>Batafsil / ariza</a>"
+        lines.append(line)
+    if len(vacancies) > MAX_VACANCIES_PER_NOTIFICATION:
+        lines.append(f"\n…va yana {len(vacancies) - MAX_VACANCIES_PER_NOTIFICATION} ta.")
+    lines.append("\nObunalarni boshqarish: /subscriptions")
+    return "\n".join(lines)
+
+
+class SubscriptionNotifier:
+    """
+    VacancySynchronizer listener: matches newly added vacancies against the subscription index and
+    queues one batched message per chat. Worker tasks drain the queue through the bot session, where
+    SendScheduler paces them at bulk priority, behind interactive replies.
+    """
+
+    def __init__(self, bot: Bot, store: SubscriptionStore, workers: int = DEFAULT_NOTIFY_WORKERS, reload_store: bool = False):
+        self.bot = bot
+        self.store = store
+        self.workers = max(1, workers)
+        self.reload_store = reload_store  # obunalar boshqa jarayonlarda o'zgaradi - moslashtirishdan oldin qayta o'qiladi
+        self._matching: asyncio.Task | None = None
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._tasks: list[asyncio.Task] = []
+        self._primed = False
+        self.sent = 0
+        self.failed = 0
+        self.unsubscribed_blocked = 0
+
+    def prime(self):
+        """Treats the current vacancies as already seen (e.g. a snapshot restored from disk)."""
+        self._primed = True
+
+    def on_sync(self, snapshot: VacancySnapshot, delta: SyncDelta):
+        """Snapshot listener. The first snapshot after startup only primes the notifier."""
+        if not self._primed:
+            self._primed = True
+            return
+        if not delta.added:
+            return
+        if self.reload_store:
+            self._matching = asyncio.create_task(self._reload_and_match(self._matching, snapshot, delta))
+            return
+        self._match(snapshot, delta)
+
+    async def _reload_and_match(self, previous: asyncio.Task | None, snapshot: VacancySnapshot, delta: SyncDelta):
+        if previous is not None:
+            await asyncio.gather(previous, return_exceptions=True)
+        try:
+            await self.store.reload()
+        except Exception:
+            logging.exception("Could not reload subscriptions, matching against the loaded ones.")
+        self._match(snapshot, delta)
+
+    def _match(self, snapshot: VacancySnapshot, delta: SyncDelta):
+        if not len(self.store.index):
+            return
+        started = time.perf_counter()
+        batches: dict[int, tuple[Subscription, list[Vacancy]]] = {}
+        for vacancy_id in delta.added:
+            vacancy = snapshot.get(vacancy_id)
+            if vacancy is None:
+                continue
+            for chat_id, subscription in self.store.index.match(vacancy).items():
+                batch = batches.get(chat_id)
+                if batch is None:
+                    batches[chat_id] = (subscription, [vacancy])
+                else:
+                    batch[1].append(vacancy)
+        for chat_id, (subscription, vacancies) in batches.items():
+            self._queue.put_nowait((chat_id, subscription, vacancies))
+        logging.info(
+            "Subscriptions: %s new vacancies matched %s chats in %.1f ms.",
+            len(delta.added), len(batches), (time.perf_counter() - started) * 1000
+        )
+
+    async def _worker(self):
+        request_priority.set(PRIORITY_BULK)
+        while True:
+            chat_id, subscription, vacancies = await self._queue.get()
+            try:
+                await self.bot.send_message(
+                    chat_id, render_notification(subscription, vacancies),
+                    parse_mode="HTML", disable_web_page_preview=True
+                )
+                self.sent += 1
+            except TelegramForbiddenError:
+                # Foydalanuvchi botni bloklagan - obunalari o'chiriladi
+                self.unsubscribed_blocked += 1
+                await self.store.remove_chat(chat_id)
+            except TelegramBadRequest as e:
+                self.failed += 1
+                logging.warning("Could not notify chat %s: %s", chat_id, e)
+            except Exception:
+                self.failed += 1
+                logging.exception("Subscription notification to chat %s failed.", chat_id)
+            finally:
+                self._queue.task_done()
+
+    def start(self):
+        if not self._tasks:
+            self._tasks = [
+                asyncio.create_task(self._worker(), name=f"subscription-notifier-{number}")
+                for number in range(self.workers)
+            ]
+
+    async def stop(self):
+        if self._matching is not None:
+            self._matching.cancel()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def stats(self) -> dict:
+        return {
+            "subscriptions": len(self.store.index),
+            "subscribers": self.store.index.subscriber_count(),
+            "queued": self._queue.qsize(),
+            "sent": self.sent,
+            "failed": self.failed,
+            "unsubscribed_blocked": self.unsubscribed_blocked,
+        }
@@ -0,0 +1,63 @@
+import asyncio
+import json
+import logging
+
+from aiogram import Bot, Dispatcher
+
+from bot_workers import MESSAGE_METRICS, WorkerLoop
+from metrics import MetricsRegistry
+
+CHAT_ID = 42
+
+
+def make_message_update(text: str) -> str:
+    return json.dumps({
+        "update_id": 1,
+        "message": {
+            "message_id": 1,
+            "date": 0,
+            "chat": {"id": CHAT_ID, "type": "private"},
+            "from": {"id": CHAT_ID, "is_bot": False, "first_name": "Test"},
+            "text": text,
+        },
+    })
+
+
+def make_loop(dispatcher: Dispatcher, **kwargs) -> WorkerLoop:
+    return WorkerLoop(dispatcher, Bot("123456:TEST"), None, lambda *args: None, 4, **kwargs)
+
+
+def test_handler_error_is_logged(caplog):
+    dispatcher = Dispatcher()
+
+    @dispatcher.message()
+    async def failing_handler(message):
+        raise RuntimeError("handler crashed")
+
+    with caplog.at_level(logging.ERROR):
+        asyncio.run(make_loop(dispatcher)._handle(CHAT_ID, make_message_update("salom")))
+
+    records = [record for record in caplog.records if record.getMessage() == f"Update for chat {CHAT_ID} failed in worker"]
+    assert records
+    assert isinstance(records[0].exc_info[1], RuntimeError)
+
+
+def test_malformed_payload_is_logged(caplog):
+    with caplog.at_level(logging.ERROR):
+        asyncio.run(make_loop(Dispatcher())._handle(CHAT_ID, "{not json"))
+
+    assert any(record.getMessage() == f"Update for chat {CHAT_ID} failed in worker" for record in caplog.records)
+
+
+def test_metrics_are_reported_to_outbox():
+    class Outbox(list):
+        put = list.append
+
+    registry = MetricsRegistry()
+    errors = registry.counter("errors_total", "Errors.", ("handler",))
+    errors.inc("start")
+    outbox = Outbox()
+
+    make_loop(Dispatcher(), outbox=outbox, registry=registry)._report_metrics()
+
+    assert outbox == [(MESSAGE_METRICS, {"errors_total": {("start",): 1}})]
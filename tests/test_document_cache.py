@@ -0,0 +1,110 @@
+import asyncio
+import os
+from types import SimpleNamespace
+
+import pytest
+from aiogram.types import FSInputFile
+
+from document_cache import DocumentCache
+
+
+class FakeBot:
+    """Records sent documents; uploads (FSInputFile) get a new file_id, file_id strings are echoed back."""
+
+    def __init__(self, fail_uploads: bool = False):
+        self.sent = []
+        self.fail_uploads = fail_uploads
+
+    async def send_chat_action(self, chat_id, action):
+        pass
+
+    async def send_document(self, chat_id, document, caption=None):
+        self.sent.append(document)
+        if isinstance(document, FSInputFile):
+            if self.fail_uploads:
+                raise RuntimeError("upload failed")
+            document = f"file-id-{len(self.sent)}"
+        return SimpleNamespace(document=SimpleNamespace(file_id=document))
+
+
+def uploads(bot: FakeBot) -> int:
+    return sum(isinstance(document, FSInputFile) for document in bot.sent)
+
+
+@pytest.fixture
+def document(tmp_path):
+    path = tmp_path / "obyektivka.docx"
+    path.write_bytes(b"birinchi versiya")
+    return path
+
+
+def test_cached_file_id_is_reused_and_persisted(tmp_path, document):
+    async def scenario():
+        bot = FakeBot()
+        cache = DocumentCache(str(tmp_path / "cache.json"))
+        await asyncio.gather(*(cache.send_document(bot, chat_id, str(document)) for chat_id in range(3)))
+        await cache.send_document(bot, 4, str(document))
+        assert uploads(bot) == 1
+        assert bot.sent[1:] == ["file-id-1"] * 3
+        assert cache._upload_locks == {}
+
+        # Qayta ishga tushgandan keyin ham fayl yuklanmaydi
+        restarted = DocumentCache(str(tmp_path / "cache.json"))
+        await restarted.send_document(bot, 5, str(document))
+        assert uploads(bot) == 1 and bot.sent[-1] == "file-id-1"
+
+    asyncio.run(scenario())
+    assert sorted(os.listdir(tmp_path)) == ["cache.json", "obyektivka.docx"]
+
+
+def test_changed_file_is_uploaded_again(tmp_path, document):
+    async def scenario():
+        bot = FakeBot()
+        cache = DocumentCache(str(tmp_path / "cache.json"), stat_interval=0)
+        first_hash = await cache.fingerprint(str(document))
+        await cache.send_document(bot, 1, str(document))
+
+        document.write_bytes(b"ikkinchi, uzunroq versiya")
+        assert await cache.fingerprint(str(document)) != first_hash
+        await cache.send_document(bot, 1, str(document))
+        await cache.send_document(bot, 1, str(document))
+        assert uploads(bot) == 2
+        assert cache.stats()["file_ids"] == 2
+
+    asyncio.run(scenario())
+
+
+def test_fingerprint_is_not_rechecked_within_stat_interval(tmp_path, document):
+    async def scenario():
+        cache = DocumentCache(None, stat_interval=60)
+        first_hash = await cache.fingerprint(str(document))
+        document.write_bytes(b"ikkinchi, uzunroq versiya")
+        assert await cache.fingerprint(str(document)) == first_hash
+
+        cache.stat_interval = 0
+        assert await cache.fingerprint(str(document)) != first_hash
+
+    asyncio.run(scenario())
+
+
+def test_save_failure_does_not_fail_the_send(tmp_path, document, caplog):
+    async def scenario():
+        bot = FakeBot()
+        cache = DocumentCache(str(tmp_path / "missing" / "cache.json"))
+        message = await cache.send_document(bot, 1, str(document))
+        assert message.document.file_id == "file-id-1"
+        await cache.send_document(bot, 1, str(document))
+        assert uploads(bot) == 1
+
+    asyncio.run(scenario())
+    assert "could not be saved" in caplog.text
+
+
+def test_upload_lock_is_released_when_upload_fails(document):
+    async def scenario():
+        cache = DocumentCache(None)
+        with pytest.raises(RuntimeError):
+            await cache.send_document(FakeBot(fail_uploads=True), 1, str(document))
+        assert cache._upload_locks == {}
+
+    asyncio.run(scenario())
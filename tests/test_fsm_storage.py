@@ -0,0 +1,50 @@
+import asyncio
+
+from aiogram.fsm.storage.base import StorageKey
+
+from fsm_storage import RedisFSMStorage
+
+KEY = StorageKey(bot_id=1, chat_id=2, user_id=2)
+
+
+class FakePipeline:
+    def __init__(self, calls: list):
+        self.calls = calls
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.calls.append((name, args, kwargs))
+
+    async def execute(self):
+        return []
+
+
+class FakeRedis:
+    def __init__(self):
+        self.calls = []
+
+    def pipeline(self, transaction: bool = True):
+        return FakePipeline(self.calls)
+
+
+def set_state_calls(session_ttl: int) -> list:
+    redis = FakeRedis()
+    asyncio.run(RedisFSMStorage(redis, session_ttl=session_ttl).set_state(KEY, "Browsing:page"))
+    return redis.calls
+
+
+def test_zero_ttl_sets_state_without_expiry():
+    calls = set_state_calls(0)
+    assert [call for call in calls if call[0] == "set"][0][2] == {"ex": None}
+    assert not [call for call in calls if call[0] == "expire"]
+
+
+def test_ttl_is_applied_to_state_and_data():
+    calls = set_state_calls(60)
+    assert [call for call in calls if call[0] == "set"][0][2] == {"ex": 60}
+    assert [call[1][1] for call in calls if call[0] == "expire"] == [60]
@@ -0,0 +1,42 @@
+import logging
+import queue
+
+from logging_setup import LazyQueueHandler, SamplingFilter
+
+
+def make_record(msg: str, args=None, level: int = logging.INFO) -> logging.LogRecord:
+    return logging.LogRecord("test", level, __file__, 1, msg, args, None)
+
+
+def test_sampling_keeps_every_nth_record_per_rule():
+    sampler = SamplingFilter({"Pagination: ": 10})
+    passed = [sampler.filter(make_record("Pagination: User switched to page %s.", (page,))) for page in range(30)]
+
+    assert passed.count(True) == 3
+    assert sampler.dropped == 27
+    assert all(sampler.filter(make_record("Other message")) for _ in range(5))
+    assert sampler.filter(make_record("Pagination: failed", level=logging.WARNING))
+
+
+def test_sampling_state_is_bounded_for_preformatted_messages():
+    sampler = SamplingFilter({"GET /webhook": 10}, cache_size=64)
+    for number in range(50000):
+        sampler.filter(make_record(f'127.0.0.1 [{number}] "GET /healthz HTTP/1.1" 200'))
+        sampler.filter(make_record(f"GET /webhook {number}"))
+
+    assert sampler._rule_for.cache_info().currsize <= 64
+    assert sampler._counters == {"GET /webhook": 50000}
+    assert sampler.dropped == 45000
+
+
+def test_queue_handler_formats_args_before_they_change():
+    handler = LazyQueueHandler(queue.Queue())
+    data = {"page": 1}
+    record = make_record("State: %s", (data,))
+    handler.emit(record)
+    data["page"] = 2
+
+    queued = handler.queue.get_nowait()
+    assert queued.getMessage() == "State: {'page': 1}"
+    assert queued.args is None
+    assert record.msg == "State: %s" and record.args is not None  # asl yozuv o'zgartirilmaydi
@@ -0,0 +1,40 @@
+from metrics import MetricsRegistry
+
+
+def make_registry():
+    registry = MetricsRegistry()
+    counter = registry.counter("handled_total", "Handled updates.", ("handler",))
+    histogram = registry.histogram("duration_seconds", "Duration.", ("handler",), buckets=(0.1, 1.0))
+    return registry, counter, histogram
+
+
+def test_merge_sums_worker_values_with_local_ones():
+    supervisor, counter, histogram = make_registry()
+    worker, worker_counter, worker_histogram = make_registry()
+    counter.inc("start")
+    worker_counter.inc("start", amount=2)
+    worker_counter.inc("search")
+    worker_histogram.observe(0.5, "start")
+
+    supervisor.merge(0, worker.snapshot())
+    supervisor.merge(0, worker.snapshot())  # takroriy hisobot ikki marta qo'shilmaydi
+    text = supervisor.expose()
+
+    assert 'handled_total{handler="start"} 3' in text
+    assert 'handled_total{handler="search"} 1' in text
+    assert 'duration_seconds_bucket{handler="start",le="1.0"} 1' in text
+    assert 'duration_seconds_count{handler="start"} 1' in text
+
+
+def test_retired_worker_values_are_kept():
+    supervisor, _, _ = make_registry()
+    worker, worker_counter, _ = make_registry()
+    worker_counter.inc("start", amount=5)
+    supervisor.merge(0, worker.snapshot())
+
+    supervisor.retire(0)
+    restarted, restarted_counter, _ = make_registry()
+    restarted_counter.inc("start")
+    supervisor.merge(0, restarted.snapshot())
+
+    assert 'handled_total{handler="start"} 6' in supervisor.expose()
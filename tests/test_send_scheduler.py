@@ -0,0 +1,61 @@
+import asyncio
+
+import pytest
+from aiogram.methods import EditMessageText, SendMessage
+
+from send_scheduler import SendScheduler
+
+CHAT_ID = 7
+
+
+def make_scheduler():
+    # Bitta token, keyingisi 0.1s dan keyin - tahrirlar navbatda kutadi
+    scheduler = SendScheduler(global_rate=1000, global_burst=1000, chat_rate=10, chat_burst=1)
+    sent = []
+
+    async def make_request(bot, method):
+        sent.append(method.text)
+        return method.text
+
+    return scheduler, sent, make_request
+
+
+def edit(text: str) -> EditMessageText:
+    return EditMessageText(chat_id=CHAT_ID, message_id=1, text=text)
+
+
+def test_coalesced_edit_is_delivered_when_owner_is_cancelled():
+    async def scenario():
+        scheduler, sent, make_request = make_scheduler()
+        await scheduler(make_request, None, SendMessage(chat_id=CHAT_ID, text="first"))
+        owner = asyncio.create_task(scheduler(make_request, None, edit("a")))
+        await asyncio.sleep(0)
+        coalesced = asyncio.create_task(scheduler(make_request, None, edit("b")))
+        await asyncio.sleep(0)
+
+        owner.cancel()
+        assert await coalesced == "b"
+        with pytest.raises(asyncio.CancelledError):
+            await owner
+        return sent, scheduler
+
+    sent, scheduler = asyncio.run(scenario())
+    assert sent == ["first", "b"]
+    assert scheduler.coalesced == 1
+    assert not scheduler._edits
+
+
+def test_edit_is_dropped_when_its_only_caller_is_cancelled():
+    async def scenario():
+        scheduler, sent, make_request = make_scheduler()
+        await scheduler(make_request, None, SendMessage(chat_id=CHAT_ID, text="first"))
+        caller = asyncio.create_task(scheduler(make_request, None, edit("a")))
+        await asyncio.sleep(0)
+        caller.cancel()
+        await asyncio.sleep(0.2)
+        assert await scheduler(make_request, None, edit("c")) == "c"
+        return sent, scheduler
+
+    sent, scheduler = asyncio.run(scenario())
+    assert sent == ["first", "c"]
+    assert not scheduler._edits
@@ -0,0 +1,110 @@
+import asyncio
+
+import pytest
+
+from subscriptions import (
+    KIND_DEPARTMENT, KIND_KEYWORD, Subscription, SubscriptionIndex, SubscriptionOwnerLease, SubscriptionStore
+)
+from vacancy_parser import Vacancy
+
+SUBSCRIPTIONS = [
+    Subscription(1, 10, KIND_KEYWORD, "dastur"),
+    Subscription(2, 11, KIND_KEYWORD, "Bosh hisobchi"),
+    Subscription(3, 12, KIND_DEPARTMENT, "IT bo'limi"),
+    Subscription(4, 13, KIND_KEYWORD, "it"),
+    Subscription(5, 14, KIND_DEPARTMENT, "moliya"),
+    Subscription(6, 10, KIND_KEYWORD, "hisob"),
+]
+
+
+@pytest.fixture
+def index():
+    index = SubscriptionIndex()
+    for subscription in SUBSCRIPTIONS:
+        index.add(subscription)
+    return index
+
+
+@pytest.mark.parametrize("vacancy, expected", [
+    # Kalit so'z barcha maydonlarda, bo'lim obunasi faqat bo'limda qidiriladi
+    (Vacancy(1, position="Dasturchi", department="IT bo'limi"), {10: 1, 12: 3, 13: 4}),
+    (Vacancy(2, position="Bosh hisobchi", department="Moliya bo'limi"), {10: 6, 11: 2, 14: 5}),
+    # "bosh hisobchi" uchun ikkala token ham kerak
+    (Vacancy(3, position="Hisobchi", department="Moliya"), {10: 6, 14: 5}),
+    (Vacancy(4, position="Moliya bo'yicha mutaxassis", department="Kadrlar"), {}),
+    # Tokenlar turli maydonlardan kelishi mumkin
+    (Vacancy(5, position="Bosh muhandis", requirement="Hisobchi tajribasi"), {10: 6, 11: 2}),
+    (Vacancy(6, position="Дастурчи", department="ИТ бўлими"), {10: 1, 12: 3, 13: 4}),
+    # Prefiks faqat token boshidan: "dastur" "tadastur"ga mos emas
+    (Vacancy(7, position="Tadastur"), {}),
+    (Vacancy(8, position=None, department=None), {}),
+])
+def test_match(index, vacancy, expected):
+    assert {chat_id: subscription.id for chat_id, subscription in index.match(vacancy).items()} == expected
+
+
+def test_removed_subscription_no_longer_matches(index):
+    index.remove(1)
+    assert 10 not in index.match(Vacancy(1, position="Dasturchi"))
+    assert [subscription.id for subscription in index.for_chat(10)] == [6]
+    index.remove(6)
+    assert index.for_chat(10) == [] and index.subscriber_count() == 4
+
+
+def test_shared_store_sees_chats_removed_by_another_process(tmp_path):
+    async def scenario():
+        path = str(tmp_path / "subscriptions.sqlite3")
+        supervisor = SubscriptionStore(path)
+        worker = SubscriptionStore(path, shared=True)
+        await worker.add(10, KIND_KEYWORD, "dasturchi")
+        await worker.add(10, KIND_DEPARTMENT, "IT bo'limi")
+        await supervisor.reload()
+        assert len(supervisor.index.for_chat(10)) == 2
+
+        # Supervisor bloklangan chatning obunalarini o'chiradi
+        assert await supervisor.remove_chat(10) == 2
+        assert await worker.for_chat(10) == []
+        subscription = await worker.add(10, KIND_KEYWORD, "dasturchi")
+        assert [s.id for s in await worker.for_chat(10)] == [subscription.id]
+        await supervisor.close()
+        await worker.close()
+
+    asyncio.run(scenario())
+
+
+class FakeRedis:
+    def __init__(self):
+        self.values = {}
+
+    async def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.values:
+            return None
+        self.values[key] = value.encode("utf-8")
+        return True
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    async def expire(self, key, seconds):
+        return key in self.values
+
+    async def delete(self, key):
+        self.values.pop(key, None)
+
+
+def test_second_instance_cannot_take_the_owner_lease():
+    async def scenario():
+        redis = FakeRedis()
+        first, second = SubscriptionOwnerLease(redis), SubscriptionOwnerLease(redis)
+        second.owner = "other-host:1"
+        await first.acquire(wait=0)
+        with pytest.raises(RuntimeError):
+            await second.acquire(wait=0)
+
+        await first.release()
+        await second.acquire(wait=0)
+        assert await redis.get(second.key) == b"other-host:1"
+        await second.release()
+        assert redis.values == {}
+
+    asyncio.run(scenario())
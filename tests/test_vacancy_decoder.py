@@ -0,0 +1,84 @@
+import asyncio
+import json
+
+import pytest
+
+from vacancy_decoder import StreamingPageDecoder
+
+PAGE = {
+    "count": 3,
+    "next": None,
+    "meta": {
+        "note": "Qo‘shtirnoq \"ichida\", teskari \\ chiziq va\nyangi qator",
+        "tags": ["a", [1, 2.5e3, -7, 0.125], {}, []],
+        "ok": True,
+    },
+    "results": [
+        {"id": 1, "position": "Oʻqituvchi", "salary": "5 000 000 so‘m"},
+        {"id": 2, "requirement": "JSON: {\"a\": [1]} va [\"]\"]"},
+        {"id": 3, "position": "\\\"]}", "department": "Ўқув бўлими"},
+    ],
+}
+PAYLOADS = [
+    json.dumps(PAGE, ensure_ascii=False).encode("utf-8"),
+    json.dumps(PAGE).encode("utf-8"),  # \uXXXX escape'lari bilan
+    json.dumps(PAGE["results"], ensure_ascii=False).encode("utf-8"),
+]
+
+
+async def chunked(parts):
+    for part in parts:
+        yield part
+
+
+def decode(parts):
+    built = []
+
+    def build_item(item):
+        built.append(item["id"])
+        return item
+
+    data = asyncio.run(StreamingPageDecoder(chunked(parts), build_item).decode())
+    return data, built
+
+
+@pytest.mark.parametrize("body", PAYLOADS)
+def test_split_at_every_byte_boundary(body):
+    expected = json.loads(body)
+    for split in range(len(body) + 1):
+        data, built = decode([body[:split], body[split:]])
+        assert data == expected, split
+        assert built == [1, 2, 3]
+
+
+@pytest.mark.parametrize("body", PAYLOADS)
+@pytest.mark.parametrize("size", [1, 2, 3, 7])
+def test_small_chunks_spanning_strings_and_escapes(body, size):
+    data, built = decode([body[start:start + size] for start in range(0, len(body), size)])
+    assert data == json.loads(body)
+    assert built == [1, 2, 3]
+
+
+@pytest.mark.parametrize("body", PAYLOADS[:1])
+def test_truncated_body_is_rejected(body):
+    for end in range(len(body)):
+        with pytest.raises(ValueError):
+            decode([body[start:min(start + 3, end)] for start in range(0, end, 3)])
+
+
+def test_long_value_is_decoded_once_it_is_complete(monkeypatch):
+    import vacancy_decoder
+
+    calls = []
+    raw_decode = vacancy_decoder._raw_decoder.raw_decode
+
+    def counting_raw_decode(text, index=0):
+        calls.append(index)
+        return raw_decode(text, index)
+
+    monkeypatch.setattr(vacancy_decoder._raw_decoder, "raw_decode", counting_raw_decode)
+    body = json.dumps({"count": 1, "meta": ["x" * 50] * 400, "results": []}).encode("utf-8")
+    data, _ = decode([body[start:start + 64] for start in range(0, len(body), 64)])
+    assert len(data["meta"]) == 400
+    # Har bo'lakda qayta urinilmaydi: uzun qiymat uchun ikki urinish va bitta yakuniy raw_decode
+    assert len(calls) < 10
@@ -0,0 +1,238 @@
+import asyncio
+import time
+
+from vacancy_parser import CircuitBreaker, PageCache, PageResult, Vacancy, VacancyParser
+from vacancy_store import VacancySynchronizer
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeParser(VacancyParser):
+    """VacancyParser whose upstream is a dict page -> PageResult; counts requests per page."""
+
+    def __init__(self, pages: dict, **kwargs):
+        super().__init__("http://localhost/", **kwargs)
+        self.pages = pages
+        self.requests: dict[int, int] = {}
+
+    async def _request_page(self, query: str, page: int) -> PageResult:
+        self.requests[page] = self.requests.get(page, 0) + 1
+        await asyncio.sleep(0)
+        return self.pages[page]
+
+
+class CountingFetcher:
+    """fetch() factory for PageCache.get_or_fetch; counts upstream calls per key and can be held open or made to fail."""
+
+    def __init__(self, error: Exception | None = None):
+        self.calls: dict = {}
+        self.error = error
+        self.release = asyncio.Event()
+        self.release.set()
+
+    def __call__(self, key):
+        async def fetch():
+            self.calls[key] = self.calls.get(key, 0) + 1
+            await self.release.wait()
+            if self.error is not None:
+                raise self.error
+            return [Vacancy(id=key[1])], 1, 1
+        return fetch
+
+
+def make_page(ids, total_pages: int, total_items: int, not_modified: bool = False) -> PageResult:
+    vacancies = [Vacancy(id=i, position=f"Vakansiya {i}") for i in ids]
+    return PageResult(vacancies, total_pages, total_items, not_modified=not_modified, status=304 if not_modified else 200)
+
+
+def test_cache_coalesces_concurrent_fetches():
+    async def scenario():
+        cache = PageCache(ttl=60)
+        fetcher = CountingFetcher()
+        fetcher.release.clear()
+        key = ("", 1)
+        waiters = [asyncio.ensure_future(cache.get_or_fetch(key, fetcher(key))) for _ in range(5)]
+        await asyncio.sleep(0)
+        fetcher.release.set()
+        results = await asyncio.gather(*waiters)
+
+        assert fetcher.calls == {key: 1}
+        assert all(result is results[0] for result in results)
+        assert await cache.get_or_fetch(key, fetcher(key)) is results[0]
+        assert fetcher.calls == {key: 1}
+        stats = cache.stats()
+        assert (stats["misses"], stats["coalesced"], stats["hits"], stats["inflight"]) == (1, 4, 1, 0)
+
+    asyncio.run(scenario())
+
+
+def test_cache_refetches_after_ttl():
+    async def scenario():
+        cache = PageCache(ttl=0.05)
+        fetcher = CountingFetcher()
+        key = ("", 1)
+        await cache.get_or_fetch(key, fetcher(key))
+        await cache.get_or_fetch(key, fetcher(key))
+        assert fetcher.calls[key] == 1
+
+        await asyncio.sleep(0.06)
+        assert cache.get(key) is None
+        assert cache.get_stale(key) is not None
+        await cache.get_or_fetch(key, fetcher(key))
+        assert fetcher.calls[key] == 2
+
+    asyncio.run(scenario())
+
+
+def test_cache_evicts_least_recently_used():
+    async def scenario():
+        cache = PageCache(ttl=60, max_size=2)
+        fetcher = CountingFetcher()
+        first, second, third = ("", 1), ("", 2), ("", 3)
+        for key in (first, second, first, third):
+            await cache.get_or_fetch(key, fetcher(key))
+        assert cache.stats()["size"] == 2
+
+        # first yaqinda o'qilgan, shuning uchun second chiqarib yuborilgan
+        await cache.get_or_fetch(first, fetcher(first))
+        await cache.get_or_fetch(second, fetcher(second))
+        assert fetcher.calls == {first: 1, second: 2, third: 1}
+
+    asyncio.run(scenario())
+
+
+def test_cache_propagates_fetch_error_to_all_waiters():
+    async def scenario():
+        cache = PageCache(ttl=60)
+        fetcher = CountingFetcher(error=RuntimeError("upstream down"))
+        fetcher.release.clear()
+        key = ("", 1)
+        waiters = [asyncio.ensure_future(cache.get_or_fetch(key, fetcher(key))) for _ in range(3)]
+        await asyncio.sleep(0)
+        fetcher.release.set()
+        results = await asyncio.gather(*waiters, return_exceptions=True)
+
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert fetcher.calls == {key: 1}
+        assert cache.stats()["size"] == 0 and cache.stats()["inflight"] == 0
+
+        # Xato keshlanmaydi - keyingi so'rov upstream'ga qayta boradi
+        fetcher.error = None
+        await cache.get_or_fetch(key, fetcher(key))
+        assert fetcher.calls == {key: 2}
+
+    asyncio.run(scenario())
+
+
+def test_cache_does_not_store_failed_pages():
+    async def scenario():
+        cache = PageCache(ttl=60)
+        key = ("", 1)
+
+        async def failed():
+            return None, 0, 0
+
+        assert (await cache.get_or_fetch(key, failed))[0] is None
+        assert cache.get(key) is None
+
+    asyncio.run(scenario())
+
+
+def test_breaker_closed_open_half_open_closed(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(time, "monotonic", clock)
+    breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=10)
+
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN and breaker.is_open
+    assert not breaker.allow_request()
+    assert breaker.rejected == 1
+
+    clock.now += 10
+    assert breaker.allow_request()  # sinov so'rovi
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow_request()  # sinov tugamaguncha boshqasi yo'q
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN and breaker.open_count == 2
+
+    clock.now += 10
+    assert breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED and breaker.failures == 0
+    assert breaker.allow_request()
+
+
+def test_stale_page_is_served_while_upstream_fails():
+    async def scenario():
+        parser = FakeParser({1: make_page([1, 2], 1, 2)}, cache_ttl=0.05, breaker=CircuitBreaker(failure_threshold=1, recovery_timeout=60))
+        vacancies, _, _, stale = await parser.get_vacancies_with_fallback("", 1)
+        assert [v.id for v in vacancies] == [1, 2] and not stale
+
+        await asyncio.sleep(0.06)
+        parser.pages[1] = PageResult(None, 0, 0, status=503)
+        vacancies, _, _, stale = await parser.get_vacancies_with_fallback("", 1)
+        assert [v.id for v in vacancies] == [1, 2] and stale
+        assert parser.breaker.is_open
+
+        # Zanjir ochiq - upstream'ga so'rov yuborilmaydi
+        vacancies, _, _, stale = await parser.get_vacancies_with_fallback("", 1)
+        assert [v.id for v in vacancies] == [1, 2] and stale
+        assert parser.requests[1] == 2
+        assert parser.stale_served == 2
+
+    asyncio.run(scenario())
+
+
+def test_304_without_validator_and_404_are_not_breaker_failures():
+    async def scenario():
+        parser = FakeParser(
+            {1: PageResult(None, 0, 0, status=304), 2: PageResult(None, 0, 0, status=404)},
+            breaker=CircuitBreaker(failure_threshold=1)
+        )
+        for page in (1, 2, 1):
+            assert (await parser.fetch_page("", page)).vacancies is None
+        assert parser.breaker.state == CircuitBreaker.CLOSED
+        assert parser.breaker.failures == 0
+
+        parser.pages[1] = PageResult(None, 0, 0, status=500)
+        await parser.fetch_page("", 1)
+        assert parser.breaker.state == CircuitBreaker.OPEN
+
+    asyncio.run(scenario())
+
+
+def test_fetch_all_stops_at_404_when_feed_shrinks():
+    async def scenario():
+        parser = FakeParser({1: make_page([1, 2], 3, 6), 2: make_page([3, 4], 3, 6), 3: PageResult(None, 0, 0, status=404)})
+        results = [result async for result in parser.fetch_all(retries=0)]
+        assert [[v.id for v in result.vacancies] for result in results] == [[1, 2], [3, 4]]
+        assert parser.requests[3] == 1
+
+    asyncio.run(scenario())
+
+
+def test_sync_after_feed_shrinks_removes_missing_vacancies():
+    async def scenario():
+        parser = FakeParser({1: make_page([1, 2], 3, 6), 2: make_page([3, 4], 3, 6), 3: make_page([5, 6], 3, 6)})
+        synchronizer = VacancySynchronizer(parser)
+        assert (await synchronizer.sync_once()).total_items == 6
+
+        # 1-2 sahifalar o'zgarmagan, lekin 3-sahifa yo'qoldi
+        parser.pages[1] = make_page([1, 2], 3, 6, not_modified=True)
+        parser.pages[2] = make_page([3, 4], 3, 6, not_modified=True)
+        parser.pages[3] = PageResult(None, 0, 0, status=404)
+        snapshot = await synchronizer.sync_once()
+        assert snapshot is not None and list(snapshot.by_id) == [1, 2, 3, 4]
+        assert synchronizer.last_delta.removed == {5, 6}
+        assert parser.breaker.failures == 0
+
+    asyncio.run(scenario())
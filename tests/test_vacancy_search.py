@@ -0,0 +1,87 @@
+import pytest
+
+from vacancy_parser import Vacancy
+from vacancy_search import VacancySearchIndex, normalize_text, tokenize
+from vacancy_store import VacancySnapshot
+
+VACANCIES = [
+    Vacancy(id=1, position="Dasturchi", department="IT bo'limi"),
+    Vacancy(id=2, position="Bosh hisobchi", department="Moliya"),
+    Vacancy(id=3, position="Hisobchi yordamchisi", requirement="Dasturlash asoslari"),
+    Vacancy(id=4, position="O‘qituvchi", department="Maktab"),
+    Vacancy(id=5, position="Dastur ta'minoti muhandisi"),
+]
+
+
+@pytest.fixture
+def index():
+    index = VacancySearchIndex()
+    index.rebuild(VacancySnapshot(VACANCIES))
+    return index
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("O'qituvchi", "oqituvchi"),
+    ("Oʻqituvchi", "oqituvchi"),
+    ("Oʼqituvchi", "oqituvchi"),
+    ("O`qituvchi", "oqituvchi"),
+    ("O’qituvchi", "oqituvchi"),
+    ("O‘qituvchi", "oqituvchi"),
+    ("G‘ALLA", "galla"),
+])
+def test_normalize_drops_apostrophe_variants(text, expected):
+    assert normalize_text(text) == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Ўқитувчи", "oqituvchi"),
+    ("Дастурчи", "dasturchi"),
+    ("Ҳисобчи", "hisobchi"),
+    ("Ғалла", "galla"),
+    ("Шофёр", "shofyor"),
+    ("Юрист", "yurist"),
+    ("Объект", "obekt"),
+])
+def test_normalize_folds_cyrillic_to_latin(text, expected):
+    assert normalize_text(text) == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    (None, []),
+    ("", []),
+    ("Bosh hisobchi, 1C", ["bosh", "hisobchi", "1c"]),
+    ("IT bo'limi", ["it", "bolimi"]),
+    ("Бош ҳисобчи", ["bosh", "hisobchi"]),
+    (42, ["42"]),
+])
+def test_tokenize(text, expected):
+    assert tokenize(text) == expected
+
+
+@pytest.mark.parametrize("query, expected", [
+    # Aniq moslik prefiks moslikdan, lavozim talablardan yuqori turadi
+    ("dastur", [5, 1, 3]),
+    ("dasturchi", [1]),
+    # Ballar teng bo'lsa, snapshotdagi tartib saqlanadi
+    ("hisobchi", [2, 3]),
+    ("hisob", [2, 3]),
+    ("bosh hisob", [2]),
+    ("hisob dastur", [3]),
+    ("o'qituvchi", [4]),
+    ("oʻqituvchi", [4]),
+    ("ўқитувчи", [4]),
+    ("ДАСТУРЧИ", [1]),
+    ("d", []),
+    ("", []),
+    ("haydovchi", []),
+    ("bosh haydovchi", []),
+])
+def test_search_matches_and_ranking(index, query, expected):
+    assert index.search(query) == expected
+
+
+def test_search_limit_and_removal(index):
+    assert index.search("dastur", limit=2) == [5, 1]
+    index.remove(5)
+    assert index.search("dastur") == [1, 3]
+    assert index.search("muhandis") == []
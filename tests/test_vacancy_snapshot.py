@@ -0,0 +1,91 @@
+import struct
+
+import pytest
+
+from vacancy_parser import Vacancy
+from vacancy_snapshot import (
+    SNAPSHOT_FORMAT_VERSION, SnapshotFormatError, decode_snapshot, encode_snapshot, read_snapshot, write_snapshot
+)
+from vacancy_store import VacancySnapshot
+
+VACANCIES = [
+    Vacancy(
+        1, "Oʻqituvchi (informatika)", "Axborot texnologiyalari bo‘limi", "5 000 000 so'm", "2 yil",
+        "To'liq stavka", "Oliy maʼlumot, Python", "2025-05-01", "2025-06-01"
+    ),
+    Vacancy(2, "Бухгалтер", department="Moliya bo‘limi"),  # qolgan maydonlar None
+    Vacancy("abc-3", "Laborant"),
+    Vacancy(None, "Id'siz vakansiya"),
+    Vacancy(1 << 70, "Katta id"),  # int64'ga sig'maydi - satr sifatida saqlanadi
+]
+POSTINGS = {"oqituvchi": {1: 1.0}, "bo'lim": {1: 0.5, 2: 0.5}, "laborant": {"abc-3": 2.0}, "yoq": {999: 1.0}}
+
+
+def make_snapshot(vacancies=VACANCIES) -> VacancySnapshot:
+    snapshot = VacancySnapshot(list(vacancies), items_per_page=7, version=42)
+    snapshot.created_at = 1700000000.25
+    return snapshot
+
+
+def test_round_trip_keeps_vacancies_and_postings():
+    snapshot, postings = decode_snapshot(encode_snapshot(make_snapshot(), POSTINGS))
+
+    assert snapshot.vacancies[:4] == VACANCIES[:4]
+    assert snapshot.vacancies[4].id == str(1 << 70)
+    assert (snapshot.version, snapshot.items_per_page, snapshot.created_at) == (42, 7, 1700000000.25)
+    assert snapshot.vacancies[1].salary is None and snapshot.vacancies[1].end_time is None
+    # Snapshot'da yo'q vakansiyaga ishora qiluvchi token tashlab yuboriladi
+    assert postings == {"oqituvchi": {1: 1.0}, "bo'lim": {1: 0.5, 2: 0.5}, "laborant": {"abc-3": 2.0}}
+
+
+def test_round_trip_of_empty_snapshot():
+    snapshot, postings = decode_snapshot(encode_snapshot(make_snapshot([])))
+
+    assert snapshot.vacancies == []
+    assert snapshot.total_pages == 0
+    assert postings == {}
+
+
+def test_read_snapshot_through_mmap(tmp_path):
+    path = str(tmp_path / "vacancies.bin")
+    write_snapshot(path, encode_snapshot(make_snapshot(), POSTINGS))
+
+    snapshot, postings, mtime = read_snapshot(path)
+
+    assert snapshot.vacancies[:4] == VACANCIES[:4]
+    assert postings["laborant"] == {"abc-3": 2.0}
+    assert mtime > 0
+    assert list(tmp_path.iterdir()) == [tmp_path / "vacancies.bin"]  # vaqtinchalik fayl qolmaydi
+
+
+def corrupt(data: bytes, position: int) -> bytes:
+    return data[:position] + bytes([data[position] ^ 0xFF]) + data[position + 1:]
+
+
+def with_format_version(data: bytes, version: int) -> bytes:
+    return data[:8] + struct.pack("<H", version) + data[10:]
+
+
+@pytest.mark.parametrize("mangle, message", [
+    (lambda data: data[:20], "truncated"),
+    (lambda data: data[:-5], "checksum"),
+    (lambda data: corrupt(data, len(data) - 10), "checksum"),
+    (lambda data: b"NOTASNAP" + data[8:], "not a vacancy snapshot"),
+    (lambda data: with_format_version(data, SNAPSHOT_FORMAT_VERSION + 1), "unsupported snapshot format"),
+    (lambda data: b"", "truncated"),
+    (lambda data: data[:28] + struct.pack("<I", 1000) + data[32:], "corrupted"),  # sarlavhadagi soni noto'g'ri, CRC to'g'ri
+])
+def test_damaged_data_is_rejected(mangle, message):
+    data = encode_snapshot(make_snapshot(), POSTINGS)
+
+    with pytest.raises(SnapshotFormatError, match=message):
+        decode_snapshot(mangle(data))
+
+
+def test_truncated_file_is_rejected_and_closed(tmp_path):
+    path = tmp_path / "vacancies.bin"
+    path.write_bytes(encode_snapshot(make_snapshot(), POSTINGS)[:-1])
+
+    with pytest.raises(SnapshotFormatError):
+        read_snapshot(str(path))
+    path.unlink()  # mmap yopilgan bo'lishi kerak
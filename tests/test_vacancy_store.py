@@ -0,0 +1,117 @@
+import asyncio
+import hashlib
+import json
+
+import pytest
+from aiohttp import web
+
+from vacancy_parser import Vacancy, VacancyParser
+from vacancy_store import VacancySnapshot, VacancySynchronizer, compute_delta
+
+PAGE_SIZE = 2
+
+
+def snapshot(*vacancies: Vacancy) -> VacancySnapshot:
+    return VacancySnapshot(list(vacancies), items_per_page=PAGE_SIZE)
+
+
+@pytest.mark.parametrize("previous, current, modified_ids, expected", [
+    (None, snapshot(Vacancy(1), Vacancy(2)), set(), ({1, 2}, set(), set())),
+    (snapshot(Vacancy(1), Vacancy(2)), snapshot(Vacancy(2), Vacancy(3)), {3}, ({3}, set(), {1})),
+    (snapshot(Vacancy(1, salary="5 mln")), snapshot(Vacancy(1, salary="6 mln")), {1}, (set(), {1}, set())),
+    # O'zgarmagan sahifadagi vakansiyalar solishtirilmaydi
+    (snapshot(Vacancy(1, salary="5 mln")), snapshot(Vacancy(1, salary="6 mln")), set(), (set(), set(), set())),
+    (snapshot(Vacancy(1), Vacancy(2)), snapshot(Vacancy(1), Vacancy(2)), {1, 2}, (set(), set(), set())),
+])
+def test_compute_delta(previous, current, modified_ids, expected):
+    delta = compute_delta(previous, current, modified_ids)
+    assert (delta.added, delta.changed, delta.removed) == expected
+    assert bool(delta) == any(expected)
+
+
+class FeedServer:
+    """Paged vacancy API; with etags=True it answers If-None-Match with 304, otherwise sends no validators."""
+
+    def __init__(self, vacancies: list[dict], etags: bool):
+        self.vacancies = vacancies
+        self.etags = etags
+        self.statuses: list[int] = []
+
+    async def handle(self, request: web.Request) -> web.Response:
+        page = int(request.query.get("page", 1))
+        start = (page - 1) * PAGE_SIZE
+        body = json.dumps({"count": len(self.vacancies), "results": self.vacancies[start:start + PAGE_SIZE]}).encode("utf-8")
+        headers = {}
+        if self.etags:
+            headers["ETag"] = '"' + hashlib.md5(body).hexdigest() + '"'
+            if request.headers.get("If-None-Match") == headers["ETag"]:
+                self.statuses.append(304)
+                return web.Response(status=304, headers=headers)
+        self.statuses.append(200)
+        return web.Response(body=body, content_type="application/json", headers=headers)
+
+
+def run_with_server(etags: bool, scenario):
+    async def main():
+        server = FeedServer([{"id": i, "position": f"Vakansiya {i}"} for i in range(1, 7)], etags)
+        app = web.Application()
+        app.router.add_get("/", server.handle)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = runner.addresses[0][1]
+        parser = VacancyParser(f"http://127.0.0.1:{port}/")
+        synchronizer = VacancySynchronizer(parser)
+        try:
+            await scenario(server, parser, synchronizer)
+        finally:
+            await parser.close()
+            await runner.cleanup()
+
+    asyncio.run(main())
+
+
+@pytest.mark.parametrize("etags", [True, False])
+def test_unchanged_feed_keeps_snapshot(etags):
+    async def scenario(server, parser, synchronizer):
+        changes, syncs = [], []
+        synchronizer.add_listener(lambda snapshot, delta: changes.append(delta))
+        synchronizer.add_sync_listener(syncs.append)
+
+        first = await synchronizer.sync_once()
+        assert first.version == 1 and first.total_items == 6
+        assert changes[0].added == {1, 2, 3, 4, 5, 6}
+
+        server.statuses.clear()
+        assert await synchronizer.sync_once() is first
+        assert not synchronizer.last_delta
+        assert len(changes) == 1 and syncs == [first, first]
+        if etags:
+            # Validatorlar yuborildi - server body'siz 304 qaytardi
+            assert server.statuses == [304, 304, 304] and parser.not_modified_count == 3
+        else:
+            # Validator yo'q - body keldi, lekin hash bir xil
+            assert server.statuses == [200, 200, 200] and parser.unchanged_hash_count == 3
+
+    run_with_server(etags, scenario)
+
+
+def test_changed_feed_reports_delta():
+    async def scenario(server, parser, synchronizer):
+        changes = []
+        synchronizer.add_listener(lambda snapshot, delta: changes.append(delta))
+        await synchronizer.sync_once()
+
+        server.vacancies[2] = {"id": 3, "position": "Bosh dasturchi"}  # 2-sahifa
+        del server.vacancies[4]  # 5 olib tashlandi, 6 3-sahifaga siljiydi
+        server.vacancies.append({"id": 7, "position": "Yangi vakansiya"})
+        current = await synchronizer.sync_once()
+
+        assert current.version == 2
+        assert [v.id for v in current.vacancies] == [1, 2, 3, 4, 6, 7]
+        delta = changes[-1]
+        assert (delta.added, delta.changed, delta.removed) == ({7}, {3}, {5})
+        assert current.get(3).position == "Bosh dasturchi"
+
+    run_with_server(True, scenario)
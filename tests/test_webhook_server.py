@@ -0,0 +1,55 @@
+import asyncio
+import os
+import signal
+
+import pytest
+from aiogram import Dispatcher
+
+from webhook_server import run_webhook
+
+
+@pytest.mark.parametrize("webhook_url", ["", "/webhook", "bot.example.uz", "http://bot.example.uz", "https://"])
+def test_webhook_url_must_be_absolute_https(webhook_url):
+    with pytest.raises(RuntimeError, match="WEBHOOK_URL"):
+        asyncio.run(run_webhook(None, None, webhook_url=webhook_url, path="/webhook", secret_token="secret"))
+
+
+class FakeSession:
+    closed = False
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeBot:
+    id = 1
+
+    def __init__(self):
+        self.session = FakeSession()
+        self.webhooks = []
+
+    async def set_webhook(self, **kwargs):
+        self.webhooks.append(kwargs)
+
+
+def test_sigterm_runs_shutdown_hooks():
+    dispatcher = Dispatcher()
+    bot = FakeBot()
+    events = []
+    dispatcher.startup.register(lambda: events.append("startup"))
+    dispatcher.shutdown.register(lambda: events.append("shutdown"))
+
+    async def scenario():
+        server = asyncio.create_task(run_webhook(
+            dispatcher, bot, webhook_url="https://bot.example.uz", path="/webhook",
+            secret_token="secret", host="127.0.0.1", port=0
+        ))
+        while "startup" not in events:
+            await asyncio.sleep(0.01)
+        os.kill(os.getpid(), signal.SIGTERM)
+        await asyncio.wait_for(server, timeout=5)
+
+    asyncio.run(scenario())
+    assert events == ["startup", "shutdown"]
+    assert bot.webhooks[0]["url"] == "https://bot.example.uz/webhook"
+    assert bot.session.closed
@@ -0,0 +1,259 @@
+import codecs
+import json
+import logging
+import re
+from typing import Any, AsyncIterator, Callable
+
+try:
+    import orjson
+except ImportError:  # orjson ixtiyoriy: o'rnatilmagan bo'lsa standart json ishlatiladi
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # msgspec ixtiyoriy
+    msgspec = None
+
+DECODER_AUTO = "auto"
+DECODER_MSGSPEC = "msgspec"
+DECODER_ORJSON = "orjson"
+DECODER_JSON = "json"
+STREAM_CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_NUMBER_CHARS = re.compile(r"[-+0-9.eE]*")
+# Butun satr (escape'lari bilan) yoki qavs; satr bufer oxirida tugamasa, 1-guruh bo'sh qoladi
+_VALUE_TOKEN = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*("?)|[\[\]{}]', re.DOTALL)
+_STRING_REST = re.compile(r'[^"\\]*(?:\\.[^"\\]*)*("?)', re.DOTALL)
+_raw_decoder = json.JSONDecoder()
+
+
+class JsonDecoder:
+    """
+    Standard library backend. decode() returns the page in the API's shape; vacancy items are either
+    dicts (built into records by the parser) or, for typed backends, records already.
+    All backends raise ValueError for malformed input.
+    """
+
+    name = DECODER_JSON
+
+    def __init__(self, record_type: type):
+        self.record_type = record_type
+
+    def decode(self, body: bytes) -> Any:
+        return json.loads(body)
+
+
+class OrjsonDecoder(JsonDecoder):
+    name = DECODER_ORJSON
+
+    def decode(self, body: bytes) -> Any:
+        return orjson.loads(body)
+
+
+class MsgspecDecoder(JsonDecoder):
+    """
+    Decodes {"count": ..., "results": [...]} straight into record instances in one pass.
+    Payloads that do not fit the typed schema (a bare list, a number where text is expected, ...)
+    are decoded generically, so the parser's own validation still applies.
+    """
+
+    name = DECODER_MSGSPEC
+
+    def __init__(self, record_type: type):
+        super().__init__(record_type)
+        page_type = msgspec.defstruct("VacancyPage", [("count", Any), ("results", list[record_type])])
+        self._typed = msgspec.json.Decoder(page_type)
+        self._generic = msgspec.json.Decoder()
+        self.fallbacks = 0
+
+    def decode(self, body: bytes) -> Any:
+        try:
+            page = self._typed.decode(body)
+        except msgspec.ValidationError:
+            self.fallbacks += 1
+            return self._generic.decode(body)
+        return {"count": page.count, "results": page.results}
+
+
+_DECODERS = {
+    DECODER_MSGSPEC: (MsgspecDecoder, lambda: msgspec is not None),
+    DECODER_ORJSON: (OrjsonDecoder, lambda: orjson is not None),
+    DECODER_JSON: (JsonDecoder, lambda: True),
+}
+
+
+def create_decoder(name: str = DECODER_AUTO, record_type: type = dict) -> JsonDecoder:
+    """
+    Returns the requested backend; "auto" picks the fastest installed one (msgspec, orjson, json).
+    A named backend that is not installed falls back to "auto" with a warning.
+    """
+    name = (name or DECODER_AUTO).lower()
+    if name != DECODER_AUTO:
+        if name not in _DECODERS:
+            raise ValueError(f"Unknown JSON decoder {name!r}, expected one of: auto, {', '.join(_DECODERS)}")
+        decoder_class, available = _DECODERS[name]
+        if available():
+            return decoder_class(record_type)
+        logging.warning("%s package is not installed, choosing the JSON decoder automatically.", name)
+    for decoder_class, available in _DECODERS.values():
+        if available():
+            return decoder_class(record_type)
+    return JsonDecoder(record_type)
+
+
+def _scan_value_end(buffer: str, index: int, depth: int, in_string: bool) -> tuple[int, int, bool, bool]:
+    """
+    Scans a JSON container or string onwards from index, given the nesting state reached so far.
+    Returns (index, depth, in_string, complete): index is just past the value when complete,
+    otherwise the point to resume from once more text has arrived.
+    """
+    while True:
+        if in_string:
+            match = _STRING_REST.match(buffer, index)
+            char = '"'
+        else:
+            match = _VALUE_TOKEN.search(buffer, index)
+            if match is None:
+                return len(buffer), depth, False, False
+            char = buffer[match.start()]
+        index = match.end()
+        if char == '"':
+            if not match.group(1):
+                # Satr hali tugamagan (bo'lingan escape ham moslikka kirmaydi) - shu joydan davom etiladi
+                return index, depth, True, False
+            in_string = False
+        elif char in "[{":
+            depth += 1
+            continue
+        else:
+            depth -= 1
+        if depth == 0:
+            return index, depth, False, True
+
+
+class StreamingPageDecoder:
+    """
+    Incremental parser for large responses: reads the body chunk by chunk and turns every element
+    of the top-level "results" array (or of a bare top-level array) into a record as soon as it is
+    complete. Only the current chunk and the records are kept in memory, never the whole body and
+    its full dict tree. Other values are decoded whole.
+    """
+
+    def __init__(self, chunks: AsyncIterator[bytes], build_item: Callable[[dict], Any], on_chunk: Callable[[bytes], None] | None = None):
+        self._chunks = chunks
+        self._build_item = build_item
+        self._on_chunk = on_chunk  # masalan, butun javob hashini hisoblash uchun
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._position = 0
+        self._eof = False
+        self.bytes_read = 0
+
+    async def _fill(self) -> bool:
+        """Appends the next chunk to the buffer (dropping the consumed prefix); False at end of body."""
+        if self._eof:
+            return False
+        try:
+            chunk = await self._chunks.__anext__()
+        except StopAsyncIteration:
+            self._eof = True
+            tail = self._text.decode(b"", final=True)
+            if tail:
+                self._buffer += tail
+            return False
+        self.bytes_read += len(chunk)
+        if self._on_chunk is not None:
+            self._on_chunk(chunk)
+        self._buffer = self._buffer[self._position:] + self._text.decode(chunk)
+        self._position = 0
+        return True
+
+    async def _peek(self) -> str:
+        """Skips whitespace and returns the next character ("" at end of body)."""
+        while True:
+            self._position = _WHITESPACE.match(self._buffer, self._position).end()
+            if self._position < len(self._buffer):
+                return self._buffer[self._position]
+            if not await self._fill():
+                return ""
+
+    async def _expect(self, allowed: str) -> str:
+        char = await self._peek()
+        if not char or char not in allowed:
+            raise ValueError(f"Expected one of {allowed!r} at byte ~{self.bytes_read}, got {char!r}")
+        self._position += 1
+        return char
+
+    async def _value(self) -> Any:
+        first = await self._peek()
+        if first and first in '{["':
+            # Odatda qiymat buferda to'liq yoki keyingi bo'lakda tugaydi - shunda raw_decode'ning o'zi yetarli
+            for _ in range(2):
+                try:
+                    value, self._position = _raw_decoder.raw_decode(self._buffer, self._position)
+                    return value
+                except json.JSONDecodeError:
+                    if not await self._fill():
+                        raise
+            # Uzun qiymat: har bo'lakda faqat yangi kelgan matn skanerlanadi,
+            # raw_decode esa qiymat oxiri kelgandan keyin bir marta chaqiriladi
+            offset, depth, in_string = 0, 0, False
+            while True:
+                index, depth, in_string, complete = _scan_value_end(self._buffer, self._position + offset, depth, in_string)
+                if complete:
+                    value, end = _raw_decoder.raw_decode(self._buffer, self._position)
+                    self._position = end
+                    return value
+                offset = index - self._position
+                if not await self._fill():
+                    raise ValueError(f"Unexpected end of body inside a JSON value at byte ~{self.bytes_read}")
+        while True:
+            try:
+                value, end = _raw_decoder.raw_decode(self._buffer, self._position)
+            except json.JSONDecodeError:
+                if self._eof:
+                    raise
+            else:
+                # Bufer oxirida tugagan son ("12", "12.") keyingi bo'lakda davom etishi mumkin
+                if self._eof or type(value) not in (int, float) or _NUMBER_CHARS.match(self._buffer, end).end() < len(self._buffer):
+                    self._position = end
+                    return value
+            await self._fill()
+
+    async def _array(self) -> list:
+        await self._expect("[")
+        items = []
+        if await self._peek() == "]":
+            self._position += 1
+            return items
+        while True:
+            item = await self._value()
+            items.append(self._build_item(item) if isinstance(item, dict) else item)
+            if await self._expect(",]") == "]":
+                return items
+
+    async def decode(self) -> Any:
+        first = await self._peek()
+        if first == "[":
+            data = await self._array()
+        elif first == "{":
+            self._position += 1
+            data = {}
+            if await self._peek() == "}":
+                self._position += 1
+            else:
+                while True:
+                    key = await self._value()
+                    await self._expect(":")
+                    if key == "results" and await self._peek() == "[":
+                        data[key] = await self._array()
+                    else:
+                        data[key] = await self._value()
+                    if await self._expect(",}") == "}":
+                        break
+        else:
+            data = await self._value()
+        if await self._peek():
+            raise ValueError(f"Extra data after the JSON document at byte ~{self.bytes_read}")
+        return data
@@ -1,21 +1,516 @@
 import aiohttp
-import json
+import asyncio
+import hashlib
 import logging
 import math 
+import random
+import sys
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import NamedTuple
+
+from metrics import UPSTREAM_DURATION
+from vacancy_decoder import DECODER_AUTO, STREAM_CHUNK_SIZE, StreamingPageDecoder, create_decoder
 
 DEFAULT_ITEMS_PER_PAGE = 10 
+DEFAULT_CACHE_TTL = 60.0  # sekund
+DEFAULT_CACHE_MAX_SIZE = 256  # (query, page) juftliklari soni
+DEFAULT_VALIDATOR_MAX_SIZE = 1024  # ETag/Last-Modified/hash saqlanadigan sahifalar soni
+DEFAULT_KNOWN_VACANCIES_MAX_SIZE = 10000  # id bo'yicha saqlanadigan Vacancy obyektlari soni
+DEFAULT_FETCH_CONCURRENCY = 4  # fetch_all() bir vaqtda yuboradigan so'rovlar soni
+DEFAULT_FETCH_RETRIES = 3
+RETRY_BASE_DELAY = 0.5  # sekund, har urinishda ikki barobar oshadi
+RETRY_MAX_DELAY = 30.0
+DEFAULT_STALE_TTL = 24 * 3600.0  # sekund; muddati o'tgan sahifa shuncha vaqt zaxira sifatida saqlanadi
+STALE_REVALIDATE_WAIT = 1.5  # sekund; eskirgan sahifa bo'lsa yangisini shuncha kutamiz, keyin eskisini beramiz
+DEFAULT_BREAKER_FAILURE_THRESHOLD = 5  # ketma-ket xatolar soni, shundan keyin zanjir ochiladi
+DEFAULT_BREAKER_RECOVERY_TIMEOUT = 30.0  # sekund; ochiq holatdan keyin sinov so'rovi yuboriladi
+STATUS_CIRCUIT_OPEN = -1  # PageResult.status: so'rov yuborilmadi, zanjir ochiq
+DEFAULT_PREFETCH_BUDGET = 8  # bir vaqtda oldindan yuklanayotgan sahifalar soni (barcha foydalanuvchilar uchun)
+MAX_PREFETCH_OWNERS = 10000
+
+
+class ConnectionSettings:
+    """Connection pool and timeout settings for the parser's aiohttp session."""
+
+    __slots__ = (
+        "pool_size", "pool_size_per_host", "keepalive_timeout", "dns_cache_ttl",
+        "connect_timeout", "read_timeout", "total_timeout"
+    )
+
+    def __init__(
+        self,
+        pool_size: int = 100,
+        pool_size_per_host: int = 20,
+        keepalive_timeout: float = 60.0,
+        dns_cache_ttl: int = 300,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 10.0,
+        total_timeout: float = 20.0
+    ):
+        self.pool_size = pool_size
+        self.pool_size_per_host = pool_size_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_cache_ttl = dns_cache_ttl
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.total_timeout = total_timeout
+
+    def create_connector(self) -> aiohttp.TCPConnector:
+        # Ulanishlar pool'da saqlanadi va qayta ishlatiladi: har so'rovda yangi TCP/TLS handshake bo'lmaydi
+        return aiohttp.TCPConnector(
+            limit=self.pool_size,
+            limit_per_host=self.pool_size_per_host,
+            keepalive_timeout=self.keepalive_timeout,
+            ttl_dns_cache=self.dns_cache_ttl,
+            use_dns_cache=self.dns_cache_ttl > 0,
+            enable_cleanup_closed=True
+        )
+
+    def create_timeout(self) -> aiohttp.ClientTimeout:
+        return aiohttp.ClientTimeout(
+            total=self.total_timeout,
+            sock_connect=self.connect_timeout,
+            sock_read=self.read_timeout
+        )
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={getattr(self, name)}" for name in self.__slots__)
+        return f"ConnectionSettings({fields})"
+
+
+class ConnectionStats:
+    """Counters fed by aiohttp tracing signals: new vs reused connections, DNS cache hits, timeouts."""
+
+    def __init__(self):
+        self.requests = 0
+        self.connections_created = 0
+        self.connections_reused = 0
+        self.dns_cache_hits = 0
+        self.dns_cache_misses = 0
+        self.timeouts = 0
+
+    def trace_config(self) -> aiohttp.TraceConfig:
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_request_start.append(self._on_request_start)
+        trace_config.on_connection_create_end.append(self._on_connection_create_end)
+        trace_config.on_connection_reuseconn.append(self._on_connection_reuseconn)
+        trace_config.on_dns_cache_hit.append(self._on_dns_cache_hit)
+        trace_config.on_dns_cache_miss.append(self._on_dns_cache_miss)
+        return trace_config
+
+    async def _on_request_start(self, session, context, params):
+        self.requests += 1
+
+    async def _on_connection_create_end(self, session, context, params):
+        self.connections_created += 1
+
+    async def _on_connection_reuseconn(self, session, context, params):
+        self.connections_reused += 1
+
+    async def _on_dns_cache_hit(self, session, context, params):
+        self.dns_cache_hits += 1
+
+    async def _on_dns_cache_miss(self, session, context, params):
+        self.dns_cache_misses += 1
+
+    def as_dict(self) -> dict:
+        connections = self.connections_created + self.connections_reused
+        return {
+            "requests": self.requests,
+            "connections_created": self.connections_created,
+            "connections_reused": self.connections_reused,
+            "reuse_ratio": round(self.connections_reused / connections, 4) if connections else 0.0,
+            "dns_cache_hits": self.dns_cache_hits,
+            "dns_cache_misses": self.dns_cache_misses,
+            "timeouts": self.timeouts,
+        }
+
+
+def _text(value) -> str | None:
+    if value is None:
+        return None
+    return value if isinstance(value, str) else str(value)
+
+
+def _interned_text(value) -> str | None:
+    # Bo'lim, ish jadvali kabi qiymatlar ko'p vakansiyalarda bir xil - bitta nusxada saqlanadi
+    value = _text(value)
+    return sys.intern(value) if value is not None else None
+
+
+@dataclass(frozen=True, slots=True)
+class Vacancy:
+    """One vacancy parsed from the API response. Immutable, so instances are shared between pages, snapshots and users."""
+
+    id: int | str | None
+    position: str | None = None
+    department: str | None = None
+    salary: str | None = None
+    experience: str | None = None
+    work_schedule: str | None = None
+    requirement: str | None = None
+    opening_time: str | None = None
+    end_time: str | None = None
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Vacancy":
+        return cls(
+            id=data.get('id'),
+            position=_text(data.get('position')),
+            department=_interned_text(data.get('department')),
+            salary=_interned_text(data.get('salary')),
+            experience=_interned_text(data.get('experience')),
+            work_schedule=_interned_text(data.get('work_schedule')),
+            requirement=_text(data.get('requirement')),
+            opening_time=_interned_text(data.get('opening_time')),
+            end_time=_interned_text(data.get('end_time')),
+        )
+
+    def interned(self) -> "Vacancy":
+        """Same vacancy with the repeated fields interned, as from_dict does (for records decoded by msgspec)."""
+        return Vacancy(
+            self.id, self.position, _interned_text(self.department), _interned_text(self.salary),
+            _interned_text(self.experience), _interned_text(self.work_schedule), self.requirement,
+            _interned_text(self.opening_time), _interned_text(self.end_time)
+        )
+
+
+class PageResult(NamedTuple):
+    vacancies: list | None
+    total_pages: int
+    total_items: int
+    not_modified: bool = False
+    status: int = 0  # HTTP status, 0 - tarmoq xatosi
+    retry_after: float | None = None
+
+    @property
+    def retryable(self) -> bool:
+        """True for network errors, 429 and 5xx responses."""
+        return self.vacancies is None and (self.status == 0 or self.status == 429 or self.status >= 500)
+
+
+class PageValidator:
+    """Cache validators (ETag, Last-Modified, body hash) and the parsed result of the last 200 response."""
+
+    __slots__ = ("etag", "last_modified", "content_hash", "result")
+
+    def __init__(self, etag: str | None, last_modified: str | None, content_hash: str, result: tuple):
+        self.etag = etag
+        self.last_modified = last_modified
+        self.content_hash = content_hash
+        self.result = result
+
+
+class AdaptiveRateLimiter:
+    """
+    Concurrency limiter for upstream requests (AIMD): the allowed number of in-flight requests
+    is halved on 429/5xx and grows back by one per "window" of successful responses.
+    """
+
+    def __init__(self, max_concurrency: int = DEFAULT_FETCH_CONCURRENCY, min_concurrency: int = 1):
+        self.max_concurrency = max(1, max_concurrency)
+        self.min_concurrency = max(1, min(min_concurrency, self.max_concurrency))
+        self.limit = float(self.max_concurrency)
+        self.throttled = 0
+        self._in_flight = 0
+        self._pause_until = 0.0
+        self._condition = asyncio.Condition()
+
+    async def acquire(self):
+        async with self._condition:
+            await self._condition.wait_for(lambda: self._in_flight < int(self.limit))
+            self._in_flight += 1
+        pause = self._pause_until - time.monotonic()
+        if pause > 0:
+            await asyncio.sleep(pause)
+
+    async def release(self):
+        async with self._condition:
+            self._in_flight -= 1
+            self._condition.notify_all()
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.release()
+
+    def on_success(self):
+        self.limit = min(float(self.max_concurrency), self.limit + 1 / self.limit)
+
+    def on_throttle(self, retry_after: float | None = None):
+        self.throttled += 1
+        self.limit = max(float(self.min_concurrency), self.limit / 2)
+        if retry_after:
+            self._pause_until = max(self._pause_until, time.monotonic() + min(retry_after, RETRY_MAX_DELAY))
+        logging.warning("Upstream throttling detected, concurrency limit lowered to %s.", int(self.limit))
+
+
+class CircuitBreaker:
+    """
+    Closed -> open after `failure_threshold` consecutive upstream failures; while open, requests are
+    rejected without touching the network. After `recovery_timeout` the breaker is half-open and lets
+    one trial request through: success closes it, failure opens it again.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int = DEFAULT_BREAKER_FAILURE_THRESHOLD,
+        recovery_timeout: float = DEFAULT_BREAKER_RECOVERY_TIMEOUT
+    ):
+        self.failure_threshold = max(1, failure_threshold)
+        self.recovery_timeout = recovery_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_started = 0.0
+        self.open_count = 0
+        self.rejected = 0
+
+    @property
+    def is_open(self) -> bool:
+        """True while requests are being rejected (open and the recovery timeout has not passed)."""
+        return self.state == self.OPEN and time.monotonic() - self.opened_at < self.recovery_timeout
+
+    def allow_request(self) -> bool:
+        now = time.monotonic()
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN:
+            if now - self.opened_at < self.recovery_timeout:
+                self.rejected += 1
+                return False
+            self.state = self.HALF_OPEN
+            self._trial_started = 0.0
+            logging.info("Vacancy API circuit half-open, sending a trial request.")
+        # Sinov so'rovi bekor qilinib natijasi kelmasa, recovery_timeout'dan keyin yana biri ruxsat etiladi
+        if self._trial_started and now - self._trial_started < self.recovery_timeout:
+            self.rejected += 1
+            return False
+        self._trial_started = now
+        return True
+
+    def record_success(self):
+        if self.state != self.CLOSED:
+            logging.info("Vacancy API circuit closed, upstream recovered.")
+        self.state = self.CLOSED
+        self.failures = 0
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == self.HALF_OPEN or (self.state == self.CLOSED and self.failures >= self.failure_threshold):
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+            self.open_count += 1
+            logging.warning(
+                "Vacancy API circuit opened after %s consecutive failures, pausing requests for %ss.",
+                self.failures, self.recovery_timeout
+            )
+
+    def stats(self) -> dict:
+        return {
+            "open": int(self.is_open),
+            "half_open": int(self.state == self.HALF_OPEN),
+            "consecutive_failures": self.failures,
+            "opened_total": self.open_count,
+            "rejected_total": self.rejected,
+        }
+
+
+def backoff_delay(attempt: int) -> float:
+    """Exponential backoff with full jitter."""
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt))
+
+
+class PageCache:
+    """
+    TTL + LRU cache for vacancy pages shared by all users, with request coalescing.
+    Expired entries are kept for another `stale_ttl` seconds as a fallback (get_stale) for upstream outages.
+    """
+
+    def __init__(self, ttl: float = DEFAULT_CACHE_TTL, max_size: int = DEFAULT_CACHE_MAX_SIZE, stale_ttl: float = DEFAULT_STALE_TTL):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.stale_ttl = stale_ttl
+        self._entries: OrderedDict[tuple[str, int], tuple[float, tuple]] = OrderedDict()
+        self._inflight: dict[tuple[str, int], asyncio.Task] = {}
+        self._speculative: set[tuple[str, int]] = set()  # hech kim kutmayotgan (prefetch) so'rovlar
+        self._prefetched: set[tuple[str, int]] = set()  # prefetch bilan to'ldirilgan, hali o'qilmagan yozuvlar
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.prefetches = 0
+        self.prefetch_used = 0
+
+    def get(self, key: tuple[str, int]) -> tuple | None:
+        """Returns a fresh cached value or None. Entries past the stale window are dropped."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        now = time.monotonic()
+        if expires_at < now:
+            if expires_at + self.stale_ttl < now:
+                del self._entries[key]
+                self._prefetched.discard(key)
+            return None
+        self._entries.move_to_end(key)
+        if key in self._prefetched:
+            self._prefetched.discard(key)
+            self.prefetch_used += 1
+        return value
+
+    def get_stale(self, key: tuple[str, int]) -> tuple | None:
+        """Returns the last stored value even if expired (within the stale window); no counters, no LRU update."""
+        entry = self._entries.get(key)
+        if entry is None or entry[0] + self.stale_ttl < time.monotonic():
+            return None
+        return entry[1]
+
+    def set(self, key: tuple[str, int], value: tuple, prefetched: bool = False):
+        """Stores a value and evicts least recently used entries over the size bound."""
+        if self.ttl <= 0 or self.max_size <= 0:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        if prefetched:
+            self._prefetched.add(key)
+        else:
+            self._prefetched.discard(key)
+        while len(self._entries) > self.max_size:
+            evicted, _ = self._entries.popitem(last=False)
+            self._prefetched.discard(evicted)
+
+    def clear(self):
+        self._entries.clear()
+        self._prefetched.clear()
+
+    async def get_or_fetch(self, key: tuple[str, int], fetch) -> tuple:
+        """
+        Returns the cached value for key, or calls fetch() once for all concurrent callers.
+        Only successful results (vacancies is not None) are cached.
+        """
+        value = self.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            if key in self._speculative:
+                # Foydalanuvchi oldindan yuklanayotgan sahifani so'radi - endi uni bekor qilib bo'lmaydi
+                self._speculative.discard(key)
+                self.prefetch_used += 1
+        else:
+            self.misses += 1
+            task = asyncio.ensure_future(fetch())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t, k=key: self._on_fetch_done(k, t))
+        # shield: bitta foydalanuvchi handleri bekor qilinsa, boshqalar uchun so'rov davom etadi
+        return await asyncio.shield(task)
+
+    def prefetch(self, key: tuple[str, int], fetch) -> asyncio.Task | None:
+        """
+        Starts fetch() in the background so a later get_or_fetch(key) is a cache hit.
+        Does nothing if the key is already cached or being fetched.
+        """
+        if self.get_fresh(key) or key in self._inflight:
+            return None
+        self.prefetches += 1
+        task = asyncio.ensure_future(fetch())
+        self._inflight[key] = task
+        self._speculative.add(key)
+        task.add_done_callback(lambda t, k=key: self._on_fetch_done(k, t))
+        return task
+
+    def cancel_prefetch(self, key: tuple[str, int], task: asyncio.Task):
+        """Cancels a prefetch started by prefetch(), unless a real request has joined it meanwhile."""
+        if key in self._speculative and self._inflight.get(key) is task:
+            task.cancel()
+
+    @property
+    def speculative_count(self) -> int:
+        return len(self._speculative)
+
+    def get_fresh(self, key: tuple[str, int]) -> bool:
+        """True if key has a fresh entry; unlike get() it does not touch LRU order or counters."""
+        entry = self._entries.get(key)
+        return entry is not None and entry[0] >= time.monotonic()
+
+    def _on_fetch_done(self, key: tuple[str, int], task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        prefetched = key in self._speculative
+        self._speculative.discard(key)
+        if task.cancelled() or task.exception() is not None:
+            return
+        result = task.result()
+        if result and result[0] is not None:
+            self.set(key, result, prefetched=prefetched)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "inflight": len(self._inflight),
+            "prefetches": self.prefetches,
+            "prefetch_used": self.prefetch_used,
+            "hit_ratio": round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0,
+        }
+
 
 class VacancyParser:
-    def __init__(self, api_url):
+    def __init__(
+        self,
+        api_url,
+        cache_ttl: float = DEFAULT_CACHE_TTL,
+        cache_max_size: int = DEFAULT_CACHE_MAX_SIZE,
+        connection_settings: ConnectionSettings | None = None,
+        stale_ttl: float = DEFAULT_STALE_TTL,
+        breaker: CircuitBreaker | None = None,
+        json_decoder: str = DECODER_AUTO,
+        stream_threshold: int = 0
+    ):
         self.api_url = api_url
         self._session: aiohttp.ClientSession | None = None
-        logging.info(f"VacancyParser created for URL: {api_url}")
+        self.connection_settings = connection_settings or ConnectionSettings()
+        self.connection_stats_counters = ConnectionStats()
+        self.cache = PageCache(ttl=cache_ttl, max_size=cache_max_size, stale_ttl=stale_ttl)
+        self.breaker = breaker or CircuitBreaker()
+        self.stale_served = 0
+        self._validators: OrderedDict[tuple[str, int], PageValidator] = OrderedDict()
+        self._known_vacancies: OrderedDict[int | str, Vacancy] = OrderedDict()
+        self.not_modified_count = 0  # 304 javoblar
+        self.unchanged_hash_count = 0  # 200, lekin kontent hash o'zgarmagan
+        self.decoder = create_decoder(json_decoder, Vacancy)
+        self.stream_threshold = stream_threshold  # baytlar; bundan katta (yoki hajmi noma'lum) javoblar bo'laklab o'qiladi, 0 - o'chirilgan
+        self.streamed_count = 0
+        logging.info(
+            "VacancyParser created for URL: %s (cache ttl=%ss, max_size=%s, %s, json decoder=%s)",
+            api_url, cache_ttl, cache_max_size, self.connection_settings, self.decoder.name
+        )
 
     async def _get_session(self) -> aiohttp.ClientSession:
         """Creates or returns the existing aiohttp ClientSession."""
         if self._session is None or self._session.closed:
             logging.info("Creating new aiohttp ClientSession.")
-            self._session = aiohttp.ClientSession()
+            self._session = aiohttp.ClientSession(
+                connector=self.connection_settings.create_connector(),
+                timeout=self.connection_settings.create_timeout(),
+                trace_configs=[self.connection_stats_counters.trace_config()]
+            )
         return self._session
 
     async def close(self):
@@ -25,71 +520,345 @@ class VacancyParser:
             await self._session.close()
             self._session = None 
 
-    async def get_vacancies(self, query: str = "", page: int = 1) -> tuple[list | None, int, int]:
-        
+    def prefetch_vacancies(self, query: str = "", page: int = 1) -> asyncio.Task | None:
+        """Warms the page cache for (query, page) in the background; see PageCache.prefetch."""
+        return self.cache.prefetch((query, page), lambda: self._fetch_vacancies(query, page))
+
+    def cache_stats(self) -> dict:
+        """Returns hit/miss/coalesce counters of the shared page cache."""
+        return {**self.cache.stats(), "stale_served": self.stale_served}
+
+    def get_vacancy(self, vacancy_id) -> Vacancy | None:
+        """Returns a recently parsed vacancy by id (shared store for detail views)."""
+        return self._known_vacancies.get(vacancy_id)
+
+    def _share_vacancy(self, vacancy: Vacancy, decoded: bool = False) -> Vacancy:
+        """
+        Returns the already known identical instance, so unchanged vacancies are stored only once.
+        decoded=True: the record came straight from the typed decoder and is interned before it is kept.
+        """
+        if vacancy.id is None:
+            return vacancy.interned() if decoded else vacancy
+        known = self._known_vacancies.get(vacancy.id)
+        if known == vacancy:
+            self._known_vacancies.move_to_end(vacancy.id)
+            return known
+        if decoded:
+            vacancy = vacancy.interned()
+        self._known_vacancies[vacancy.id] = vacancy
+        self._known_vacancies.move_to_end(vacancy.id)
+        while len(self._known_vacancies) > DEFAULT_KNOWN_VACANCIES_MAX_SIZE:
+            self._known_vacancies.popitem(last=False)
+        return vacancy
+
+    def _build_vacancies(self, items: list) -> list[Vacancy]:
+        # msgspec yozuvlarni to'g'ridan-to'g'ri Vacancy sifatida qaytaradi, boshqa dekoderlar - dict
+        return [
+            self._share_vacancy(item, decoded=True) if isinstance(item, Vacancy) else self._share_vacancy(Vacancy.from_dict(item))
+            for item in items if isinstance(item, (dict, Vacancy))
+        ]
+
+    def connection_stats(self) -> dict:
+        """Returns connection reuse, DNS cache and timeout counters of the HTTP session."""
+        return self.connection_stats_counters.as_dict()
+
+    async def get_vacancies(self, query: str = "", page: int = 1, use_cache: bool = True) -> tuple[list[Vacancy] | None, int, int]:
+        """
+        Returns (vacancies, total_pages, total_items) for the given page.
+        Results are shared between users through the page cache, so the returned list must not be mutated.
+        use_cache=False always goes upstream (used by the background synchroniser).
+        """
+        if not use_cache:
+            return await self._fetch_vacancies(query, page)
+        return await self.cache.get_or_fetch((query, page), lambda: self._fetch_vacancies(query, page))
+
+    async def get_vacancies_with_fallback(self, query: str = "", page: int = 1) -> tuple[list[Vacancy] | None, int, int, bool]:
+        """
+        Like get_vacancies, plus a `stale` flag. When only an expired copy of the page is cached, a refresh
+        is started and awaited for at most STALE_REVALIDATE_WAIT seconds; if it is still running, fails,
+        or the circuit is open, the expired copy is returned with stale=True (the refresh keeps going).
+        """
+        key = (query, page)
+        fallback = self.cache.get_stale(key)
+        if fallback is None or self.cache.get_fresh(key):
+            return (*await self.get_vacancies(query, page), False)
+        if self.breaker.is_open:
+            self.stale_served += 1
+            return (*fallback, True)
+
+        refresh = asyncio.ensure_future(self.get_vacancies(query, page))
+        done, _ = await asyncio.wait({refresh}, timeout=STALE_REVALIDATE_WAIT)
+        if done and not refresh.cancelled() and refresh.exception() is None and refresh.result()[0] is not None:
+            return (*refresh.result(), False)
+        if not done:
+            # Yangilash fonda davom etadi va keshni to'ldiradi
+            refresh.add_done_callback(lambda t: t.cancelled() or t.exception())
+        self.stale_served += 1
+        return (*fallback, True)
+
+    async def _fetch_vacancies(self, query: str = "", page: int = 1) -> tuple[list[Vacancy] | None, int, int]:
+        result = await self.fetch_page(query, page)
+        return result.vacancies, result.total_pages, result.total_items
+
+    async def fetch_page(self, query: str = "", page: int = 1) -> PageResult:
+        """
+        Fetches one page upstream using conditional requests.
+        Sends If-None-Match / If-Modified-Since when the previous response carried validators;
+        on 304, or when the body hash matches the previous one, the stored result is returned with not_modified=True.
+        While the circuit breaker is open no request is sent and status is STATUS_CIRCUIT_OPEN.
+        """
+        if not self.breaker.allow_request():
+            return PageResult(None, 0, 0, status=STATUS_CIRCUIT_OPEN)
+        started = time.perf_counter()
+        result = await self._request_page(query, page)
+        UPSTREAM_DURATION.observe(time.perf_counter() - started, result.status)
+        # 3xx/4xx - server javob berdi (masalan, validatorsiz 304 yoki 404); tarmoq xatosi, 5xx va buzilgan javob - nosozlik
+        if result.vacancies is not None or 300 <= result.status < 500:
+            self.breaker.record_success()
+        else:
+            self.breaker.record_failure()
+        return result
+
+    async def _request_page(self, query: str, page: int) -> PageResult:
         session = await self._get_session()
         params = {'page': str(page)} 
         if query:
              params['query'] = query
 
+        key = (query, page)
+        validator = self._validators.get(key)
+        headers = {}
+        if validator is not None:
+            if validator.etag:
+                headers['If-None-Match'] = validator.etag
+            if validator.last_modified:
+                headers['If-Modified-Since'] = validator.last_modified
+
         try:
-            logging.info(f"Requesting vacancies from {self.api_url} with params: {params}")
-            async with session.get(self.api_url, params=params) as response:
-                logging.info(f"API response status: {response.status}")
+            logging.info("Requesting vacancies from %s with params: %s", self.api_url, params)
+            async with session.get(self.api_url, params=params, headers=headers) as response:
+                logging.info("API response status: %s", response.status)
+                if response.status == 304 and validator is not None:
+                    self.not_modified_count += 1
+                    self._validators.move_to_end(key)
+                    return PageResult(*validator.result, not_modified=True, status=304)
                 if response.status == 200:
+                    if self.stream_threshold > 0 and (response.content_length is None or response.content_length > self.stream_threshold):
+                        return await self._stream_page(response, key, page, validator)
                     try:
-                        data = await response.json() 
-                        logging.debug(f"API raw response data (page {page}): {data}")
-
-                        vacancies = None
-                        total_items = 0
-                        total_pages = 0
-
-                        if isinstance(data, dict) and 'results' in data and isinstance(data['results'], list) and 'count' in data:
-                             vacancies = data['results']
-                             try:
-                                 total_items = int(data.get('count', 0))
-                             except (ValueError, TypeError):
-                                 logging.warning(f"Could not parse 'count' field ({data.get('count')}) as integer.")
-                                 total_items = 0 
-
-                             items_on_this_page = len(vacancies)
-                             items_per_page = items_on_this_page if items_on_this_page > 0 and page == 1 else DEFAULT_ITEMS_PER_PAGE # Simple heuristic
-                             if total_items > 0 and items_per_page > 0:
-                                 total_pages = math.ceil(total_items / items_per_page)
-                             elif total_items == 0:
-                                 total_pages = 0 
-                             else: 
-                                 total_pages = 1 
-
-                             logging.info(f"Parsed {len(vacancies)} vacancies. Total items: {total_items}, Calculated pages: {total_pages} (assuming ~{items_per_page}/page).")
-                             return vacancies, total_pages, total_items
-
-                        elif isinstance(data, list):
-                             vacancies = data
-                             total_items = len(vacancies) 
-                             total_pages = 1 
-                             logging.warning("API returned a list directly. Pagination may not work correctly or show total counts.")
-                             return vacancies, total_pages, total_items
-                        else:
-                             logging.warning(f"API returned unknown JSON structure: {type(data)}")
-                             return None, 0, 0
-
-                    except (aiohttp.ContentTypeError, json.JSONDecodeError) as e:
-                        logging.error(f"Failed to decode API response as JSON: {e}", exc_info=True)
-                        try:
-                            text_data = await response.text()
-                            logging.debug(f"Non-JSON Response text: {text_data[:200]}...")
-                        except Exception as text_err:
-                            logging.error(f"Could not even read response text after JSON error: {text_err}")
-                        return None, 0, 0
+                        body = await response.read()
+                        content_hash = hashlib.blake2b(body, digest_size=16).hexdigest()
+                        etag = response.headers.get('ETag')
+                        last_modified = response.headers.get('Last-Modified')
+
+                        if validator is not None and validator.content_hash == content_hash:
+                            # Server validatorlarni yubormasa ham, kontent o'zgarmaganini hash orqali bilamiz
+                            self.unchanged_hash_count += 1
+                            self._remember(key, PageValidator(etag, last_modified, content_hash, validator.result))
+                            return PageResult(*validator.result, not_modified=True, status=200)
+
+                        data = self.decoder.decode(body)
+                        logging.debug("API raw response data (page %s): %s", page, data)
+                        result = self._parse_payload(data, page)
+                        if result[0] is not None:
+                            self._remember(key, PageValidator(etag, last_modified, content_hash, result))
+                        return PageResult(*result, status=200)
+
+                    except ValueError as e:  # UnicodeDecodeError, JSONDecodeError va boshqa dekoderlar xatolari
+                        logging.error("Failed to decode API response as JSON: %s", e, exc_info=True)
+                        logging.debug("Non-JSON Response text: %r...", body[:200])
+                        return PageResult(None, 0, 0, status=200)
                 else:
                     error_text = await response.text()
-                    logging.error(f"API request failed with status: {response.status}, Response: {error_text[:500]}") # Log part of error response
-                    return None, 0, 0 
+                    logging.error("API request failed with status: %s, Response: %s", response.status, error_text[:500]) # Log part of error response
+                    return PageResult(None, 0, 0, status=response.status, retry_after=_parse_retry_after(response.headers.get('Retry-After')))
+        except (asyncio.TimeoutError, aiohttp.ServerTimeoutError) as e:
+            self.connection_stats_counters.timeouts += 1
+            logging.error("API request timed out (%ss total): %r", self.connection_settings.total_timeout, e)
+            return PageResult(None, 0, 0)
         except aiohttp.ClientError as e:
-            logging.error(f"Network or connection error during API request: {e}", exc_info=True)
-            return None, 0, 0 
+            logging.error("Network or connection error during API request: %s", e, exc_info=True)
+            return PageResult(None, 0, 0)
         except Exception as e:
-            logging.error(f"An unexpected error occurred in get_vacancies: {e}", exc_info=True)
-            return None, 0, 0
\ No newline at end of file
+            logging.error("An unexpected error occurred in get_vacancies: %s", e, exc_info=True)
+            return PageResult(None, 0, 0)
+
+    async def _stream_page(self, response: aiohttp.ClientResponse, key: tuple[str, int], page: int, validator: PageValidator | None) -> PageResult:
+        """
+        200 response of a large page: vacancies are built while the body is still arriving, so neither the
+        whole body nor its dict tree is held in memory. The body hash is computed over the same chunks.
+        """
+        self.streamed_count += 1
+        hasher = hashlib.blake2b(digest_size=16)
+        decoder = StreamingPageDecoder(
+            response.content.iter_chunked(STREAM_CHUNK_SIZE),
+            lambda item: self._share_vacancy(Vacancy.from_dict(item)),
+            on_chunk=hasher.update
+        )
+        try:
+            data = await decoder.decode()
+        except ValueError as e:
+            logging.error("Failed to decode streamed API response as JSON after %s bytes: %s", decoder.bytes_read, e)
+            return PageResult(None, 0, 0, status=200)
+        content_hash = hasher.hexdigest()
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if validator is not None and validator.content_hash == content_hash:
+            self.unchanged_hash_count += 1
+            self._remember(key, PageValidator(etag, last_modified, content_hash, validator.result))
+            return PageResult(*validator.result, not_modified=True, status=200)
+        result = self._parse_payload(data, page)
+        if result[0] is not None:
+            self._remember(key, PageValidator(etag, last_modified, content_hash, result))
+        return PageResult(*result, status=200)
+
+    async def fetch_all(
+        self,
+        query: str = "",
+        concurrency: int = DEFAULT_FETCH_CONCURRENCY,
+        retries: int = DEFAULT_FETCH_RETRIES
+    ):
+        """
+        Async generator over the whole feed: yields PageResult for pages 1..N in page order.
+        Page 1 is fetched first to learn the page count; the remaining pages are fetched
+        concurrently through an AdaptiveRateLimiter. A page that still fails after all retries
+        is yielded as is (vacancies is None), so the caller decides whether to abort.
+        A 404 for a later page means the feed shrank since page 1 was read: iteration stops there,
+        so fewer than first.total_pages results are yielded.
+        """
+        limiter = AdaptiveRateLimiter(max_concurrency=concurrency)
+        first = await self._fetch_page_with_retry(query, 1, limiter, retries)
+        yield first
+        if first.vacancies is None or first.total_pages <= 1:
+            return
+
+        tasks = [
+            asyncio.create_task(self._fetch_page_with_retry(query, page, limiter, retries))
+            for page in range(2, first.total_pages + 1)
+        ]
+        try:
+            for page, task in enumerate(tasks, start=2):
+                result = await task
+                if result.status == 404:
+                    # Sinxronizatsiya davomida lenta qisqardi - oxirgi sahifalar endi yo'q
+                    logging.info("Vacancy feed ended at page %s of %s expected, it shrank during the fetch.", page - 1, first.total_pages)
+                    return
+                yield result
+        finally:
+            # Iste'molchi to'xtatsa (break/aclose), qolgan so'rovlarni bekor qilamiz
+            for task in tasks:
+                task.cancel()
+
+    async def _fetch_page_with_retry(self, query: str, page: int, limiter: AdaptiveRateLimiter, retries: int) -> PageResult:
+        attempt = 0
+        while True:
+            async with limiter:
+                result = await self.fetch_page(query, page)
+            if not result.retryable:
+                if result.vacancies is not None:
+                    limiter.on_success()
+                return result
+            if result.status:
+                limiter.on_throttle(result.retry_after)
+            if attempt >= retries:
+                logging.error("Giving up on page %s after %s attempts (last status: %s).", page, attempt + 1, result.status)
+                return result
+            delay = max(backoff_delay(attempt), result.retry_after or 0)
+            logging.warning("Retrying page %s in %.2fs (attempt %s/%s, status: %s).", page, delay, attempt + 1, retries, result.status)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    def _remember(self, key: tuple[str, int], validator: PageValidator):
+        self._validators[key] = validator
+        self._validators.move_to_end(key)
+        while len(self._validators) > DEFAULT_VALIDATOR_MAX_SIZE:
+            self._validators.popitem(last=False)
+
+    def _parse_payload(self, data, page: int) -> tuple[list[Vacancy] | None, int, int]:
+        vacancies = None
+        total_items = 0
+        total_pages = 0
+
+        if isinstance(data, dict) and 'results' in data and isinstance(data['results'], list) and 'count' in data:
+             vacancies = self._build_vacancies(data['results'])
+             try:
+                 total_items = int(data.get('count', 0))
+             except (ValueError, TypeError):
+                 logging.warning("Could not parse 'count' field (%s) as integer.", data.get('count'))
+                 total_items = 0 
+
+             items_on_this_page = len(vacancies)
+             items_per_page = items_on_this_page if items_on_this_page > 0 and page == 1 else DEFAULT_ITEMS_PER_PAGE # Simple heuristic
+             if total_items > 0 and items_per_page > 0:
+                 total_pages = math.ceil(total_items / items_per_page)
+             elif total_items == 0:
+                 total_pages = 0 
+             else: 
+                 total_pages = 1 
+
+             logging.info("Parsed %s vacancies. Total items: %s, Calculated pages: %s (assuming ~%s/page).", len(vacancies), total_items, total_pages, items_per_page)
+             return vacancies, total_pages, total_items
+
+        elif isinstance(data, list):
+             vacancies = self._build_vacancies(data)
+             total_items = len(vacancies) 
+             total_pages = 1 
+             logging.warning("API returned a list directly. Pagination may not work correctly or show total counts.")
+             return vacancies, total_pages, total_items
+        else:
+             logging.warning("API returned unknown JSON structure: %s", type(data))
+             return None, 0, 0
+
+
+def _parse_retry_after(value: str | None) -> float | None:
+    """Parses the delta-seconds form of a Retry-After header."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
+
+
+class PagePrefetcher:
+    """
+    Warms the pages next to the one a user is looking at (N+1 first, then N-1).
+    At most `budget` prefetches are in flight for all users together; when the budget is used up
+    the pages are simply not prefetched. Each owner (user) has at most one batch of prefetches,
+    which is cancelled when the user moves on or leaves the list.
+    """
+
+    def __init__(self, parser: "VacancyParser", budget: int = DEFAULT_PREFETCH_BUDGET):
+        self.parser = parser
+        self.budget = budget
+        self._owners: dict = {}  # owner -> [((query, page), task), ...]
+        self.skipped = 0
+
+    def schedule(self, owner, query: str, page: int, total_pages: int):
+        self.cancel(owner)
+        if self.budget <= 0:
+            return
+        if len(self._owners) >= MAX_PREFETCH_OWNERS:
+            self._owners = {
+                key: batch for key, batch in self._owners.items()
+                if any(not task.done() for _, task in batch)
+            }
+        batch = []
+        for target in (page + 1, page - 1):
+            if not 1 <= target <= total_pages:
+                continue
+            if self.parser.cache.speculative_count >= self.budget:
+                self.skipped += 1
+                break
+            task = self.parser.prefetch_vacancies(query, target)
+            if task is not None:
+                batch.append(((query, target), task))
+        if batch:
+            self._owners[owner] = batch
+
+    def cancel(self, owner):
+        for key, task in self._owners.pop(owner, ()):
+            self.parser.cache.cancel_prefetch(key, task)
+
+    def stats(self) -> dict:
+        return {"owners": len(self._owners), "in_flight": self.parser.cache.speculative_count, "skipped": self.skipped}
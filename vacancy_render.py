@@ -0,0 +1,160 @@
+import html
+import logging
+from collections import OrderedDict
+
+from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
+from aiogram.utils.keyboard import InlineKeyboardBuilder
+
+from vacancy_parser import Vacancy
+
+DEFAULT_RENDER_CACHE_SIZE = 2048  # har bir kesh turi uchun yozuvlar soni
+VACANCY_APPLY_URL = "https://job.ubtuit.uz/job/{vacancy_id}"
+
+
+def escape_or_default(value: str | None, default: str = "<i>Noma’lum</i>") -> str:
+    # Default qiymat tayyor HTML, shuning uchun u escape qilinmaydi
+    return html.escape(value) if value else default
+
+
+def render_vacancy_details(vacancy: Vacancy) -> str:
+    details = [
+        f"<b>Lavozim:</b> {escape_or_default(vacancy.position)}",
+        f"<b>Bo'lim:</b> {escape_or_default(vacancy.department)}",
+        f"<b>Maosh:</b> {escape_or_default(vacancy.salary, '<i>Ko’rsatilmagan</i>')}",
+        f"<b>Talab qilinadigan tajriba:</b> {escape_or_default(vacancy.experience)}",
+        f"<b>Ish jadvali:</b> {escape_or_default(vacancy.work_schedule)}",
+        f"<b>Talablar:</b> {escape_or_default(vacancy.requirement)}",
+        f"<b>Ochilish vaqti:</b> {escape_or_default(vacancy.opening_time)}",
+        f"<b>Yopilish vaqti:</b> {escape_or_default(vacancy.end_time)}",
+    ]
+    if vacancy.id:
+        apply_url = VACANCY_APPLY_URL.format(vacancy_id=vacancy.id)
+        details.append(f"<b>Ushbu vakansiyaga</b> <a href='{apply_url}'>ARIZA BERISH</a>")
+    else:
+        details.append("<i>Ariza berish uchun havola topilmadi.</i>")
+
+    return "\n".join(filter(None, details))
+
+
+def create_vacancy_navigation_keyboard(
+    vacancies_on_page: list[Vacancy],
+    current_page: int,
+    total_pages: int
+    ) -> InlineKeyboardMarkup | None:
+
+    if not vacancies_on_page:
+        return None
+
+    builder = InlineKeyboardBuilder()
+
+    for i, vacancy in enumerate(vacancies_on_page):
+        position = vacancy.position or f'Noma’lum lavozim #{i+1}'
+        callback_data = f"vacancy:{i}"
+
+        if len(callback_data.encode('utf-8')) > 64:
+            logging.warning("Callback data for vacancy exceeds 64 bytes, skipping button: %s", callback_data)
+            continue
+
+        builder.row(InlineKeyboardButton(text=position, callback_data=callback_data))
+
+    pagination_row = []
+    if current_page > 1:
+        pagination_row.append(
+            InlineKeyboardButton(text="⬅️ Orqaga", callback_data=f"page:{current_page - 1}")
+        )
+    if current_page < total_pages:
+        pagination_row.append(
+            InlineKeyboardButton(text="➡️ Keyingi", callback_data=f"page:{current_page + 1}")
+        )
+
+    if pagination_row:
+        builder.row(*pagination_row)
+
+    return builder.as_markup()
+
+
+def create_back_to_list_keyboard(current_page: int) -> InlineKeyboardMarkup:
+    builder = InlineKeyboardBuilder()
+    # "Ro'yxatga qaytish" tugmasi joriy sahifaga qaytaradi
+    builder.row(
+        InlineKeyboardButton(text="⬅️ Ro'yxatga qaytish", callback_data=f"page:{current_page}")
+    )
+    return builder.as_markup()
+
+
+class RenderCache:
+    """
+    Pre-rendered vacancy detail HTML and list keyboards shared by all users.
+    Entries remember the Vacancy objects they were rendered from and are re-rendered when those
+    objects change; the whole cache is also dropped when a new vacancy snapshot is published.
+    """
+
+    def __init__(self, max_size: int = DEFAULT_RENDER_CACHE_SIZE):
+        self.max_size = max_size
+        self._details: OrderedDict = OrderedDict()  # vacancy_id -> (Vacancy, html)
+        self._keyboards: OrderedDict = OrderedDict()  # (search_query, page, total_pages) -> (vacancies, markup)
+        self._back_keyboards: dict[int, InlineKeyboardMarkup] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def vacancy_details(self, vacancy: Vacancy) -> str:
+        entry = self._details.get(vacancy.id)
+        if entry is not None and entry[0] is vacancy:
+            self.hits += 1
+            self._details.move_to_end(vacancy.id)
+            return entry[1]
+        self.misses += 1
+        text = render_vacancy_details(vacancy)
+        if vacancy.id is not None:
+            self._store(self._details, vacancy.id, (vacancy, text))
+        return text
+
+    def navigation_keyboard(
+        self,
+        vacancies_on_page: list[Vacancy],
+        current_page: int,
+        total_pages: int,
+        search_query: str = ""
+    ) -> InlineKeyboardMarkup | None:
+        key = (search_query, current_page, total_pages)
+        entry = self._keyboards.get(key)
+        if entry is not None and _same_objects(entry[0], vacancies_on_page):
+            self.hits += 1
+            self._keyboards.move_to_end(key)
+            return entry[1]
+        self.misses += 1
+        markup = create_vacancy_navigation_keyboard(vacancies_on_page, current_page, total_pages)
+        if markup is not None:
+            self._store(self._keyboards, key, (tuple(vacancies_on_page), markup))
+        return markup
+
+    def back_to_list_keyboard(self, current_page: int) -> InlineKeyboardMarkup:
+        markup = self._back_keyboards.get(current_page)
+        if markup is None:
+            if len(self._back_keyboards) >= self.max_size:
+                self._back_keyboards.clear()
+            markup = self._back_keyboards[current_page] = create_back_to_list_keyboard(current_page)
+        return markup
+
+    def invalidate(self, *_):
+        """Drops all rendered entries; usable directly as a VacancySynchronizer listener."""
+        self._details.clear()
+        self._keyboards.clear()
+
+    def _store(self, cache: OrderedDict, key, value):
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > self.max_size:
+            cache.popitem(last=False)
+
+    def stats(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "details": len(self._details),
+            "keyboards": len(self._keyboards),
+        }
+
+
+def _same_objects(cached: tuple, current: list) -> bool:
+    return len(cached) == len(current) and all(a is b for a, b in zip(cached, current))
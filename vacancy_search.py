@@ -0,0 +1,187 @@
+import bisect
+import logging
+import math
+import re
+
+from vacancy_parser import Vacancy
+from vacancy_store import VacancySnapshot, SyncDelta
+
+# Maydon og'irliklari: lavozim nomidagi moslik talablardagidan muhimroq
+FIELD_WEIGHTS = {
+    'position': 3.0,
+    'department': 2.0,
+    'requirement': 1.0,
+    'work_schedule': 1.0,
+}
+PREFIX_MATCH_FACTOR = 0.5  # "dastur" -> "dasturchi" kabi prefiks moslik uchun
+MIN_PREFIX_LENGTH = 2
+DEFAULT_SEARCH_LIMIT = 200
+
+# o‘, oʻ, o’, o`, o' va boshqalar bitta shaklga keltiriladi (butunlay olib tashlanadi)
+_APOSTROPHES = "'`´‘’ʻʼʹ′"
+_APOSTROPHE_TABLE = str.maketrans("", "", _APOSTROPHES)
+
+# O'zbek kirill -> lotin transliteratsiyasi (apostrofsiz, chunki apostroflar baribir olib tashlanadi)
+_CYRILLIC_TO_LATIN = str.maketrans({
+    'а': 'a', 'б': 'b', 'в': 'v', 'г': 'g', 'д': 'd', 'е': 'e', 'ё': 'yo', 'ж': 'j',
+    'з': 'z', 'и': 'i', 'й': 'y', 'к': 'k', 'л': 'l', 'м': 'm', 'н': 'n', 'о': 'o',
+    'п': 'p', 'р': 'r', 'с': 's', 'т': 't', 'у': 'u', 'ф': 'f', 'х': 'x', 'ц': 'ts',
+    'ч': 'ch', 'ш': 'sh', 'щ': 'sh', 'ъ': '', 'ы': 'i', 'ь': '', 'э': 'e', 'ю': 'yu',
+    'я': 'ya', 'ў': 'o', 'қ': 'q', 'ғ': 'g', 'ҳ': 'h',
+})
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def normalize_text(text: str) -> str:
+    """Lowercases, transliterates Uzbek Cyrillic to Latin and drops all apostrophe variants."""
+    return text.lower().translate(_CYRILLIC_TO_LATIN).translate(_APOSTROPHE_TABLE)
+
+
+def tokenize(text) -> list[str]:
+    if not text:
+        return []
+    return _TOKEN_RE.findall(normalize_text(str(text)))
+
+
+class VacancySearchIndex:
+    """
+    Inverted index over the vacancy snapshot: token -> {vacancy_id: weight}.
+    A sorted vocabulary allows prefix lookups with bisect; add/remove update postings in place.
+    """
+
+    def __init__(self):
+        self._postings: dict[str, dict] = {}
+        self._doc_tokens: dict = {}
+        self._vocabulary: list[str] = []
+        self._order: dict = {}  # vakansiyaning snapshotdagi tartibi (teng ballarda)
+
+    def __len__(self) -> int:
+        return len(self._doc_tokens)
+
+    def add(self, vacancy: Vacancy, order: int = 0):
+        vacancy_id = vacancy.id
+        if vacancy_id is None:
+            return
+        if vacancy_id in self._doc_tokens:
+            self.remove(vacancy_id)
+
+        weights: dict[str, float] = {}
+        for field, field_weight in FIELD_WEIGHTS.items():
+            for token in tokenize(getattr(vacancy, field)):
+                weights[token] = weights.get(token, 0.0) + field_weight
+
+        for token, weight in weights.items():
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = {}
+                bisect.insort(self._vocabulary, token)
+            postings[vacancy_id] = weight
+        self._doc_tokens[vacancy_id] = tuple(weights)
+        self._order[vacancy_id] = order
+
+    def remove(self, vacancy_id):
+        tokens = self._doc_tokens.pop(vacancy_id, None)
+        self._order.pop(vacancy_id, None)
+        if not tokens:
+            return
+        for token in tokens:
+            postings = self._postings.get(token)
+            if postings is None:
+                continue
+            postings.pop(vacancy_id, None)
+            if not postings:
+                del self._postings[token]
+                position = bisect.bisect_left(self._vocabulary, token)
+                if position < len(self._vocabulary) and self._vocabulary[position] == token:
+                    del self._vocabulary[position]
+
+    def rebuild(self, snapshot: VacancySnapshot):
+        self._postings.clear()
+        self._doc_tokens.clear()
+        self._vocabulary.clear()
+        self._order.clear()
+        for order, vacancy in enumerate(snapshot.vacancies):
+            self.add(vacancy, order)
+        logging.info("Search index rebuilt: %s vacancies, %s tokens.", len(self._doc_tokens), len(self._vocabulary))
+
+    def export_postings(self) -> dict[str, dict]:
+        """Copy of token -> {vacancy_id: weight}, for persisting the index without re-tokenising on load."""
+        return {token: dict(postings) for token, postings in self._postings.items()}
+
+    def restore(self, snapshot: VacancySnapshot, postings: dict[str, dict]):
+        """Installs postings saved by export_postings for the given snapshot."""
+        doc_tokens: dict = {}
+        for token, token_postings in postings.items():
+            for vacancy_id in token_postings:
+                doc_tokens.setdefault(vacancy_id, []).append(token)
+        self._postings = postings
+        self._doc_tokens = {vacancy_id: tuple(tokens) for vacancy_id, tokens in doc_tokens.items()}
+        self._vocabulary = sorted(postings)
+        self._order = {vacancy_id: order for order, vacancy_id in enumerate(snapshot.by_id)}
+        logging.info("Search index restored: %s vacancies, %s tokens.", len(self._doc_tokens), len(self._vocabulary))
+
+    def apply_delta(self, snapshot: VacancySnapshot, delta: SyncDelta):
+        """Snapshot listener: updates only the vacancies that were added, changed or removed."""
+        if not self._doc_tokens:
+            self.rebuild(snapshot)
+            return
+        for vacancy_id in delta.removed:
+            self.remove(vacancy_id)
+        for vacancy_id in delta.added | delta.changed:
+            vacancy = snapshot.get(vacancy_id)
+            if vacancy is not None:
+                self.add(vacancy)
+        # Tartib yangi snapshotdan olinadi (vakansiyalar qayta tartiblangan bo'lishi mumkin)
+        self._order = {vacancy_id: order for order, vacancy_id in enumerate(snapshot.by_id)}
+        logging.info("Search index updated incrementally: %s", delta)
+
+    def _matches(self, token: str) -> dict:
+        """Returns {vacancy_id: score} for an exact token plus all tokens it is a prefix of."""
+        scores: dict = {}
+        exact = self._postings.get(token)
+        if exact:
+            idf = math.log(1 + len(self._doc_tokens) / len(exact))
+            for vacancy_id, weight in exact.items():
+                scores[vacancy_id] = weight * idf
+        if len(token) < MIN_PREFIX_LENGTH:
+            return scores
+        position = bisect.bisect_right(self._vocabulary, token)
+        while position < len(self._vocabulary) and self._vocabulary[position].startswith(token):
+            postings = self._postings[self._vocabulary[position]]
+            idf = math.log(1 + len(self._doc_tokens) / len(postings))
+            for vacancy_id, weight in postings.items():
+                score = weight * idf * PREFIX_MATCH_FACTOR
+                if score > scores.get(vacancy_id, 0.0):
+                    scores[vacancy_id] = score
+            position += 1
+        return scores
+
+    def search(self, query: str, limit: int = DEFAULT_SEARCH_LIMIT) -> list:
+        """Returns vacancy ids matching every query token, best matches first."""
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        total_scores: dict | None = None
+        for token in dict.fromkeys(tokens):
+            scores = self._matches(token)
+            if total_scores is None:
+                total_scores = scores
+            else:
+                total_scores = {
+                    vacancy_id: score + scores[vacancy_id]
+                    for vacancy_id, score in total_scores.items() if vacancy_id in scores
+                }
+            if not total_scores:
+                return []
+        ranked = sorted(total_scores, key=lambda vacancy_id: (-total_scores[vacancy_id], self._order.get(vacancy_id, 0)))
+        return ranked[:limit]
+
+    def search_page(self, snapshot: VacancySnapshot, query: str, page: int) -> tuple[list[Vacancy], int, int]:
+        """Returns one page of search results in the same shape as VacancyParser.get_vacancies."""
+        vacancies = [vacancy for vacancy in map(snapshot.get, self.search(query)) if vacancy is not None]
+        total_items = len(vacancies)
+        total_pages = math.ceil(total_items / snapshot.items_per_page)
+        start = (page - 1) * snapshot.items_per_page
+        if page < 1 or start >= total_items:
+            return [], total_pages, total_items
+        return vacancies[start:start + snapshot.items_per_page], total_pages, total_items
@@ -0,0 +1,269 @@
+import asyncio
+import dataclasses
+import logging
+import mmap
+import os
+import struct
+import time
+import zlib
+
+from vacancy_parser import Vacancy
+from vacancy_search import VacancySearchIndex
+from vacancy_store import VacancySnapshot
+
+DEFAULT_SNAPSHOT_PATH = "vacancy_snapshot.bin"
+SNAPSHOT_MAGIC = b"JBVSNAP\x00"
+SNAPSHOT_FORMAT_VERSION = 1
+
+# Fayl tuzilishi (little-endian):
+#   sarlavha | satrlar jadvali: (n + 1) ta u32 oxirgi-ofset + UTF-8 blob | vakansiyalar: qat'iy o'lchamli yozuvlar |
+#   qidiruv indeksi: har token uchun (satr raqami, yozuvlar soni) + (vakansiya tartib raqami, og'irlik) yozuvlari
+_HEADER = struct.Struct("<8sHHIIdIIII")  # magic, format, reserved, version, items_per_page, created_at, vacancies, strings, tokens, crc32
+_OFFSET = struct.Struct("<I")
+_TOKEN = struct.Struct("<II")
+_POSTING = struct.Struct("<If")
+
+VACANCY_TEXT_FIELDS = tuple(field.name for field in dataclasses.fields(Vacancy) if field.name != "id")
+_RECORD = struct.Struct("<Bq" + "I" * len(VACANCY_TEXT_FIELDS))  # id turi, id (yoki satr raqami), matn maydonlari
+_NO_STRING = 0xFFFFFFFF
+_ID_NONE, _ID_INT, _ID_STR = 0, 1, 2
+_INT64_MIN, _INT64_MAX = -(1 << 63), (1 << 63) - 1
+
+
+class SnapshotFormatError(ValueError):
+    pass
+
+
+class _StringTable:
+    """Every distinct string is stored once; records refer to it by number."""
+
+    def __init__(self):
+        self.numbers: dict[str, int] = {}
+        self.chunks: list[bytes] = []
+
+    def add(self, value: str | None) -> int:
+        if value is None:
+            return _NO_STRING
+        number = self.numbers.get(value)
+        if number is None:
+            number = self.numbers[value] = len(self.chunks)
+            self.chunks.append(value.encode("utf-8"))
+        return number
+
+    def encode(self) -> bytes:
+        offsets = bytearray(_OFFSET.size * (len(self.chunks) + 1))
+        end = 0
+        for number, chunk in enumerate(self.chunks):
+            end += len(chunk)
+            _OFFSET.pack_into(offsets, _OFFSET.size * (number + 1), end)
+        return bytes(offsets) + b"".join(self.chunks)
+
+
+def encode_snapshot(snapshot: VacancySnapshot, postings: dict[str, dict] | None = None) -> bytes:
+    """
+    Serialises a snapshot and (optionally) the search index postings from VacancySearchIndex.export_postings().
+    Vacancies are referenced from the postings by their position in the snapshot.
+    """
+    strings = _StringTable()
+    records = bytearray()
+    ordinals = {}
+    for ordinal, vacancy in enumerate(snapshot.vacancies):
+        vacancy_id = vacancy.id
+        if vacancy_id is None:
+            id_kind, id_value = _ID_NONE, 0
+        elif isinstance(vacancy_id, int) and not isinstance(vacancy_id, bool) and _INT64_MIN <= vacancy_id <= _INT64_MAX:
+            id_kind, id_value = _ID_INT, vacancy_id
+        else:
+            id_kind, id_value = _ID_STR, strings.add(str(vacancy_id))
+        if vacancy_id is not None:
+            ordinals.setdefault(vacancy_id, ordinal)
+        records += _RECORD.pack(id_kind, id_value, *(strings.add(getattr(vacancy, field)) for field in VACANCY_TEXT_FIELDS))
+
+    index = bytearray()
+    token_count = 0
+    for token, token_postings in (postings or {}).items():
+        entries = [(ordinals[vacancy_id], weight) for vacancy_id, weight in token_postings.items() if vacancy_id in ordinals]
+        if not entries:
+            continue
+        index += _TOKEN.pack(strings.add(token), len(entries))
+        for entry in entries:
+            index += _POSTING.pack(*entry)
+        token_count += 1
+
+    body = strings.encode() + records + index
+    header = _HEADER.pack(
+        SNAPSHOT_MAGIC, SNAPSHOT_FORMAT_VERSION, 0, snapshot.version, snapshot.items_per_page, snapshot.created_at,
+        len(snapshot.vacancies), len(strings.chunks), token_count, zlib.crc32(body)
+    )
+    return header + body
+
+
+def decode_snapshot(buffer) -> tuple[VacancySnapshot, dict[str, dict]]:
+    """
+    Reads what encode_snapshot wrote from any buffer (bytes, mmap, shared memory).
+    Returns (snapshot, postings); raises SnapshotFormatError for foreign, truncated or corrupted data.
+    """
+    if len(buffer) < _HEADER.size:
+        raise SnapshotFormatError("snapshot is truncated")
+    (magic, format_version, _, version, items_per_page, created_at,
+     vacancy_count, string_count, token_count, checksum) = _HEADER.unpack_from(buffer, 0)
+    if magic != SNAPSHOT_MAGIC:
+        raise SnapshotFormatError("not a vacancy snapshot")
+    if format_version != SNAPSHOT_FORMAT_VERSION:
+        raise SnapshotFormatError(f"unsupported snapshot format {format_version}")
+    with memoryview(buffer) as view, view[_HEADER.size:] as body:
+        if zlib.crc32(body) != checksum:
+            raise SnapshotFormatError("snapshot checksum mismatch")
+        try:
+            vacancies, postings, end = _decode_body(body, vacancy_count, string_count, token_count)
+        except (struct.error, IndexError, UnicodeDecodeError) as e:
+            # Faqat xabar matni olinadi: traceback buferga havolalarni ushlab qolsa, mmap yopilmaydi
+            error = str(e)
+        else:
+            error = "snapshot has trailing data" if end != len(body) else None
+    if error is not None:
+        raise SnapshotFormatError(f"snapshot is corrupted: {error}")
+    snapshot = VacancySnapshot(vacancies, items_per_page=items_per_page, version=version)
+    snapshot.created_at = created_at
+    return snapshot, postings
+
+
+def _decode_body(body: memoryview, vacancy_count: int, string_count: int, token_count: int) -> tuple[list[Vacancy], dict[str, dict], int]:
+    """Returns (vacancies, postings, end offset of the decoded data)."""
+    offsets_end = _OFFSET.size * (string_count + 1)
+    offsets = [offset for (offset,) in _OFFSET.iter_unpack(body[:offsets_end])]
+    blob_end = offsets_end + offsets[-1]
+    blob = body[offsets_end:blob_end]
+    # Har bir satr bir marta dekodlanadi - bir xil bo'lim nomlari va h.k. xotirada bitta nusxada
+    strings = [str(blob[offsets[number]:offsets[number + 1]], "utf-8") for number in range(string_count)]
+
+    def text(number: int) -> str | None:
+        return None if number == _NO_STRING else strings[number]
+
+    records_end = blob_end + _RECORD.size * vacancy_count
+    vacancies = []
+    for id_kind, id_value, *fields in _RECORD.iter_unpack(body[blob_end:records_end]):
+        if id_kind == _ID_INT:
+            vacancy_id = id_value
+        elif id_kind == _ID_STR:
+            vacancy_id = strings[id_value]
+        else:
+            vacancy_id = None
+        vacancies.append(Vacancy(vacancy_id, *map(text, fields)))
+
+    postings: dict[str, dict] = {}
+    position = records_end
+    for _ in range(token_count):
+        token_number, entry_count = _TOKEN.unpack_from(body, position)
+        position += _TOKEN.size
+        entries_end = position + _POSTING.size * entry_count
+        postings[strings[token_number]] = {
+            vacancies[ordinal].id: weight for ordinal, weight in _POSTING.iter_unpack(body[position:entries_end])
+        }
+        position = entries_end
+    return vacancies, postings, position
+
+
+def read_snapshot(path: str) -> tuple[VacancySnapshot, dict[str, dict], float]:
+    """Decodes a snapshot file through mmap. Returns (snapshot, postings, file mtime)."""
+    with open(path, "rb") as file:
+        mtime = os.fstat(file.fileno()).st_mtime
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            snapshot, postings = decode_snapshot(mapped)
+    return snapshot, postings, mtime
+
+
+def write_snapshot(path: str, data: bytes):
+    """Atomically replaces the file: readers see either the old or the new snapshot, never a partial one."""
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as file:
+        file.write(data)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp_path, path)
+
+
+class SnapshotFile:
+    """
+    Keeps the vacancy snapshot and search index on disk so a restarted bot can serve pages before
+    the first sync finishes. Rewritten atomically (temp file + os.replace) after every sync that
+    changed the feed; unchanged syncs only touch the file, whose mtime is the last successful sync.
+    """
+
+    def __init__(self, path: str = DEFAULT_SNAPSHOT_PATH, index: VacancySearchIndex | None = None):
+        self.path = path
+        self.index = index
+        self._saved_version: int | None = None
+        self._task: asyncio.Task | None = None
+        self.saves = 0
+        self.save_errors = 0
+        self.last_save_ms = 0.0
+        self.last_size = 0
+
+    def load(self) -> tuple[VacancySnapshot, dict[str, dict], float] | None:
+        """Returns (snapshot, postings, synced_at wall-clock time), or None if there is no usable file."""
+        started = time.perf_counter()
+        try:
+            snapshot, postings, synced_at = read_snapshot(self.path)
+        except FileNotFoundError:
+            logging.info("No vacancy snapshot at %s, starting cold.", self.path)
+            return None
+        except (OSError, ValueError) as e:
+            # ValueError: bo'sh fayl (mmap) yoki SnapshotFormatError
+            logging.warning("Vacancy snapshot %s could not be loaded, starting cold: %s", self.path, e)
+            return None
+        self._saved_version = snapshot.version
+        logging.info(
+            "Vacancy snapshot v%s loaded from %s: %s vacancies, %s tokens in %.1f ms (last synced %.0fs ago).",
+            snapshot.version, self.path, snapshot.total_items, len(postings),
+            (time.perf_counter() - started) * 1000, max(0.0, time.time() - synced_at)
+        )
+        return snapshot, postings, synced_at
+
+    async def _save(self, previous: asyncio.Task | None, snapshot: VacancySnapshot, postings: dict | None):
+        if previous is not None:
+            await asyncio.gather(previous, return_exceptions=True)  # yozuvlar tartibi saqlanadi
+        started = time.perf_counter()
+        try:
+            data = await asyncio.to_thread(encode_snapshot, snapshot, postings)
+            await asyncio.to_thread(write_snapshot, self.path, data)
+        except Exception:
+            self.save_errors += 1
+            logging.exception("Could not write vacancy snapshot to %s.", self.path)
+            return
+        self.saves += 1
+        self.last_size = len(data)
+        self.last_save_ms = (time.perf_counter() - started) * 1000
+        logging.info("Vacancy snapshot v%s saved to %s (%s bytes, %.1f ms).", snapshot.version, self.path, len(data), self.last_save_ms)
+
+    async def _touch(self, previous: asyncio.Task | None):
+        if previous is not None:
+            await asyncio.gather(previous, return_exceptions=True)
+        try:
+            await asyncio.to_thread(os.utime, self.path)
+        except OSError as e:
+            logging.warning("Could not update vacancy snapshot time %s: %s", self.path, e)
+
+    def on_synced(self, snapshot: VacancySnapshot):
+        """VacancySynchronizer sync listener: saves new snapshot versions, touches the file otherwise."""
+        if snapshot.version == self._saved_version:
+            self._task = asyncio.create_task(self._touch(self._task))
+            return
+        self._saved_version = snapshot.version
+        # Indeks shu yerda (event loop ichida) nusxalanadi - keyingi o'zgarishlar fon yozuviga ta'sir qilmaydi
+        postings = self.index.export_postings() if self.index is not None else None
+        self._task = asyncio.create_task(self._save(self._task, snapshot, postings))
+
+    async def flush(self):
+        """Waits for a pending write (used on shutdown)."""
+        if self._task is not None:
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "saves": self.saves,
+            "save_errors": self.save_errors,
+            "last_save_ms": round(self.last_save_ms, 3),
+            "size_bytes": self.last_size,
+        }
@@ -0,0 +1,218 @@
+import asyncio
+import logging
+import math
+import time
+
+from vacancy_parser import VacancyParser, Vacancy, DEFAULT_ITEMS_PER_PAGE, DEFAULT_FETCH_CONCURRENCY
+
+DEFAULT_SYNC_INTERVAL = 300.0  # sekund
+SYNC_RETRY_DELAY = 30.0  # muvaffaqiyatsiz sinxronizatsiyadan keyin qayta urinish (sekund)
+STALE_AFTER_INTERVALS = 2  # shuncha interval davomida muvaffaqiyatli sinxronizatsiya bo'lmasa, snapshot eskirgan
+
+
+class VacancySnapshot:
+    """
+    Immutable in-memory copy of the whole vacancy feed.
+    A new snapshot is built off to the side and swapped in as a whole, so readers never need a lock.
+    """
+
+    __slots__ = ("vacancies", "by_id", "items_per_page", "created_at", "version")
+
+    def __init__(self, vacancies: list[Vacancy], items_per_page: int = DEFAULT_ITEMS_PER_PAGE, version: int = 1):
+        self.vacancies = vacancies
+        self.by_id = {v.id: v for v in vacancies if v.id is not None}
+        self.items_per_page = items_per_page if items_per_page > 0 else DEFAULT_ITEMS_PER_PAGE
+        self.created_at = time.time()
+        self.version = version
+
+    @property
+    def total_items(self) -> int:
+        return len(self.vacancies)
+
+    @property
+    def total_pages(self) -> int:
+        return math.ceil(self.total_items / self.items_per_page)
+
+    def page(self, page: int) -> tuple[list[Vacancy], int, int]:
+        """Returns (vacancies, total_pages, total_items) in the same shape as VacancyParser.get_vacancies."""
+        start = (page - 1) * self.items_per_page
+        if page < 1 or start >= self.total_items:
+            return [], self.total_pages, self.total_items
+        return self.vacancies[start:start + self.items_per_page], self.total_pages, self.total_items
+
+    def get(self, vacancy_id) -> Vacancy | None:
+        return self.by_id.get(vacancy_id)
+
+
+class SyncDelta:
+    """Vacancy ids added, changed and removed by one synchronisation pass."""
+
+    __slots__ = ("added", "changed", "removed")
+
+    def __init__(self, added: set | None = None, changed: set | None = None, removed: set | None = None):
+        self.added = added or set()
+        self.changed = changed or set()
+        self.removed = removed or set()
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.changed or self.removed)
+
+    def __repr__(self) -> str:
+        return f"SyncDelta(added={len(self.added)}, changed={len(self.changed)}, removed={len(self.removed)})"
+
+
+def compute_delta(previous: VacancySnapshot | None, current: VacancySnapshot, modified_ids: set) -> SyncDelta:
+    """
+    Compares two snapshots. Only vacancies that came from pages whose content changed
+    (modified_ids) are compared field by field; unchanged pages are skipped entirely.
+    """
+    new_ids = current.by_id.keys()
+    if previous is None:
+        return SyncDelta(added=set(new_ids))
+    old_ids = previous.by_id.keys()
+    added = set(new_ids - old_ids)
+    removed = set(old_ids - new_ids)
+    changed = {
+        vacancy_id for vacancy_id in modified_ids
+        if vacancy_id in old_ids and vacancy_id in new_ids
+        and previous.by_id[vacancy_id] != current.by_id[vacancy_id]
+    }
+    return SyncDelta(added=added, changed=changed, removed=removed)
+
+
+class VacancySynchronizer:
+    """Periodically pages through the whole vacancy feed and publishes a fresh VacancySnapshot."""
+
+    def __init__(self, parser: VacancyParser, interval: float = DEFAULT_SYNC_INTERVAL, concurrency: int = DEFAULT_FETCH_CONCURRENCY):
+        self.parser = parser
+        self.interval = interval
+        self.concurrency = concurrency
+        self.snapshot: VacancySnapshot | None = None
+        self.last_delta = SyncDelta()
+        self._listeners: list = []
+        self._sync_listeners: list = []
+        self._task: asyncio.Task | None = None
+        self._version = 0
+        self.synced_at: float | None = None  # oxirgi muvaffaqiyatli sinxronizatsiya (time.monotonic)
+
+    def is_stale(self) -> bool:
+        """True when the feed could not be synchronised for STALE_AFTER_INTERVALS intervals (e.g. upstream outage)."""
+        if self.synced_at is None:
+            return self.snapshot is not None
+        return time.monotonic() - self.synced_at > self.interval * STALE_AFTER_INTERVALS
+
+    def add_listener(self, callback):
+        """Registers callback(snapshot, delta), called after every sync that changed something."""
+        self._listeners.append(callback)
+
+    def add_sync_listener(self, callback):
+        """Registers callback(snapshot), called after every successful sync (after the change listeners)."""
+        self._sync_listeners.append(callback)
+
+    def restore(self, snapshot: VacancySnapshot, synced_at: float):
+        """
+        Installs a snapshot saved by an earlier run (synced_at - its last sync, wall-clock time).
+        Listeners are not called; the next sync reports its changes relative to this snapshot.
+        """
+        self.snapshot = snapshot
+        self._version = max(self._version, snapshot.version)
+        self.synced_at = time.monotonic() - max(0.0, time.time() - synced_at)
+
+    def _notify_synced(self, snapshot: VacancySnapshot):
+        for callback in self._sync_listeners:
+            try:
+                callback(snapshot)
+            except Exception:
+                logging.exception("Vacancy sync listener %r failed.", callback)
+
+    async def sync_once(self) -> VacancySnapshot | None:
+        """
+        Downloads every page of the feed using conditional requests. The current snapshot is
+        replaced only if all pages were fetched successfully and something actually changed;
+        on any error the previous snapshot stays in place.
+        """
+        started = time.monotonic()
+        pages = []
+        async for result in self.parser.fetch_all(concurrency=self.concurrency):
+            if result.vacancies is None:
+                total_pages = pages[0].total_pages if pages else "?"
+                logging.warning("Vacancy sync: page %s/%s failed, keeping previous snapshot.", len(pages) + 1, total_pages)
+                return None
+            pages.append(result)
+        first = pages[0]
+        self.synced_at = time.monotonic()
+
+        modified_pages = [result for result in pages if not result.not_modified]
+        # Lenta qisqargan bo'lsa (sahifalar kam keldi), o'zgarmagan sahifalar ham yangi snapshot talab qiladi
+        complete = len(pages) >= first.total_pages
+        if self.snapshot is not None and not modified_pages and complete and first.total_items == self.snapshot.total_items:
+            self.last_delta = SyncDelta()
+            logging.info("Vacancy sync: feed unchanged (%s pages not modified), keeping snapshot v%s.", len(pages), self.snapshot.version)
+            self._notify_synced(self.snapshot)
+            return self.snapshot
+
+        # Sinxronizatsiya davomida lenta siljisa, bir vakansiya ikki sahifada kelishi mumkin
+        seen_ids = set()
+        unique_vacancies = []
+        for result in pages:
+            for vacancy in result.vacancies:
+                vacancy_id = vacancy.id
+                if vacancy_id is not None:
+                    if vacancy_id in seen_ids:
+                        continue
+                    seen_ids.add(vacancy_id)
+                unique_vacancies.append(vacancy)
+
+        snapshot = VacancySnapshot(
+            unique_vacancies,
+            items_per_page=len(first.vacancies) or DEFAULT_ITEMS_PER_PAGE,
+            version=self._version + 1
+        )
+        modified_ids = {v.id for result in modified_pages for v in result.vacancies}
+        delta = compute_delta(self.snapshot, snapshot, modified_ids)
+        self.last_delta = delta
+        if self.snapshot is not None and not delta and list(self.snapshot.by_id) == list(snapshot.by_id):
+            logging.info("Vacancy sync: no vacancy changes, keeping snapshot v%s.", self.snapshot.version)
+            self._notify_synced(self.snapshot)
+            return self.snapshot
+
+        self._version = snapshot.version
+        self.snapshot = snapshot
+        logging.info(
+            "Vacancy sync: snapshot v%s with %s vacancies (%s pages, %s modified) built in %.2fs. %s",
+            snapshot.version, snapshot.total_items, len(pages), len(modified_pages), time.monotonic() - started, delta
+        )
+        for callback in self._listeners:
+            try:
+                callback(snapshot, delta)
+            except Exception:
+                logging.exception("Vacancy sync listener %r failed.", callback)
+        self._notify_synced(snapshot)
+        return snapshot
+
+    async def run(self):
+        """Sync loop; runs until cancelled."""
+        while True:
+            try:
+                snapshot = await self.sync_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logging.exception("Vacancy sync: unexpected error.")
+                snapshot = None
+            await asyncio.sleep(self.interval if snapshot is not None else min(self.interval, SYNC_RETRY_DELAY))
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run(), name="vacancy-sync")
+            logging.info("Vacancy synchroniser started (interval=%ss).", self.interval)
+
+    async def stop(self):
+        if self._task and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            logging.info("Vacancy synchroniser stopped.")
+        self._task = None
@@ -0,0 +1,90 @@
+import asyncio
+import logging
+import signal
+from urllib.parse import urlsplit
+
+from aiohttp import web
+from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+
+from metrics import metrics_handler
+
+
+async def _healthz(request: web.Request) -> web.Response:
+    return web.Response(text="ok")
+
+
+def create_webhook_app(dispatcher: Dispatcher, bot: Bot, path: str, secret_token: str) -> web.Application:
+    """
+    aiohttp application that receives Telegram updates on `path`.
+    Requests without the matching X-Telegram-Bot-Api-Secret-Token header are rejected by SimpleRequestHandler.
+    """
+    app = web.Application()
+    SimpleRequestHandler(
+        dispatcher=dispatcher,
+        bot=bot,
+        secret_token=secret_token,
+        handle_in_background=True # Telegram'ga darhol 200 qaytariladi, update fonda qayta ishlanadi
+    ).register(app, path=path)
+    app.router.add_get("/healthz", _healthz) # Load balancer tekshiruvi uchun
+    app.router.add_get("/metrics", metrics_handler) # Prometheus
+    setup_application(app, dispatcher, bot=bot) # dp.startup / dp.shutdown signallari
+    return app
+
+
+async def run_webhook(
+    dispatcher: Dispatcher,
+    bot: Bot,
+    webhook_url: str,
+    path: str,
+    secret_token: str,
+    host: str = "0.0.0.0",
+    port: int = 8080,
+    allowed_updates: list[str] | None = None
+):
+    """Serves the webhook app until cancelled, registering webhook_url + path with Telegram on startup."""
+    if not secret_token:
+        raise RuntimeError("WEBHOOK_SECRET o'rnatilmagan: webhook rejimida secret token majburiy.")
+    url = urlsplit(webhook_url)
+    if url.scheme != "https" or not url.hostname:
+        # Telegram faqat https manzilga update yuboradi; bo'sh yoki nisbiy URL set_webhook'da xato beradi
+        raise RuntimeError(f"WEBHOOK_URL noto'g'ri ({webhook_url!r}): webhook rejimida to'liq https:// manzil majburiy.")
+
+    app = create_webhook_app(dispatcher, bot, path, secret_token)
+
+    async def set_webhook(_app: web.Application):
+        # Bir nechta replika bir xil URL'ni o'rnatadi - bu idempotent.
+        # To'xtashda webhook o'chirilmaydi, aks holda boshqa replikalar ham update olmay qoladi.
+        await bot.set_webhook(
+            url=f"{webhook_url.rstrip('/')}{path}",
+            secret_token=secret_token,
+            allowed_updates=allowed_updates if allowed_updates is not None else dispatcher.resolve_used_update_types()
+        )
+        logging.info("Webhook set to %s%s", webhook_url.rstrip('/'), path)
+
+    app.on_startup.append(set_webhook)
+
+    # SIGTERM (orkestrator replikani shunday to'xtatadi) va SIGINT'da dp.shutdown ishlashi uchun
+    # jarayon o'ldirilmaydi, server tartib bilan to'xtatiladi
+    loop = asyncio.get_running_loop()
+    stop = asyncio.Event()
+    handled_signals = []
+    for signal_number in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(signal_number, stop.set)
+        except (NotImplementedError, RuntimeError):  # Windows yoki asosiy bo'lmagan thread
+            continue
+        handled_signals.append(signal_number)
+
+    runner = web.AppRunner(app)
+    await runner.setup()
+    try:
+        site = web.TCPSite(runner, host=host, port=port)
+        await site.start()
+        logging.info("Webhook server listening on %s:%s%s", host, port, path)
+        await stop.wait()
+        logging.info("Stop signal received, shutting down the webhook server.")
+    finally:
+        for signal_number in handled_signals:
+            loop.remove_signal_handler(signal_number)
+        await runner.cleanup()